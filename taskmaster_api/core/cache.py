@@ -0,0 +1,401 @@
+"""
+A cache backend shared by every worker process on the machine.
+
+Entries live in a dedicated SQLite file in WAL mode, so readers never block
+each other or the single writer, and every gunicorn worker (and the job
+workers) sees the same data without running an external service.
+"""
+
+import os
+import pickle
+import sqlite3
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed);
+CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    key TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    sets INTEGER NOT NULL DEFAULT 0,
+    last_access REAL
+);
+"""
+
+
+class SQLiteCache(BaseCache):
+    """
+    SQLite-backed cache with LRU/TTL eviction and per-key statistics.
+
+    Options (in addition to Django's MAX_ENTRIES and CULL_FREQUENCY):
+        MAX_BYTES: upper bound for the summed size of all values.
+        STATS_FLUSH_INTERVAL: seconds between two writes of the buffered
+            hit/miss counters and LRU access times.
+        MAX_STATS_KEYS: keys with statistics kept; the least recently used
+            are dropped first. Defaults to MAX_ENTRIES.
+
+    Integers are stored as native SQLite integers so `incr()` is a single
+    atomic UPDATE that is safe across processes. Everything else is pickled.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = str(location)
+        self._max_bytes = int(options.get("MAX_BYTES", 64 * 1024 * 1024))
+        self._flush_interval = float(options.get("STATS_FLUSH_INTERVAL", 1.0))
+        self._max_stats_keys = int(options.get("MAX_STATS_KEYS", self._max_entries))
+        self._connection = None
+        self._pid = None
+        # Django keeps one cache instance per thread, so this buffer is never
+        # shared between threads: {key: [hits, misses, sets, last_access]}.
+        self._pending_stats = {}
+        self._last_flush = time.monotonic()
+        self._writes_since_cull = 0
+        self._flushes_since_trim = 0
+
+    # -- connection handling -------------------------------------------------
+
+    @property
+    def _db(self):
+        # A forked child must not reuse its parent's connection.
+        if self._connection is None or self._pid != os.getpid():
+            if self._pid is not None:
+                # Counters inherited from the parent are flushed by the parent.
+                self._pending_stats = {}
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self, **kwargs):
+        # Called at the end of every request; the counters are still only
+        # written once per STATS_FLUSH_INTERVAL.
+        self._flush_stats()
+
+    # -- encoding ------------------------------------------------------------
+
+    @staticmethod
+    def _encode(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    # -- stats ---------------------------------------------------------------
+
+    def _record(self, key, hit=False, miss=False, sets=False):
+        entry = self._pending_stats.setdefault(key, [0, 0, 0, None])
+        entry[0] += hit
+        entry[1] += miss
+        entry[2] += sets
+        if hit or sets:
+            entry[3] = time.time()
+        self._flush_stats()
+
+    def _flush_stats(self, force=False):
+        if not self._pending_stats:
+            return
+        if not force and time.monotonic() - self._last_flush < self._flush_interval:
+            return
+
+        pending, self._pending_stats = self._pending_stats, {}
+        self._last_flush = time.monotonic()
+        rows = [
+            (key, hits, misses, sets, last_access)
+            for key, (hits, misses, sets, last_access) in pending.items()
+        ]
+        try:
+            with self._transaction() as db:
+                db.executemany(
+                    "INSERT INTO cache_stats (key, hits, misses, sets, last_access) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "hits = hits + excluded.hits, misses = misses + excluded.misses, "
+                    "sets = sets + excluded.sets, "
+                    "last_access = coalesce(excluded.last_access, last_access)",
+                    rows,
+                )
+                # Reads only touch the LRU clock here, in one batched write.
+                db.executemany(
+                    "UPDATE cache_entries SET accessed = ? WHERE key = ? AND accessed < ?",
+                    [
+                        (last_access, key, last_access)
+                        for key, _, _, _, last_access in rows
+                        if last_access is not None
+                    ],
+                )
+                # Reads add stats rows too, without ever culling.
+                self._flushes_since_trim += 1
+                if self._flushes_since_trim >= 10:
+                    self._flushes_since_trim = 0
+                    self._trim_stats(db)
+        except sqlite3.OperationalError:
+            # Stats are best effort; never fail a request because of them.
+            pass
+
+    def key_stats(self, key, version=None):
+        """
+        Returns {"hits", "misses", "sets", "last_access"} for `key`.
+        """
+        key = self.make_and_validate_key(key, version=version)
+        self._flush_stats(force=True)
+        row = self._db.execute(
+            "SELECT hits, misses, sets, last_access FROM cache_stats WHERE key = ?",
+            (key,),
+        ).fetchone()
+        hits, misses, sets, last_access = row or (0, 0, 0, None)
+        return {"hits": hits, "misses": misses, "sets": sets, "last_access": last_access}
+
+    def stats(self, top=20):
+        """
+        Returns cache-wide totals and the `top` most requested keys.
+        """
+        self._flush_stats(force=True)
+        db = self._db
+        entries, size = db.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM cache_entries"
+        ).fetchone()
+        hits, misses = db.execute(
+            "SELECT coalesce(sum(hits), 0), coalesce(sum(misses), 0) FROM cache_stats"
+        ).fetchone()
+        keys = db.execute(
+            "SELECT key, hits, misses, sets FROM cache_stats "
+            "ORDER BY hits + misses DESC LIMIT ?",
+            (top,),
+        ).fetchall()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": hits,
+            "misses": misses,
+            "keys": [
+                {"key": key, "hits": h, "misses": m, "sets": s} for key, h, m, s in keys
+            ],
+        }
+
+    # -- helpers -------------------------------------------------------------
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    def _write(self, db, key, value, timeout, now):
+        encoded = self._encode(value)
+        size = 8 if isinstance(encoded, int) else len(encoded)
+        db.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires, accessed, size) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, self.get_backend_timeout(timeout), now, size),
+        )
+
+    def _maybe_cull(self, writes=1):
+        self._writes_since_cull += writes
+        # Checking the limits costs two aggregate reads, so only do it every
+        # few writes.
+        if self._writes_since_cull < 50:
+            return
+        self._writes_since_cull = 0
+        self._cull()
+
+    def _cull(self):
+        with self._transaction() as db:
+            self._cull_entries(db)
+            self._trim_stats(db)
+
+    def _cull_entries(self, db):
+        db.execute(
+            "DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?",
+            (time.time(),),
+        )
+        entries, size = db.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM cache_entries"
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_bytes:
+            return
+        if self._cull_frequency == 0:
+            db.execute("DELETE FROM cache_entries")
+            return
+        # Evict the least recently used entries until both limits hold.
+        while entries > self._max_entries or size > self._max_bytes:
+            db.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY accessed LIMIT ?)",
+                (max(entries // self._cull_frequency, 1),),
+            )
+            entries, size = db.execute(
+                "SELECT count(*), coalesce(sum(size), 0) FROM cache_entries"
+            ).fetchone()
+
+    def _trim_stats(self, db):
+        # Every key ever read gets a row, including keys that were never
+        # set; without a bound the table grows forever. Keys that were only
+        # missed have no last_access and go first.
+        (count,) = db.execute("SELECT count(*) FROM cache_stats").fetchone()
+        if count > self._max_stats_keys:
+            db.execute(
+                "DELETE FROM cache_stats WHERE key IN ("
+                "SELECT key FROM cache_stats ORDER BY coalesce(last_access, 0) "
+                "LIMIT ?)",
+                (count - self._max_stats_keys,),
+            )
+
+    # -- cache API -----------------------------------------------------------
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT expires FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (row[0] is None or row[0] > now):
+                return False
+            self._write(db, key, value, timeout, now)
+        self._record(key, sets=True)
+        self._maybe_cull()
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            "SELECT value, expires FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            self._record(key, miss=True)
+            return default
+        self._record(key, hit=True)
+        return self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._transaction() as db:
+            self._write(db, key, value, timeout, time.time())
+        self._record(key, sets=True)
+        self._maybe_cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute(
+            "UPDATE cache_entries SET expires = ? "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._db.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            "SELECT 1 FROM cache_entries "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Atomically adds `delta` to an integer value, across all processes.
+        """
+        key = self.make_and_validate_key(key, version=version)
+        row = self._db.execute(
+            "UPDATE cache_entries SET value = value + ?, accessed = ? "
+            "WHERE key = ? AND typeof(value) = 'integer' "
+            "AND (expires IS NULL OR expires > ?) RETURNING value",
+            (delta, time.time(), key, time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError("Key '%s' not found or not an integer." % key)
+        self._record(key, sets=True)
+        return row[0]
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        now = time.time()
+        placeholders = ", ".join("?" * len(key_map))
+        rows = self._db.execute(
+            f"SELECT key, value, expires FROM cache_entries WHERE key IN ({placeholders})",
+            list(key_map),
+        ).fetchall()
+        found = {}
+        for key, value, expires in rows:
+            if expires is None or expires > now:
+                found[key_map[key]] = self._decode(value)
+                self._record(key, hit=True)
+        for key in key_map:
+            if key_map[key] not in found:
+                self._record(key, miss=True)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        keys = []
+        with self._transaction() as db:
+            for key, value in data.items():
+                key = self.make_and_validate_key(key, version=version)
+                self._write(db, key, value, timeout, now)
+                keys.append(key)
+        for key in keys:
+            self._record(key, sets=True)
+        self._maybe_cull(len(keys))
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return
+        placeholders = ", ".join("?" * len(keys))
+        self._db.execute(
+            f"DELETE FROM cache_entries WHERE key IN ({placeholders})", keys
+        )
+
+    def clear(self):
+        self._pending_stats = {}
+        with self._transaction() as db:
+            db.execute("DELETE FROM cache_entries")
+            db.execute("DELETE FROM cache_stats")
+
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT, taking the write lock up front so a
+    read-then-write sequence cannot interleave with another process.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
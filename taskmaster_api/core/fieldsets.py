@@ -0,0 +1,125 @@
+"""
+Sparse fieldsets for read endpoints: `?fields=` and `?expand=`.
+
+    ?fields=id,title,assignee_details      only these fields
+    ?fields=id,project_details.title       dotted names select nested fields
+    ?expand=assignee_details               nest only these relations, every
+                                           other relation is rendered as ids
+
+Without the parameters responses are unchanged (everything is included and
+expanded). Unknown names are ignored.
+"""
+
+from rest_framework import permissions, serializers
+
+
+def parse_field_list(value):
+    """
+    "a,b.c,b.d" -> {"a": {}, "b": {"c": {}, "d": {}}}
+    """
+    tree = {}
+    for item in value.split(","):
+        node = tree
+        for part in item.strip().split("."):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class Fieldset:
+    """
+    The fields and expansions requested for one serializer. `fields` and
+    `expand` are trees from parse_field_list(); None means "everything".
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields or None
+        self.expand = expand
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        fields = query_params.get("fields")
+        expand = query_params.get("expand")
+        return cls(
+            parse_field_list(fields) if fields else None,
+            parse_field_list(expand) if expand is not None else None,
+        )
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.includes(name) and (self.expand is None or name in self.expand)
+
+    def nested(self, name):
+        return Fieldset(
+            self.fields.get(name) if self.fields is not None else None,
+            self.expand.get(name, {}) if self.expand is not None else None,
+        )
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Drops the fields that were not requested and collapses relations that
+    were not expanded to their primary keys. Serializers list their
+    relations in Meta.expandable_fields as {field name: source}.
+
+    The fieldset comes from context["fieldset"]; nested serializers using
+    this mixin get the part of it under their field name.
+    """
+
+    def get_fieldset(self):
+        path = []
+        node = self
+        while node.parent is not None:
+            # The child of a ListSerializer is bound with an empty name.
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        fieldset = self.context.get("fieldset")
+        for name in reversed(path):
+            if fieldset is None:
+                break
+            fieldset = fieldset.nested(name)
+        return fieldset
+
+    def get_fields(self):
+        fields = super().get_fields()  # type: ignore[misc]
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return fields
+
+        fields = {name: field for name, field in fields.items() if fieldset.includes(name)}
+        for name, source in getattr(self.Meta, "expandable_fields", {}).items():  # type: ignore[attr-defined]
+            if name in fields and not fieldset.expands(name):
+                kwargs = {"source": source} if source != name else {}
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=isinstance(fields[name], serializers.ListSerializer),
+                    read_only=True,
+                    **kwargs,
+                )
+        return fields
+
+
+class SparseFieldsetViewMixin:
+    """
+    Reads the fieldset of safe requests and lets the serializer class shape
+    the queryset for it with its optimize_queryset() classmethod. Writes
+    always use (and answer with) the full serializer.
+    """
+
+    def get_fieldset(self):
+        if self.request.method not in permissions.SAFE_METHODS:  # type: ignore[attr-defined]
+            return None
+        return Fieldset.from_query_params(self.request.query_params)  # type: ignore[attr-defined]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()  # type: ignore[misc]
+        context["fieldset"] = self.get_fieldset()
+        return context
+
+    def optimize_queryset(self, queryset):
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+        return self.get_serializer_class().optimize_queryset(queryset, fieldset)  # type: ignore[attr-defined]
@@ -37,7 +37,7 @@ REST_FRAMEWORK = {
     # This setting is what enables the Swagger UI to work
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.RevocableJWTAuthentication",
     ),
 }
 
@@ -74,9 +74,21 @@ SIMPLE_JWT = {
     # it gives you a new access token AND a new refresh token.
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": False,
+    # Tokens carry a hash of the password they were issued for, so changing
+    # the password signs the user out everywhere. Logged-out tokens are
+    # refused through users/revocation.py.
+    "CHECK_REVOKE_TOKEN": True,
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.RevocableTokenRefreshSerializer",
     # ... other settings can go here
 }
 
+# Email logins find the user with a single query; ModelBackend keeps username
+# logins working for the admin.
+AUTHENTICATION_BACKENDS = [
+    "users.backends.EmailBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -94,9 +106,15 @@ INSTALLED_APPS = [
     "tasks.apps.TasksConfig",
     "projects.apps.ProjectsConfig",
     "invitations.apps.InvitationsConfig",
+    "jobs.apps.JobsConfig",
+    "monitoring.apps.MonitoringConfig",
+    "perf.apps.PerfConfig",
 ]
 
 MIDDLEWARE = [
+    # First, so its latency covers every other middleware.
+    "monitoring.middleware.MetricsMiddleware",
+    "monitoring.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -112,7 +130,8 @@ ROOT_URLCONF = "core.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        # Templates shared by the apps, e.g. the admin's autocomplete filter.
+        "DIRS": [BASE_DIR / "core" / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -131,13 +150,141 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Where the database and the cache live. The web and job worker containers
+# share it through a volume (docker-compose.yml), so both see the same queue.
+DATA_DIR = Path(os.environ.get("DATA_DIR", BASE_DIR))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": DATA_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Web and job workers write concurrently; wait for the write lock
+            # instead of failing immediately with "database is locked".
+            "timeout": 20,
+        },
     }
 }
 
+# One cache shared by all gunicorn and job workers on this machine, backed by
+# a SQLite file in WAL mode. See core/cache.py.
+CACHES = {
+    "default": {
+        "BACKEND": "core.cache.SQLiteCache",
+        "LOCATION": os.environ.get("CACHE_PATH", DATA_DIR / "cache.sqlite3"),
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 100_000,
+            "MAX_BYTES": 128 * 1024 * 1024,
+        },
+    }
+}
+
+# Test runs use a cache and metrics directory of their own, see
+# core/test_runner.py.
+TEST_RUNNER = "core.test_runner.TestRunner"
+
+# Per-route request metrics exported on /api/_metrics, see monitoring/metrics.py.
+METRICS = {
+    "DIR": os.environ.get("METRICS_DIR", BASE_DIR / "metrics"),
+    "FLUSH_INTERVAL": 5.0,
+    "TOKEN": os.environ.get("METRICS_TOKEN", ""),
+}
+
+# On-demand request profiler, off by default. See monitoring/profiler.py.
+PROFILER = {
+    "ENABLED": os.environ.get("PROFILER_ENABLED", "") == "1",
+    "SAMPLE_RATE": float(os.environ.get("PROFILER_SAMPLE_RATE", 0)),
+    "LATENCY_THRESHOLD": (
+        float(os.environ["PROFILER_LATENCY_THRESHOLD"])
+        if os.environ.get("PROFILER_LATENCY_THRESHOLD")
+        else None
+    ),
+    "DIR": os.environ.get("PROFILER_DIR", BASE_DIR / "profiles"),
+    "MAX_PROFILES": 50,
+}
+
+# Background job queue, see jobs/conf.py for all options.
+JOBS = {
+    "WORKERS": int(os.environ.get("JOB_WORKERS", 2)),
+    "MODE": os.environ.get("JOB_WORKER_MODE", "thread"),
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_BASE": timedelta(seconds=10),
+}
+
+
+# How long a project invitation can be accepted. Expired and answered
+# invitations are removed by `manage.py purge_invitations`.
+INVITATION_TTL = timedelta(days=14)
+
+# Seconds a project's dashboard statistics are cached. Task writes invalidate
+# them right away; the timeout only bounds the drift of the overdue and
+# due-this-week counts, which change with the clock.
+PROJECT_STATS_CACHE_TIMEOUT = 60
+
+# Seconds the member lists of the user directory (/api/users/?project=) are
+# cached. Joining or leaving a project invalidates them; the timeout bounds
+# how long a changed avatar or name can show up stale.
+USER_DIRECTORY_CACHE_TIMEOUT = 300
+
+# Logged-out tokens are refused by every worker within REFRESH_INTERVAL
+# seconds: each one checks an in-memory Bloom filter of the revoked tokens
+# and reads the new revocations at most that often. See users/revocation.py.
+TOKEN_REVOCATION = {
+    "REFRESH_INTERVAL": 2.0,
+    "CAPACITY": 10_000,
+    "ERROR_RATE": 0.001,
+}
+
+# At most SLOTS password hashes (login, register, password change) are
+# computed at once across all workers; more requests get a 503 with
+# Retry-After instead of tying up the workers. See users/hashing.py.
+PASSWORD_HASHING = {
+    "SLOTS": int(os.environ.get("PASSWORD_HASHING_SLOTS", 2)),
+    "LEASE": 10,
+    "RETRY_AFTER": 1,
+}
+
+# How long before a task's deadline its assignee (or author) is reminded by
+# `manage.py send_reminders`. Tasks created closer to their deadline than
+# this are reminded on the next tick.
+TASK_REMINDER_LEAD_TIME = timedelta(hours=24)
+
+# Reminders go out by email; the console backend just prints them.
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+)
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "taskmaster@localhost")
+
+# `manage.py prune_activity` deletes task activity older than the retention
+# period, and compacts older history by dropping entries that only recorded
+# a task's position on the board.
+TASK_ACTIVITY_RETENTION = timedelta(days=365)
+TASK_ACTIVITY_COMPACT_AFTER = timedelta(days=30)
+
+# `manage.py archive_tasks` moves DONE tasks that haven't changed for this
+# long out of the live task table; they can be searched and restored from
+# /api/archived-tasks/.
+TASK_ARCHIVE_AFTER = timedelta(days=90)
+
+# Deleted projects are purged by a background job in batches of this many
+# rows. Each job run stops after PROJECT_PURGE_JOB_SECONDS and queues its
+# continuation, so one huge project can't hog a worker.
+PROJECT_PURGE_BATCH_SIZE = 500
+PROJECT_PURGE_JOB_SECONDS = 5
+
+# Bulk task imports (`manage.py import_tasks`, /api/projects/<id>/import/)
+# validate and insert this many rows per transaction. The per-row error
+# report keeps the first TASK_IMPORT_MAX_ERRORS failures. A background
+# import runs for up to TASK_IMPORT_JOB_SECONDS, then queues its
+# continuation, well within the job queue's lock timeout.
+TASK_IMPORT_BATCH_SIZE = 1000
+TASK_IMPORT_MAX_ERRORS = 1000
+TASK_IMPORT_JOB_SECONDS = 300
+# The upload of an import is deleted once it is done. A failed import keeps
+# its upload this long for a retry, then `manage.py gc_media` collects it.
+TASK_IMPORT_FAILED_UPLOAD_TTL = timedelta(days=7)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -177,6 +324,21 @@ MEDIA_ROOT = BASE_DIR / "media"
 STATIC_URL = "static/"
 STATIC_ROOT = "/app/staticfiles"
 
+# Uploads are stored under their content hash, so media URLs are immutable and
+# nginx can cache them forever. See core/storage.py.
+STORAGES = {
+    "default": {
+        "BACKEND": "core.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Unreferenced blobs younger than this are kept by `manage.py gc_media`, so an
+# upload whose database row is not committed yet is never collected.
+MEDIA_GC_GRACE_PERIOD = timedelta(hours=1)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
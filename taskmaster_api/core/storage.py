@@ -0,0 +1,112 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names every file after the SHA-256 of its content.
+
+    A file uploaded as ``avatars/me.png`` is stored as
+    ``avatars/<first two hex chars>/<sha256>.png``. Because the name is derived
+    from the bytes, a URL can never point at different content, so it is safe
+    to cache forever, and identical uploads share a single blob on disk.
+    """
+
+    # Number of hex characters used for the fan-out directory.
+    FANOUT = 2
+
+    def get_available_name(self, name, max_length=None):
+        # Content-addressed names never collide with a *different* file, so
+        # there is no need to append random suffixes like the default storage.
+        return name
+
+    def content_name(self, name, content):
+        """
+        Returns the content-addressed name for `content` uploaded as `name`.
+        """
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+
+        digest = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+        if hasattr(content, "seek"):
+            content.seek(0)
+
+        hexdigest = digest.hexdigest()
+        return posixpath.join(
+            directory, hexdigest[: self.FANOUT], f"{hexdigest}{extension}"
+        )
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        full_path = self.path(name)
+
+        # The blob is already stored, e.g. another user uploaded the same image.
+        # Its mtime is refreshed, so `gc_media`'s grace period starts over and
+        # an old unreferenced blob isn't deleted before the row that now
+        # references it commits.
+        if os.path.exists(full_path):
+            try:
+                os.utime(full_path)
+                return name
+            except FileNotFoundError:
+                # Collected in the meantime; write it again.
+                pass
+
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write into a temporary file next to the target and rename it into
+        # place, so readers (and nginx) never see a half-written blob.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in content.chunks():
+                    tmp_file.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            else:
+                # mkstemp() creates files as 0600, honour the umask instead.
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp_path, 0o666 & ~umask)
+
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._ensure_location_group_id(full_path)
+        return name
+
+    def is_content_addressed(self, name):
+        """
+        Returns True if `name` looks like a blob written by this storage.
+        """
+        parent, filename = posixpath.split(name)
+        fanout = posixpath.basename(parent)
+        digest = os.path.splitext(filename)[0]
+        return (
+            len(digest) == 64
+            and digest.startswith(fanout)
+            and len(fanout) == self.FANOUT
+            and all(c in "0123456789abcdef" for c in digest)
+        )
@@ -0,0 +1,33 @@
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the suite against files of its own, so a test run never shares
+    cache keys (hashing slot leases, directory versions, stats) or exported
+    metrics with a live server on this machine.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._directory = tempfile.TemporaryDirectory(prefix="taskmaster-tests-")
+        self._settings = override_settings(
+            CACHES={
+                **settings.CACHES,
+                "default": {
+                    **settings.CACHES["default"],
+                    "LOCATION": f"{self._directory.name}/cache.sqlite3",
+                },
+            },
+            METRICS={**settings.METRICS, "DIR": f"{self._directory.name}/metrics"},
+        )
+        self._settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings.disable()
+        self._directory.cleanup()
+        super().teardown_test_environment(**kwargs)
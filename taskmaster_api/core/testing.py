@@ -0,0 +1,83 @@
+"""
+Helpers for tests that assert on the SQL the ORM generates.
+"""
+
+import re
+
+from django.db import connection
+
+# "SCAN <table>" reads every row, with or without "USING INDEX" (which only
+# means the rows are visited in index order). Index seeks show up as "SEARCH".
+# Scanning a subquery's result rows is not a table scan; the subquery's own
+# plan is listed (and checked) separately.
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW|subquery)(\w+)")
+# B-trees SQLite builds on the fly for ORDER BY, GROUP BY and DISTINCT.
+TEMP_BTREE = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+
+
+def explain_query_plan(sql, params=()):
+    """
+    Returns the detail column of SQLite's EXPLAIN QUERY PLAN for `sql`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def queryset_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return explain_query_plan(sql, params)
+
+
+def full_scans(plan):
+    """
+    Returns the tables a plan reads in full.
+    """
+    return [
+        match.group(1) for line in plan if (match := FULL_SCAN.match(line.strip()))
+    ]
+
+
+def explain_query_plan_tree(sql, params=()):
+    """
+    Returns EXPLAIN QUERY PLAN as indented lines, one level per nesting of
+    the plan (subqueries, compound SELECTs, correlated lookups).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        rows = cursor.fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def temp_btrees(plan):
+    """
+    Returns what each temporary b-tree of a plan is built for.
+    """
+    return [
+        match.group(1) for line in plan if (match := TEMP_BTREE.search(line.strip()))
+    ]
+
+
+def capture_select_plans(func):
+    """
+    Runs `func` and returns (sql, plan) for every SELECT it executes, with
+    the plan from explain_query_plan_tree().
+    """
+    statements = []
+
+    def record(execute, sql, params, many, context):
+        statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        func()
+    return [
+        (sql, explain_query_plan_tree(sql, params))
+        for sql, params in statements
+        if sql.lstrip().upper().startswith("SELECT")
+    ]
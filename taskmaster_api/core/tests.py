@@ -0,0 +1,143 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory, gettempdir
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from monitoring.metrics import metrics_directory
+
+from .cache import SQLiteCache
+from .storage import ContentAddressedStorage
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.sqlite3")
+
+    def make_cache(self, **options):
+        cache = SQLiteCache(self.path, {"OPTIONS": options})
+        self.addCleanup(lambda: cache._connection and cache._connection.close())
+        return cache
+
+    def test_get_set_add_incr_delete(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get("missing"))
+        cache.set("key", {"a": 1})
+        self.assertEqual(cache.get("key"), {"a": 1})
+        self.assertFalse(cache.add("key", "other"))
+        self.assertTrue(cache.add("new", 41))
+        self.assertEqual(cache.incr("new"), 42)
+        cache.set_many({"x": 1, "y": 2})
+        self.assertEqual(cache.get_many(["x", "y", "z"]), {"x": 1, "y": 2})
+        self.assertTrue(cache.delete("key"))
+        self.assertFalse(cache.has_key("key"))
+        # Another instance (another worker process) sees the same entries.
+        self.assertEqual(self.make_cache().get("y"), 2)
+
+    def test_expiry(self):
+        cache = self.make_cache()
+        cache.set("short", "value", timeout=10)
+        cache.set("forever", "value", timeout=None)
+        later = time.time() + 11
+        with mock.patch("core.cache.time.time", return_value=later):
+            self.assertIsNone(cache.get("short"))
+            self.assertFalse(cache.has_key("short"))
+            self.assertEqual(cache.get("forever"), "value")
+            # An expired key can be added again.
+            self.assertTrue(cache.add("short", "again"))
+
+    def test_cull_evicts_the_least_recently_used(self):
+        cache = self.make_cache(
+            MAX_ENTRIES=10, CULL_FREQUENCY=2, STATS_FLUSH_INTERVAL=0
+        )
+        for i in range(49):
+            cache.set(f"key-{i}", i)
+        # Read the first key, so it is the most recently used one.
+        cache.get("key-0")
+        cache.set("key-49", 49)
+        (entries,) = cache._db.execute("SELECT count(*) FROM cache_entries").fetchone()
+        self.assertLessEqual(entries, 10)
+        self.assertEqual(cache.get("key-0"), 0)
+        self.assertEqual(cache.get("key-49"), 49)
+        self.assertIsNone(cache.get("key-1"))
+
+    def test_stats_are_counted_and_bounded(self):
+        cache = self.make_cache(MAX_STATS_KEYS=5, STATS_FLUSH_INTERVAL=0)
+        cache.set("key", 1)
+        cache.get("key")
+        cache.get("key")
+        cache.get("absent")
+        self.assertEqual(
+            {k: v for k, v in cache.key_stats("key").items() if k != "last_access"},
+            {"hits": 2, "misses": 0, "sets": 1},
+        )
+        self.assertEqual(cache.stats()["misses"], 1)
+
+        for i in range(60):
+            cache.get(f"never-set-{i}")
+        (rows,) = cache._db.execute("SELECT count(*) FROM cache_stats").fetchone()
+        # Trimmed every 10 flushes.
+        self.assertLess(rows, 15)
+        # Keys that were only missed are dropped before used ones.
+        self.assertEqual(cache.key_stats("key")["hits"], 2)
+
+    def test_close_only_flushes_on_the_interval(self):
+        cache = self.make_cache(STATS_FLUSH_INTERVAL=3600)
+        cache.set("key", 1)
+        cache.get("key")
+        # request_finished calls close() after every request.
+        cache.close()
+        (rows,) = cache._db.execute("SELECT count(*) FROM cache_stats").fetchone()
+        self.assertEqual(rows, 0)
+        self.assertEqual(cache.key_stats("key")["hits"], 1)
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def test_name_is_derived_from_the_content(self):
+        name = self.storage.save("avatars/Me.PNG", ContentFile(b"image bytes"))
+        digest = hashlib.sha256(b"image bytes").hexdigest()
+        self.assertEqual(name, f"avatars/{digest[:2]}/{digest}.png")
+        self.assertTrue(self.storage.is_content_addressed(name))
+        self.assertFalse(self.storage.is_content_addressed("avatars/me.png"))
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b"image bytes")
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.storage.save("avatars/a.png", ContentFile(b"same"))
+        second = self.storage.save("avatars/b.png", ContentFile(b"same"))
+        other = self.storage.save("avatars/c.png", ContentFile(b"different"))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        directory = os.path.dirname(self.storage.path(first))
+        # No leftovers of the temporary files.
+        self.assertEqual(os.listdir(directory), [os.path.basename(first)])
+
+    def test_a_dedup_hit_refreshes_the_mtime(self):
+        name = self.storage.save("avatars/a.png", ContentFile(b"same"))
+        long_ago = time.time() - 86400
+        os.utime(self.storage.path(name), (long_ago, long_ago))
+
+        self.storage.save("avatars/b.png", ContentFile(b"same"))
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), long_ago + 3600)
+
+
+class TestRunnerTests(SimpleTestCase):
+    def test_metrics_are_written_to_a_temporary_directory(self):
+        self.assertTrue(metrics_directory().is_relative_to(gettempdir()))
+
+    def test_the_cache_is_not_shared_with_a_live_server(self):
+        cache = caches["default"]
+        self.assertIsInstance(cache, SQLiteCache)
+        self.assertTrue(Path(cache._path).is_relative_to(gettempdir()))
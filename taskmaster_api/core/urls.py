@@ -36,6 +36,8 @@ urlpatterns = [
     path("api/", include("users.urls")),
     path("api/", include("projects.urls")),
     path("api/", include("invitations.urls")),
+    path("api/", include("jobs.urls")),
+    path("api/", include("monitoring.urls")),
     # Documentation URLs
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
@@ -1,10 +1,16 @@
 from django.contrib import admin
 
+from core.admin import AutocompleteFilter, LargeTableAdmin
+
 
 # Register your models here.
-class InvitationAdmin(admin.ModelAdmin):
+class InvitationAdmin(LargeTableAdmin):
     list_display = ("id", "email", "project", "token", "status")
-    search_fields = ("email", "project")
+    list_select_related = ("project",)
+    # Emails are stored lowercase; an exact match seeks the email index.
+    search_fields = ("email__exact",)
+    list_filter = ("status", ("project", AutocompleteFilter))
+    autocomplete_fields = ("project", "invited_by")
 
 
 # Register your models here.
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    Invitation = apps.get_model("invitations", "Invitation")
+
+    # Invitations that only differ by the case of the email would violate
+    # unique_together once lowercased; keep the oldest one of each group.
+    duplicates = (
+        Invitation.objects.annotate(normalized=Lower("email"))
+        .values("normalized", "project", "status")
+        .annotate(rows=Count("id"), keep=Min("id"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        Invitation.objects.annotate(normalized=Lower("email")).filter(
+            normalized=group["normalized"],
+            project=group["project"],
+            status=group["status"],
+        ).exclude(id=group["keep"]).delete()
+
+    Invitation.objects.exclude(email=Lower("email")).update(email=Lower("email"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invitations', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:46
+
+import invitations.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_expires_at(apps, schema_editor):
+    # Existing invitations expire one TTL after they were sent, not after the
+    # migration ran.
+    Invitation = apps.get_model("invitations", "Invitation")
+    Invitation.objects.update(expires_at=F("created_at") + settings.INVITATION_TTL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invitations', '0003_lowercase_emails'),
+        ('projects', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invitation',
+            name='expires_at',
+            field=models.DateTimeField(default=invitations.models.default_expiry),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['email', 'expires_at'], name='invitation_email_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['status', 'expires_at'], name='invitation_status_expiry_idx'),
+        ),
+    ]
@@ -1,11 +1,38 @@
 from django.db import models
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from projects.models import Project
+from users.models import normalize_email
 import uuid
 
 User = get_user_model()
 
 
+def default_expiry():
+    return timezone.now() + settings.INVITATION_TTL
+
+
+class InvitationQuerySet(models.QuerySet):
+    def active(self):
+        """Invitations that have not expired yet, whatever their status."""
+        return self.filter(expires_at__gt=timezone.now())
+
+    def pending(self):
+        """Invitations that can still be accepted or declined."""
+        return self.active().filter(status=Invitation.Status.PENDING)
+
+    def expired_pending(self):
+        return self.filter(
+            status=Invitation.Status.PENDING, expires_at__lte=timezone.now()
+        )
+
+    def closed(self):
+        return self.filter(
+            status__in=[Invitation.Status.ACCEPTED, Invitation.Status.DECLINED]
+        )
+
+
 # Create your models here.
 class Invitation(models.Model):
     class Status(models.TextChoices):
@@ -28,10 +55,31 @@ class Invitation(models.Model):
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=default_expiry)
+
+    objects = InvitationQuerySet.as_manager()
 
     class Meta:
         # A user can only be invited to a project once while the invite is pending.
         unique_together = ("email", "project", "status")
+        indexes = [
+            # "My invitations": WHERE email = ? AND expires_at > now
+            models.Index(
+                fields=["email", "expires_at"], name="invitation_email_expiry_idx"
+            ),
+            # purge_invitations: closed rows, and pending rows past expires_at.
+            models.Index(
+                fields=["status", "expires_at"], name="invitation_status_expiry_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Invitation for {self.email} to {self.project.title}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
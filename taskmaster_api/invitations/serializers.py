@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from projects.serializers import ProjectBasicSerializer, ProjectSerializer
-from users.serializers import UserSerializer
+from users.serializers import NormalizedEmailField, UserSerializer
 from .models import Invitation
 
 
@@ -9,11 +9,46 @@ class InvitationSerializer(serializers.ModelSerializer):
     # This is a common and good approach.
     project = ProjectSerializer(read_only=True)
     invited_by = UserSerializer(read_only=True)
+    email = NormalizedEmailField()
 
     class Meta:
         model = Invitation
-        fields = ["id", "email", "project", "invited_by", "status", "token"]
-        read_only_fields = ["status", "token"]
+        fields = [
+            "id",
+            "email",
+            "project",
+            "invited_by",
+            "status",
+            "token",
+            "expires_at",
+        ]
+        read_only_fields = ["status", "token", "expires_at"]
+
+
+class BulkInvitationSerializer(serializers.Serializer):
+    """
+    Input of the bulk invite endpoint. Emails are validated one by one in the
+    view, so a single typo does not reject the whole batch.
+    """
+
+    emails = serializers.ListField(
+        child=serializers.CharField(max_length=254),
+        allow_empty=False,
+        max_length=500,
+    )
+
+
+class BulkInvitationResultSerializer(serializers.Serializer):
+    """
+    Compact per-email outcome of a bulk invite.
+    """
+
+    # As submitted, not normalized.
+    email = serializers.CharField()
+    result = serializers.ChoiceField(
+        choices=["invited", "already_member", "already_invited", "duplicate", "invalid"]
+    )
+    token = serializers.UUIDField(required=False)
 
 
 class ActionInvitationSerializer(serializers.Serializer):
@@ -38,4 +73,5 @@ class PendingInvitationSerializer(serializers.ModelSerializer):
             "status",
             "token",
             "created_at",
+            "expires_at",
         ]
@@ -1,3 +1,227 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.testing import explain_query_plan, full_scans
+from projects.models import Project, ProjectMembership
+from .models import Invitation
+
+User = get_user_model()
+
+
+class InvitationEmailTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.invitee = User.objects.create_user(
+            username="bob", email="bob@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.owner)
+        self.client = APIClient()
+
+    def test_invitation_email_is_stored_lowercased(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            f"/api/projects/{self.project.id}/invitations/",
+            {"email": "Bob@Example.com"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Invitation.objects.get().email, "bob@example.com")
+
+    def test_pending_invitations_seek_the_email_index(self):
+        Invitation.objects.create(
+            email="BOB@example.com", project=self.project, invited_by=self.owner
+        )
+        self.client.force_authenticate(self.invitee)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/invitations/pending/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+        lookups = [
+            q["sql"]
+            for q in context.captured_queries
+            if 'FROM "invitations_invitation"' in q["sql"]
+        ]
+        self.assertEqual(len(lookups), 1)
+        plan = explain_query_plan(lookups[0])
+        self.assertNotIn("invitations_invitation", full_scans(plan), plan)
+        self.assertTrue(
+            any(
+                line.startswith("SEARCH invitations_invitation USING")
+                for line in plan
+            ),
+            plan,
+        )
+
+
+class BulkInvitationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.member = User.objects.create_user(
+            username="bob", email="bob@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.owner)
+        ProjectMembership.objects.create(project=self.project, user=self.member)
+        Invitation.objects.create(
+            email="carol@example.com", project=self.project, invited_by=self.owner
+        )
+        Invitation.objects.create(
+            email="dave@example.com",
+            project=self.project,
+            invited_by=self.owner,
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def invite(self, emails):
+        return self.client.post(
+            f"/api/projects/{self.project.id}/invitations/bulk/",
+            {"emails": emails},
+            format="json",
+        )
+
+    def test_results_match_the_input(self):
+        emails = [
+            "Erin@Example.com",
+            "erin@example.com",
+            "not an email",
+            "BOB@example.com",
+            "Carol@example.com",
+            "dave@example.com",
+        ]
+        response = self.invite(emails)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [(r["email"], r["result"]) for r in response.data],
+            list(
+                zip(
+                    emails,
+                    [
+                        "invited",
+                        "duplicate",
+                        "invalid",
+                        "already_member",
+                        "already_invited",
+                        # Expired, so invited again.
+                        "invited",
+                    ],
+                )
+            ),
+        )
+        self.assertIn("token", response.data[0])
+        self.assertNotIn("token", response.data[1])
+        self.assertEqual(
+            set(Invitation.objects.pending().values_list("email", flat=True)),
+            {"carol@example.com", "dave@example.com", "erin@example.com"},
+        )
+
+    def test_nothing_to_invite(self):
+        response = self.invite(["bob@example.com", "nope"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["result"] for r in response.data], ["already_member", "invalid"]
+        )
+
+    def test_only_the_owner_can_invite(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.invite(["erin@example.com"]).status_code, 403)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        with CaptureQueriesContext(connection) as few:
+            self.invite([f"user{i}@example.com" for i in range(3)] + ["bob@example.com"])
+        # Under the 142 rows that fit in one INSERT with SQLite's variable limit.
+        with CaptureQueriesContext(connection) as many:
+            self.invite(
+                [f"other{i}@example.com" for i in range(140)] + ["bob@example.com"]
+            )
+        # The project, members and pending invitations in one UNION, the
+        # expired rows' DELETE and the INSERT, plus the savepoint.
+        self.assertEqual(len(few), 6)
+        self.assertEqual(len(many), 6)
+        self.assertEqual(Invitation.objects.pending().count(), 1 + 3 + 140)
+
+
+@override_settings(INVITATION_TTL=timedelta(days=14))
+class InvitationExpiryTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.invitee = User.objects.create_user(
+            username="bob", email="bob@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.invitee)
+
+    def invitation(self, email="bob@example.com", age=timedelta(0), **fields):
+        invitation = Invitation.objects.create(
+            email=email, project=self.project, invited_by=self.owner, **fields
+        )
+        # created_at is auto_now_add, so it is moved back with an UPDATE.
+        Invitation.objects.filter(pk=invitation.pk).update(
+            created_at=invitation.created_at - age,
+            expires_at=invitation.expires_at - age,
+        )
+        return invitation
+
+    def test_invitations_expire_after_the_ttl(self):
+        invitation = self.invitation()
+        self.assertAlmostEqual(
+            invitation.expires_at - invitation.created_at,
+            timedelta(days=14),
+            delta=timedelta(seconds=1),
+        )
+        self.assertFalse(invitation.is_expired)
+
+    def test_expired_invitations_cannot_be_accepted_or_declined(self):
+        invitation = self.invitation(age=timedelta(days=15))
+        for action in ("accept", "decline"):
+            response = self.client.post(
+                f"/api/invitations/{action}/",
+                {"token": str(invitation.token)},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(self.project.members.filter(pk=self.invitee.pk).exists())
+        self.assertEqual(self.client.get("/api/invitations/pending/").data, [])
+
+    def test_a_live_invitation_is_accepted(self):
+        invitation = self.invitation(age=timedelta(days=13))
+        response = self.client.post(
+            "/api/invitations/accept/", {"token": str(invitation.token)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.project.members.filter(pk=self.invitee.pk).exists())
+
+    def test_purge_deletes_only_expired_or_answered_invitations(self):
+        pending = self.invitation("pending@example.com")
+        self.invitation("expired@example.com", age=timedelta(days=15))
+        self.invitation("accepted@example.com", status=Invitation.Status.ACCEPTED)
+        self.invitation("declined@example.com", status=Invitation.Status.DECLINED)
+
+        out = StringIO()
+        call_command("purge_invitations", dry_run=True, stdout=out)
+        self.assertIn("closed: 2 row(s) would be deleted", out.getvalue())
+        self.assertIn("expired: 1 row(s) would be deleted", out.getvalue())
+        self.assertEqual(Invitation.objects.count(), 4)
+
+        call_command("purge_invitations", batch_size=1, sleep=0, stdout=StringIO())
+        self.assertEqual(
+            list(Invitation.objects.values_list("pk", flat=True)), [pending.pk]
+        )
@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     AcceptInvitationView,
+    BulkInvitationCreateView,
     InvitationCreateView,
     PendingInvitationListView,
     DeclineInvitationView,
@@ -14,6 +15,11 @@ invitation_urlpatterns = [
         InvitationCreateView.as_view(),
         name="invitation-create",
     ),
+    path(
+        "projects/<int:project_pk>/invitations/bulk/",
+        BulkInvitationCreateView.as_view(),
+        name="invitation-bulk-create",
+    ),
     path(
         "invitations/accept/", AcceptInvitationView.as_view(), name="accept-invitation"
     ),
@@ -5,13 +5,22 @@ from projects.models import Project
 from .serializers import (
     InvitationSerializer,
     ActionInvitationSerializer,
+    BulkInvitationSerializer,
+    BulkInvitationResultSerializer,
     PendingInvitationSerializer,
 )
 from .models import Invitation
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Value
 from django.db.models.query import QuerySet
+from django.shortcuts import get_object_or_404
+from drf_spectacular.utils import extend_schema
 from rest_framework.response import Response
 from typing import cast
-from users.models import CustomUser
+from users.directory import invalidate_user_directory
+from users.models import CustomUser, normalize_email
 
 
 # Create your views here.
@@ -25,7 +34,95 @@ class InvitationCreateView(generics.CreateAPIView):
         if self.request.user != project.owner:
             raise PermissionDenied("You are not the owner of this project.")
 
-        serializer.save(project=project, invited_by=self.request.user)
+        # An expired invitation for the same email would clash with
+        # unique_together, so it is replaced.
+        with transaction.atomic():
+            Invitation.objects.expired_pending().filter(
+                project=project, email=serializer.validated_data["email"]
+            ).delete()
+            serializer.save(project=project, invited_by=self.request.user)
+
+
+class BulkInvitationCreateView(generics.GenericAPIView):
+    """
+    Invites a list of emails to a project in one request.
+
+    Emails that already belong to a member or have a pending invitation are
+    found with a single query and skipped; the rest are inserted with one
+    bulk INSERT. The response only contains a compact result per email.
+    """
+
+    serializer_class = BulkInvitationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(responses={201: BulkInvitationResultSerializer(many=True)})
+    def post(self, request, project_pk):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        project = get_object_or_404(Project.objects.only("id", "owner_id"), pk=project_pk)
+        if project.owner_id != request.user.id:
+            raise PermissionDenied("You are not the owner of this project.")
+
+        # One entry per submitted email, in request order and echoing the
+        # email as it was submitted, so the client can match results to its
+        # input. `by_email` is keyed by the normalized form.
+        results = []
+        by_email = {}
+        for raw_email in serializer.validated_data["emails"]:  # type: ignore
+            email = normalize_email(raw_email)
+            if email in by_email:
+                results.append({"email": raw_email, "result": "duplicate"})
+                continue
+            try:
+                validate_email(email)
+            except ValidationError:
+                results.append({"email": raw_email, "result": "invalid"})
+                continue
+            by_email[email] = {"email": raw_email, "result": "invited"}
+            results.append(by_email[email])
+
+        # One round-trip finds both the members and the pending invitations.
+        members = CustomUser.objects.filter(
+            projectmembership__project=project, email__in=by_email
+        ).annotate(reason=Value("already_member", output_field=CharField()))
+        pending = Invitation.objects.pending().filter(
+            project=project, email__in=by_email
+        ).annotate(reason=Value("already_invited", output_field=CharField()))
+        for email, reason in members.values_list("email", "reason").union(
+            pending.values_list("email", "reason")
+        ):
+            # Being a member wins over a leftover pending invitation.
+            if by_email[email]["result"] != "already_member":
+                by_email[email]["result"] = reason
+
+        invitations = [
+            Invitation(email=email, project=project, invited_by=request.user)
+            for email, entry in by_email.items()
+            if entry["result"] == "invited"
+        ]
+        try:
+            with transaction.atomic():
+                # Expired pending rows would clash with unique_together.
+                Invitation.objects.expired_pending().filter(
+                    project=project, email__in=[i.email for i in invitations]
+                ).delete()
+                Invitation.objects.bulk_create(invitations)
+        except IntegrityError:
+            return Response(
+                {
+                    "detail": "Some of these emails were invited concurrently, please retry."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        for invitation in invitations:
+            by_email[invitation.email]["token"] = invitation.token
+
+        return Response(
+            BulkInvitationResultSerializer(results, many=True).data,
+            status=status.HTTP_201_CREATED if invitations else status.HTTP_200_OK,
+        )
 
 
 class AcceptInvitationView(generics.GenericAPIView):
@@ -38,16 +135,14 @@ class AcceptInvitationView(generics.GenericAPIView):
         token = serializer.validated_data["token"]
 
         try:
-            invitation = Invitation.objects.get(
-                token=token, status=Invitation.Status.PENDING
-            )
+            invitation = Invitation.objects.pending().get(token=token)
         except Invitation.DoesNotExist:
             return Response(
                 {"detail": "Invalid or expired invitation token."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if request.user.email != invitation.email:
+        if normalize_email(request.user.email) != invitation.email:
             return Response(
                 {"detail": "Invalid invitation email"}, status=status.HTTP_403_FORBIDDEN
             )
@@ -55,6 +150,7 @@ class AcceptInvitationView(generics.GenericAPIView):
         invitation.project.members.add(request.user)
         invitation.status = Invitation.Status.ACCEPTED
         invitation.save()
+        invalidate_user_directory(invitation.project_id)
 
         return Response(
             {"detail": "Invitation accepted successfully."}, status=status.HTTP_200_OK
@@ -71,16 +167,14 @@ class DeclineInvitationView(generics.GenericAPIView):
         token = serializer.validated_data["token"]
 
         try:
-            invitation = Invitation.objects.get(
-                token=token, status=Invitation.Status.PENDING
-            )
+            invitation = Invitation.objects.pending().get(token=token)
         except Invitation.DoesNotExist:
             return Response(
                 {"detail": "Invalid or expired invitation token."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if request.user.email != invitation.email:
+        if normalize_email(request.user.email) != invitation.email:
             return Response(
                 {"detail": "Invalid invitation email"}, status=status.HTTP_403_FORBIDDEN
             )
@@ -108,8 +202,11 @@ class PendingInvitationListView(generics.ListAPIView):
         user = cast(CustomUser, self.request.user)
 
         return (
-            Invitation.objects.filter(
-                email__iexact=user.email,
+            # Emails are stored lowercased, so this seeks the index instead of
+            # scanning the table like email__iexact would.
+            Invitation.objects.active()
+            .filter(
+                email=normalize_email(user.email),
             )
             .exclude(status=Invitation.Status.ACCEPTED)
             .select_related("project", "invited_by")
@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+
+# Register your models here.
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "status",
+        "priority",
+        "attempts",
+        "run_at",
+        "finished_at",
+    )
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    readonly_fields = ("created_at", "finished_at", "locked_by", "locked_at")
+
+
+# Register your models here.
+from .models import Job
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+
+DEFAULTS = {
+    # Number of threads/processes started by `manage.py run_workers`.
+    "WORKERS": 2,
+    # "thread" or "process".
+    "MODE": "thread",
+    # Seconds an idle worker sleeps before polling the queue again.
+    "POLL_INTERVAL": 1.0,
+    "MAX_ATTEMPTS": 5,
+    # Retry n waits BACKOFF_BASE * 2 ** (n - 1), capped at BACKOFF_MAX.
+    "BACKOFF_BASE": timedelta(seconds=10),
+    "BACKOFF_MAX": timedelta(hours=1),
+    # A running job renews its lock this often while its handler runs...
+    "HEARTBEAT_INTERVAL": timedelta(minutes=1),
+    # ...and one whose worker has been silent this long is requeued.
+    "LOCK_TIMEOUT": timedelta(minutes=15),
+    # Finished jobs are kept this long for metrics and debugging.
+    "RETENTION": timedelta(days=1),
+}
+
+
+def jobs_setting(name):
+    return getattr(settings, "JOBS", {}).get(name, DEFAULTS[name])
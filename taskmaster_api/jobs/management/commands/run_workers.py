@@ -0,0 +1,122 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from jobs.conf import jobs_setting
+from jobs.metrics import queue_depth
+from jobs.worker import StopFlag, purge_finished_jobs, requeue_stale_jobs, work
+
+# Seconds between two housekeeping passes of the supervisor.
+HOUSEKEEPING_INTERVAL = 60
+
+
+def _process_main(poll_interval):
+    # The supervisor owns Ctrl-C and asks the children to stop with SIGTERM,
+    # which lets them finish the job they are running.
+    stop_flag = StopFlag()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop_flag.set())
+    work(stop_flag, poll_interval=poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of background job workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=jobs_setting("WORKERS"),
+            help="Number of concurrent workers.",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=["thread", "process"],
+            default=jobs_setting("MODE"),
+            help="Run the workers as threads or as separate processes.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=jobs_setting("POLL_INTERVAL"),
+            help="Seconds an idle worker waits before polling again.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Process the jobs that are due and exit once the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        if options["burst"]:
+            processed = work(StopFlag(), options["poll_interval"], burst=True)
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)."))
+            return
+
+        if options["mode"] == "process":
+            # Never share a database connection with forked children.
+            connections.close_all()
+            pool = [
+                multiprocessing.Process(
+                    target=_process_main,
+                    args=(options["poll_interval"],),
+                    daemon=True,
+                )
+                for _ in range(workers)
+            ]
+        else:
+            stop_event = StopFlag()
+            pool = [
+                threading.Thread(
+                    target=work,
+                    args=(stop_event, options["poll_interval"]),
+                    daemon=True,
+                )
+                for _ in range(workers)
+            ]
+
+        stopping = StopFlag()
+
+        def shutdown(signum, frame):
+            stopping.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        for worker in pool:
+            worker.start()
+        self.stdout.write(
+            f"Started {workers} {options['mode']} worker(s). Press Ctrl-C to stop."
+        )
+
+        while not stopping.is_set():
+            self._housekeeping()
+            stopping.wait(HOUSEKEEPING_INTERVAL)
+
+        self.stdout.write("Stopping workers...")
+        for worker in pool:
+            if options["mode"] == "process":
+                worker.terminate()
+            else:
+                stop_event.set()
+        for worker in pool:
+            worker.join()
+        close_old_connections()
+
+    def _housekeeping(self):
+        close_old_connections()
+        requeued = requeue_stale_jobs()
+        purged = purge_finished_jobs()
+        depth = sum(entry["queued"] for entry in queue_depth().values())
+        self.stdout.write(
+            f"[{time.strftime('%H:%M:%S')}] queued={depth} "
+            f"requeued={requeued} purged={purged}"
+        )
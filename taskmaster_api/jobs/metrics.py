@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import Job
+
+
+def queue_depth():
+    """
+    Returns {job name: {"queued": n, "running": n, "oldest_queued": datetime}}.
+    """
+    depth = {}
+    rows = (
+        Job.objects.filter(status__in=[Job.Status.QUEUED, Job.Status.RUNNING])
+        .values("name", "status")
+        .annotate(count=Count("id"), oldest=Min("run_at"))
+        .order_by()
+    )
+    for row in rows:
+        entry = depth.setdefault(
+            row["name"], {"queued": 0, "running": 0, "oldest_queued": None}
+        )
+        if row["status"] == Job.Status.QUEUED:
+            entry["queued"] = row["count"]
+            entry["oldest_queued"] = row["oldest"]
+        else:
+            entry["running"] = row["count"]
+    return depth
+
+
+def throughput(window=timedelta(minutes=5)):
+    """
+    Returns {job name: {"done": n, "failed": n, "per_second": x}} for the jobs
+    that finished within the last `window`.
+    """
+    since = timezone.now() - window
+    stats = {}
+    rows = (
+        Job.objects.filter(
+            status__in=[Job.Status.DONE, Job.Status.FAILED], finished_at__gte=since
+        )
+        .values("name", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        entry = stats.setdefault(row["name"], {"done": 0, "failed": 0})
+        key = "done" if row["status"] == Job.Status.DONE else "failed"
+        entry[key] = row["count"]
+
+    seconds = window.total_seconds()
+    for entry in stats.values():
+        entry["per_second"] = round((entry["done"] + entry["failed"]) / seconds, 3)
+    return stats
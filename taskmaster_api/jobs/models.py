@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+
+
+# Create your models here.
+class Job(models.Model):
+    """
+    A unit of deferred work, stored in the main database so it is durable and
+    is committed atomically with the request that enqueued it.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "Q", "Queued"
+        RUNNING = "R", "Running"
+        DONE = "D", "Done"
+        FAILED = "F", "Failed"
+
+    name = models.CharField(max_length=100, help_text="Registered handler name.")
+    payload = models.JSONField(default=dict, blank=True)
+    # Higher numbers run first.
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(
+        max_length=1, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(
+        default=timezone.now, help_text="The job is not picked up before this time."
+    )
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim with:
+            #   WHERE status = 'Q' AND run_at <= now ORDER BY priority DESC, run_at
+            models.Index(
+                fields=["status", "-priority", "run_at"], name="job_claim_idx"
+            ),
+            # Throughput metrics and retention purge scan recently finished jobs.
+            models.Index(fields=["status", "finished_at"], name="job_finished_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
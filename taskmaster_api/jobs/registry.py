@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .conf import jobs_setting
+from .models import Job
+
+_handlers = {}
+
+
+def job(name, *, priority=0, max_attempts=None):
+    """
+    Registers `func` as the handler for jobs called `name`.
+
+    The decorated function gets an `enqueue(**payload)` attribute, so callers
+    can write `purge_project.enqueue(project_id=1)`. The payload is stored as
+    JSON, so it must only contain JSON-serializable values.
+    """
+
+    def decorator(func):
+        if name in _handlers:
+            raise ValueError(f"A job named {name!r} is already registered.")
+        _handlers[name] = func
+
+        def enqueue_func(**payload):
+            return enqueue(
+                name, payload, priority=priority, max_attempts=max_attempts
+            )
+
+        func.job_name = name
+        func.enqueue = enqueue_func
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise LookupError(f"No job handler registered for {name!r}.")
+
+
+def enqueue(name, payload=None, *, priority=0, delay=None, max_attempts=None):
+    """
+    Adds a job to the queue.
+
+    The row is written in the caller's transaction: if the request rolls back,
+    the job is never run, and once it commits the job is guaranteed to run.
+    """
+    get_handler(name)
+    run_at = timezone.now()
+    if delay:
+        run_at += delay if isinstance(delay, timedelta) else timedelta(seconds=delay)
+
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_at=run_at,
+        max_attempts=max_attempts or jobs_setting("MAX_ATTEMPTS"),
+    )
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .registry import enqueue, job
+from .worker import (
+    Heartbeat,
+    StopFlag,
+    claim_job,
+    requeue_stale_jobs,
+    run_job,
+    work,
+)
+
+calls = []
+
+
+@job("jobs.tests.record")
+def record_call(value):
+    calls.append(value)
+
+
+@job("jobs.tests.fail")
+def always_fail():
+    raise RuntimeError("boom")
+
+
+@override_settings(
+    JOBS={
+        "BACKOFF_BASE": timedelta(seconds=10),
+        "LOCK_TIMEOUT": timedelta(minutes=15),
+    }
+)
+class WorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_are_claimed_by_priority_then_run_at(self):
+        later = enqueue("jobs.tests.record", {"value": "later"})
+        urgent = enqueue("jobs.tests.record", {"value": "urgent"}, priority=5)
+        enqueue("jobs.tests.record", {"value": "delayed"}, priority=9, delay=60)
+
+        first = claim_job("worker-1")
+        self.assertEqual(first.pk, urgent.pk)
+        self.assertEqual(first.status, Job.Status.RUNNING)
+        self.assertEqual((first.locked_by, first.attempts), ("worker-1", 1))
+        self.assertEqual(claim_job("worker-2").pk, later.pk)
+        # The delayed job isn't due yet.
+        self.assertIsNone(claim_job("worker-3"))
+
+    def test_failures_back_off_until_the_last_attempt(self):
+        failing = always_fail.enqueue()
+        Job.objects.filter(pk=failing.pk).update(max_attempts=2)
+
+        with self.assertLogs("jobs.worker", level="ERROR"):
+            self.assertFalse(run_job(claim_job("worker")))
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, Job.Status.QUEUED)
+        self.assertIn("boom", failing.last_error)
+        delay = failing.run_at - timezone.now()
+        self.assertGreater(delay, timedelta(seconds=8))
+        self.assertLessEqual(delay, timedelta(seconds=10))
+
+        Job.objects.filter(pk=failing.pk).update(run_at=timezone.now())
+        with self.assertLogs("jobs.worker", level="ERROR"):
+            run_job(claim_job("worker"))
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Job.Status.FAILED, 2))
+
+    def test_work_runs_the_queue_in_burst_mode(self):
+        record_call.enqueue(value=1)
+        record_call.enqueue(value=2)
+        self.assertEqual(work(StopFlag(), burst=True), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.Status.DONE).count(), 2)
+
+    def test_stale_jobs_are_requeued_or_failed(self):
+        record_call.enqueue(value=1)
+        record_call.enqueue(value=2)
+        alive = record_call.enqueue(value=3)
+        stale, last_try = claim_job("dead"), claim_job("dead")
+        Job.objects.filter(pk=last_try.pk).update(max_attempts=1)
+        claim_job("alive")
+        long_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.filter(locked_by="dead").update(locked_at=long_ago)
+
+        with self.assertLogs("jobs.worker", level="WARNING"):
+            self.assertEqual(requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Job.Status.QUEUED)
+        self.assertGreater(stale.run_at, timezone.now())
+        last_try.refresh_from_db()
+        self.assertEqual(last_try.status, Job.Status.FAILED)
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, Job.Status.RUNNING)
+
+    def test_heartbeat_keeps_a_long_job_locked(self):
+        record_call.enqueue(value=1)
+        running = claim_job("worker")
+        long_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.filter(pk=running.pk).update(locked_at=long_ago)
+
+        self.assertTrue(Heartbeat(running).beat())
+        self.assertEqual(requeue_stale_jobs(), 0)
+        # Once another worker owns the job, the heartbeat stops renewing it.
+        Job.objects.filter(pk=running.pk).update(locked_by="someone-else")
+        self.assertFalse(Heartbeat(running).beat())
+
+    def test_a_failed_save_does_not_kill_the_worker(self):
+        record_call.enqueue(value=1)
+        with mock.patch.object(Job, "save", side_effect=DatabaseError("locked")):
+            with self.assertLogs("jobs.worker", level="ERROR"):
+                self.assertTrue(run_job(claim_job("worker")))
+        self.assertEqual(calls, [1])
+        # Left RUNNING, to be requeued once its lock times out.
+        self.assertEqual(Job.objects.get().status, Job.Status.RUNNING)
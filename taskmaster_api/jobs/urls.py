@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import JobStatsView
+
+urlpatterns = [
+    path("jobs/stats/", JobStatsView.as_view(), name="job-stats"),
+]
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+
+from .metrics import queue_depth, throughput
+
+
+# Create your views here.
+class JobStatsView(APIView):
+    """
+    Admin-only endpoint exposing queue depth and recent throughput of the
+    background job queue.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="window",
+                description="Throughput window in seconds (default 300).",
+                required=False,
+                type=OpenApiTypes.INT,
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            window = int(request.query_params.get("window", 300))
+        except ValueError:
+            return Response(
+                {"detail": "window must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "queue_depth": queue_depth(),
+                "throughput": throughput(timedelta(seconds=max(window, 1))),
+            }
+        )
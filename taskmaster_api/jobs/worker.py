@@ -0,0 +1,265 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+
+from django.db import (
+    DatabaseError,
+    OperationalError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models import F
+from django.utils import timezone
+
+from .conf import jobs_setting
+from .models import Job
+from .registry import get_handler
+
+logger = logging.getLogger(__name__)
+
+# How many queued candidates a worker tries to grab on SQLite before giving up.
+CLAIM_CANDIDATES = 10
+
+
+class StopFlag:
+    """
+    A stop event that is safe to set from a signal handler.
+
+    `threading.Event.set()` takes a lock, which deadlocks when the signal
+    interrupts the same thread while it is waiting on that event.
+    """
+
+    def __init__(self):
+        self._stopped = False
+
+    def set(self):
+        self._stopped = True
+
+    def is_set(self):
+        return self._stopped
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self._stopped and time.monotonic() < deadline:
+            time.sleep(min(0.1, timeout))
+        return self._stopped
+
+
+def make_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claimable_jobs():
+    return Job.objects.filter(
+        status=Job.Status.QUEUED, run_at__lte=timezone.now()
+    ).order_by("-priority", "run_at", "id")
+
+
+def claim_job(worker_id):
+    """
+    Atomically marks the next runnable job as RUNNING and returns it, or
+    returns None if the queue is empty.
+    """
+    now = timezone.now()
+
+    if connection.features.has_select_for_update_skip_locked:
+        # PostgreSQL/MySQL: concurrent workers skip rows another one has locked.
+        with transaction.atomic():
+            job = claimable_jobs().select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.status = Job.Status.RUNNING
+            job.locked_by = worker_id
+            job.locked_at = now
+            job.attempts += 1
+            job.save(update_fields=["status", "locked_by", "locked_at", "attempts"])
+            return job
+
+    # SQLite has no row locks, so claim with a compare-and-swap UPDATE: only the
+    # worker whose UPDATE still sees the row as QUEUED gets it.
+    candidates = list(claimable_jobs().values_list("pk", flat=True)[:CLAIM_CANDIDATES])
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def backoff_delay(attempts):
+    delay = jobs_setting("BACKOFF_BASE") * (2 ** max(attempts - 1, 0))
+    return min(delay, jobs_setting("BACKOFF_MAX"))
+
+
+class Heartbeat:
+    """
+    Renews a running job's lock from a background thread while its handler
+    runs, so a long job is not taken for one whose worker died.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def beat(self):
+        """
+        Renews the lock; returns False once the job is no longer ours.
+        """
+        return bool(
+            Job.objects.filter(
+                pk=self.job.pk, status=Job.Status.RUNNING, locked_by=self.job.locked_by
+            ).update(locked_at=timezone.now())
+        )
+
+    def _run(self):
+        interval = jobs_setting("HEARTBEAT_INTERVAL").total_seconds()
+        try:
+            while not self._stopped.wait(interval):
+                try:
+                    if not self.beat():
+                        return
+                except DatabaseError:
+                    logger.warning("Could not renew the lock of %s.", self.job, exc_info=True)
+        finally:
+            # The thread has its own connection.
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def _record_outcome(job, update_fields):
+    try:
+        job.save(update_fields=update_fields)
+    except DatabaseError:
+        # The job stays RUNNING and is requeued once its lock times out; the
+        # worker itself carries on.
+        logger.exception("Could not record the outcome of %s.", job)
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records the outcome. Failed jobs are retried with
+    exponential backoff until they run out of attempts.
+    """
+    try:
+        handler = get_handler(job.name)
+        with Heartbeat(job):
+            handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s failed (attempt %s)", job, job.attempts)
+        job.last_error = error
+        job.locked_by = ""
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = Job.Status.QUEUED
+            job.run_at = timezone.now() + backoff_delay(job.attempts)
+        _record_outcome(
+            job,
+            [
+                "status",
+                "run_at",
+                "finished_at",
+                "last_error",
+                "locked_by",
+                "locked_at",
+            ],
+        )
+        return False
+
+    job.status = Job.Status.DONE
+    job.finished_at = timezone.now()
+    job.locked_by = ""
+    job.locked_at = None
+    _record_outcome(job, ["status", "finished_at", "locked_by", "locked_at"])
+    return True
+
+
+def requeue_stale_jobs():
+    """
+    Puts RUNNING jobs whose worker died back on the queue, after the usual
+    backoff. Those that were on their last attempt fail instead. Returns the
+    number of requeued jobs.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING, locked_at__lt=now - jobs_setting("LOCK_TIMEOUT")
+    )
+    error = "The worker running this job stopped responding."
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        finished_at=now,
+        locked_by="",
+        locked_at=None,
+        last_error=error,
+    )
+    if failed:
+        logger.warning("%s stale job(s) ran out of attempts.", failed)
+    requeued = 0
+    for job in stale.only("pk", "attempts"):
+        # Re-checked, in case the job finished or renewed its lock meanwhile.
+        requeued += stale.filter(pk=job.pk).update(
+            status=Job.Status.QUEUED,
+            run_at=now + backoff_delay(job.attempts),
+            locked_by="",
+            locked_at=None,
+            last_error=error,
+        )
+    return requeued
+
+
+def purge_finished_jobs():
+    cutoff = timezone.now() - jobs_setting("RETENTION")
+    deleted, _ = Job.objects.filter(
+        status=Job.Status.DONE, finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def work(stop_event, poll_interval=None, burst=False):
+    """
+    The worker loop: claims and runs jobs until `stop_event` is set. With
+    `burst=True` it returns as soon as the queue is empty.
+    """
+    worker_id = make_worker_id()
+    poll_interval = poll_interval or jobs_setting("POLL_INTERVAL")
+    processed = 0
+
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            job = claim_job(worker_id)
+        except OperationalError:
+            # Most likely "database is locked" on SQLite; try again shortly.
+            logger.warning("Could not claim a job, retrying.", exc_info=True)
+            job = None
+
+        if job is None:
+            if burst:
+                break
+            stop_event.wait(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
+
+    close_old_connections()
+    return processed
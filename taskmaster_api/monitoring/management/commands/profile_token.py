@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from monitoring.profiler import make_token, profiler_setting
+
+
+class Command(BaseCommand):
+    help = "Prints a signed X-Profile-Token header value for profiling a request."
+
+    def handle(self, *args, **options):
+        if not profiler_setting("ENABLED"):
+            self.stderr.write(
+                "The profiler is disabled; set PROFILER['ENABLED'] to use the token."
+            )
+        self.stdout.write(make_token())
+        self.stdout.write(
+            f"Valid for {profiler_setting('TOKEN_MAX_AGE')} seconds. Example:\n"
+            "  curl -H 'X-Profile-Token: <token>' ...",
+            style_func=self.style.NOTICE,
+        )
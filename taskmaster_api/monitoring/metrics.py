@@ -0,0 +1,354 @@
+"""
+Per-route request metrics, aggregated across worker processes.
+
+Each process accumulates its counters in memory and periodically writes a
+snapshot to METRICS["DIR"]/<pid>-<start time>.json. The export view merges
+every snapshot, so a scrape reflects all gunicorn workers without a shared
+server.
+
+The snapshots of workers that have exited are folded into retired.json and
+deleted, so the totals never go backwards when gunicorn recycles a worker,
+and a new process that gets a dead worker's pid writes a file of its own.
+The pids are checked with kill(0), so the directory must not be shared
+between hosts or containers.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows; concurrent scrapes may then double-count once.
+    fcntl = None
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DEFAULTS = {
+    "DIR": None,
+    # Seconds between two snapshot writes of a worker.
+    "FLUSH_INTERVAL": 5.0,
+    # Bearer token accepted by the export endpoint (admins can always read it).
+    "TOKEN": "",
+}
+
+SNAPSHOT_NAME = re.compile(r"^(?P<pid>\d+)-(?P<started>\d+)\.json$")
+RETIRED_NAME = "retired.json"
+COUNTER_FIELDS = (
+    "requests",
+    "duration_seconds",
+    "sql_queries",
+    "sql_seconds",
+    "serializer_seconds",
+    "response_bytes",
+)
+
+
+def metrics_setting(name):
+    return getattr(settings, "METRICS", {}).get(name, DEFAULTS[name])
+
+
+class RequestState(threading.local):
+    """
+    Timings of the request being served by the current thread.
+    """
+
+    active = False
+    serializing = False
+    sql_queries = 0
+    sql_seconds = 0.0
+    serializer_seconds = 0.0
+
+    def start(self):
+        self.active = True
+        self.serializing = False
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+    def stop(self):
+        self.active = False
+
+
+request_state = RequestState()
+
+
+def install_serializer_timer():
+    """
+    Wraps BaseSerializer.data so the time spent turning model instances into
+    primitives is attributed to the current request. Serializer.data and
+    ListSerializer.data both end up here through super(), and nested
+    serializers call to_representation() directly, so each top-level
+    serialization is timed once.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, "is_timed", False):
+        return
+
+    def data(self):
+        state = request_state
+        if not state.active or state.serializing:
+            return original.fget(self)
+        state.serializing = True
+        started = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            state.serializer_seconds += time.perf_counter() - started
+            state.serializing = False
+
+    data.is_timed = True
+    BaseSerializer.data = property(data)
+
+
+class Registry:
+    """
+    The counters of one worker process.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._last_flush = time.monotonic()
+        self._started = time.time_ns()
+
+    def observe(
+        self,
+        route,
+        method,
+        status,
+        duration,
+        sql_queries,
+        sql_seconds,
+        serializer_seconds,
+        response_bytes,
+    ):
+        key = f"{route}\t{method}"
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "route": route,
+                    "method": method,
+                    "requests": 0,
+                    "statuses": {},
+                    "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                    "duration_seconds": 0.0,
+                    "sql_queries": 0,
+                    "sql_seconds": 0.0,
+                    "serializer_seconds": 0.0,
+                    "response_bytes": 0,
+                }
+            series["requests"] += 1
+            status = str(status)
+            series["statuses"][status] = series["statuses"].get(status, 0) + 1
+            series["buckets"][bisect_left(LATENCY_BUCKETS, duration)] += 1
+            series["duration_seconds"] += duration
+            series["sql_queries"] += sql_queries
+            series["sql_seconds"] += sql_seconds
+            series["serializer_seconds"] += serializer_seconds
+            series["response_bytes"] += response_bytes
+
+        if time.monotonic() - self._last_flush >= metrics_setting("FLUSH_INTERVAL"):
+            self.flush()
+
+    def count_bytes(self, route, method, response_bytes):
+        """
+        Adds the body of a streamed response once it has been sent, as its
+        size isn't known when the request is observed.
+        """
+        with self._lock:
+            series = self._series.get(f"{route}\t{method}")
+            if series is not None:
+                series["response_bytes"] += response_bytes
+
+    def flush(self):
+        directory = metrics_directory()
+        with self._lock:
+            snapshot = json.dumps(list(self._series.values()))
+            self._last_flush = time.monotonic()
+        directory.mkdir(parents=True, exist_ok=True)
+        # Write-and-rename so the exporter never reads a half-written file.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "w") as tmp_file:
+            tmp_file.write(snapshot)
+        os.replace(tmp_path, directory / f"{os.getpid()}-{self._started}.json")
+
+
+registry = Registry()
+
+if hasattr(os, "register_at_fork"):
+    # A worker forked from a preloaded master starts from zero, in a file of
+    # its own.
+    os.register_at_fork(after_in_child=registry._reset)
+
+
+def metrics_directory():
+    directory = metrics_setting("DIR")
+    if directory is None:
+        directory = Path(tempfile.gettempdir()) / "taskmaster-metrics"
+    return Path(directory)
+
+
+def collect():
+    """
+    Merges the snapshots of all worker processes, after retiring those of
+    the workers that have exited.
+    """
+    directory = metrics_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Scrapes are serialized, so a snapshot is never retired by one while
+    # another is adding it to its totals.
+    with open(directory / ".lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        _retire_dead_snapshots(directory)
+        merged = {}
+        for path, _ in _snapshot_paths(directory):
+            _merge(merged, _read_snapshot(path))
+        _merge(merged, _read_snapshot(directory / RETIRED_NAME))
+    return sorted(merged.values(), key=lambda s: (s["route"], s["method"]))
+
+
+def _snapshot_paths(directory):
+    # Only files written by Registry.flush(); anything else in the directory
+    # (e.g. a stray <pid>.json) would never be retired but counted forever.
+    for path in directory.glob("*.json"):
+        match = SNAPSHOT_NAME.match(path.name)
+        if match:
+            yield path, match
+
+
+def _read_snapshot(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def _merge(merged, series_list):
+    for series in series_list:
+        key = (series["route"], series["method"])
+        total = merged.get(key)
+        if total is None:
+            merged[key] = series
+            continue
+        for field in COUNTER_FIELDS:
+            total[field] += series[field]
+        for status, count in series["statuses"].items():
+            total["statuses"][status] = total["statuses"].get(status, 0) + count
+        total["buckets"] = [a + b for a, b in zip(total["buckets"], series["buckets"])]
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Alive, but owned by another user.
+        return True
+    return True
+
+
+def _retire_dead_snapshots(directory):
+    snapshots = {}
+    for path, match in _snapshot_paths(directory):
+        snapshots.setdefault(int(match["pid"]), []).append(
+            (int(match["started"]), path)
+        )
+
+    dead = []
+    for pid, paths in snapshots.items():
+        paths.sort()
+        # Only the newest process with a given pid can still be running.
+        dead += [path for _, path in paths[:-1]]
+        if not _is_running(pid):
+            dead.append(paths[-1][1])
+    if not dead:
+        return
+
+    retired = {}
+    _merge(retired, _read_snapshot(directory / RETIRED_NAME))
+    for path in dead:
+        _merge(retired, _read_snapshot(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w") as tmp_file:
+        json.dump(list(retired.values()), tmp_file)
+    os.replace(tmp_path, directory / RETIRED_NAME)
+    for path in dead:
+        path.unlink(missing_ok=True)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus(series_list):
+    """
+    Renders merged series in the Prometheus text exposition format.
+    """
+    lines = [
+        "# HELP taskmaster_http_requests_total Requests served, by status code.",
+        "# TYPE taskmaster_http_requests_total counter",
+    ]
+    for s in series_list:
+        for status, count in sorted(s["statuses"].items()):
+            labels = _labels(route=s["route"], method=s["method"], status=status)
+            lines.append(f"taskmaster_http_requests_total{labels} {count}")
+
+    lines += [
+        "# HELP taskmaster_http_request_duration_seconds Request latency.",
+        "# TYPE taskmaster_http_request_duration_seconds histogram",
+    ]
+    for s in series_list:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), s["buckets"]):
+            cumulative += count
+            labels = _labels(route=s["route"], method=s["method"], le=bound)
+            lines.append(
+                f"taskmaster_http_request_duration_seconds_bucket{labels} {cumulative}"
+            )
+        labels = _labels(route=s["route"], method=s["method"])
+        lines.append(
+            f"taskmaster_http_request_duration_seconds_sum{labels} {s['duration_seconds']}"
+        )
+        lines.append(
+            f"taskmaster_http_request_duration_seconds_count{labels} {s['requests']}"
+        )
+
+    counters = (
+        ("db_queries_total", "sql_queries", "SQL queries executed."),
+        ("db_query_seconds_total", "sql_seconds", "Time spent executing SQL."),
+        (
+            "serializer_seconds_total",
+            "serializer_seconds",
+            "Time spent in DRF serializers.",
+        ),
+        ("http_response_bytes_total", "response_bytes", "Response body bytes."),
+    )
+    for name, field, help_text in counters:
+        lines.append(f"# HELP taskmaster_{name} {help_text}")
+        lines.append(f"# TYPE taskmaster_{name} counter")
+        for s in series_list:
+            labels = _labels(route=s["route"], method=s["method"])
+            lines.append(f"taskmaster_{name}{labels} {s[field]}")
+
+    return "\n".join(lines) + "\n"
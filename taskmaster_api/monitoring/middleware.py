@@ -0,0 +1,122 @@
+import cProfile
+import random
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import registry, request_state
+from .profiler import SQLTrace, has_valid_token, profiler_setting, save_profile
+
+
+class MetricsMiddleware:
+    """
+    Records per-route request count, latency, SQL count/time, serializer time
+    and response size. Keep it at the top of MIDDLEWARE so the latency covers
+    the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = request_state
+        state.start()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._time_query):
+                response = self.get_response(request)
+        finally:
+            state.stop()
+        duration = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name or match.route) if match else "unmatched"
+        if not response.streaming:
+            response_bytes = len(response.content)
+        elif response.has_header("Content-Length"):
+            response_bytes = int(response["Content-Length"])
+        else:
+            # Exports are streamed without a length; their bytes are added
+            # once the body has been sent.
+            response_bytes = 0
+            if not getattr(response, "is_async", False):
+                response.streaming_content = self._count_streamed(
+                    response.streaming_content, route, request.method
+                )
+
+        registry.observe(
+            route=route,
+            method=request.method,
+            status=response.status_code,
+            duration=duration,
+            sql_queries=state.sql_queries,
+            sql_seconds=state.sql_seconds,
+            serializer_seconds=state.serializer_seconds,
+            response_bytes=response_bytes,
+        )
+        return response
+
+    @staticmethod
+    def _count_streamed(chunks, route, method):
+        sent = 0
+        try:
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            registry.count_bytes(route, method, sent)
+
+    @staticmethod
+    def _time_query(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            request_state.sql_queries += 1
+            request_state.sql_seconds += time.perf_counter() - started
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests on demand, see monitoring/profiler.py. When the
+    profiler is disabled Django drops this middleware entirely.
+    """
+
+    def __init__(self, get_response):
+        if not profiler_setting("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = profiler_setting("SAMPLE_RATE")
+        self.threshold = profiler_setting("LATENCY_THRESHOLD")
+
+    def __call__(self, request):
+        if has_valid_token(request):
+            trigger = "header"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = "sample"
+        elif self.threshold is not None:
+            trigger = "latency"
+        else:
+            return self.get_response(request)
+
+        trace = SQLTrace()
+        # Only the header and sampling triggers pay for cProfile; the latency
+        # trigger just traces SQL and keeps it if the request turns out slow.
+        profile = cProfile.Profile() if trigger != "latency" else None
+        started = time.perf_counter()
+        with connection.execute_wrapper(trace):
+            if profile is not None:
+                profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profile is not None:
+                    profile.disable()
+        duration = time.perf_counter() - started
+
+        slow = self.threshold is not None and duration >= self.threshold
+        if trigger == "header" or slow or (trigger == "sample" and self.threshold is None):
+            profile_id = save_profile(request, response, duration, trigger, trace, profile)
+            response["X-Profile-Id"] = profile_id
+        return response
@@ -0,0 +1,33 @@
+import hmac
+
+from django.contrib.auth.models import AnonymousUser
+from rest_framework import authentication, permissions
+
+from .metrics import metrics_setting
+
+
+class MetricsTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Accepts `Authorization: Bearer <METRICS["TOKEN"]>` from a scraper. Any other
+    header is left to the next authenticator (JWT).
+    """
+
+    keyword = "Bearer "
+
+    def authenticate(self, request):
+        token = metrics_setting("TOKEN")
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        if not token or not header.startswith(self.keyword):
+            return None
+        if not hmac.compare_digest(header[len(self.keyword) :], token):
+            return None
+        return (AnonymousUser(), MetricsTokenAuthentication)
+
+
+class IsMetricsScraperOrAdmin(permissions.BasePermission):
+    message = "A valid metrics token or an admin account is required."
+
+    def has_permission(self, request, view):
+        if request.auth is MetricsTokenAuthentication:
+            return True
+        return bool(request.user and request.user.is_staff)
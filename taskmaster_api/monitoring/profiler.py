@@ -0,0 +1,178 @@
+"""
+On-demand profiling of live requests.
+
+A request is profiled with cProfile when it carries a valid signed
+X-Profile-Token header or is picked by PROFILER["SAMPLE_RATE"]. With a
+PROFILER["LATENCY_THRESHOLD"], every request also gets a cheap SQL trace and
+the slow ones are kept even when they were not sampled. Profiles are written
+to a bounded ring buffer of JSON files in PROFILER["DIR"].
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+DEFAULTS = {
+    "ENABLED": False,
+    # Fraction of requests profiled with cProfile, 0.0 - 1.0.
+    "SAMPLE_RATE": 0.0,
+    # Seconds; requests slower than this keep their SQL trace (and profile).
+    "LATENCY_THRESHOLD": None,
+    # How long a token from `manage.py profile_token` stays valid.
+    "TOKEN_MAX_AGE": 3600,
+    "DIR": None,
+    # Size of the ring buffer.
+    "MAX_PROFILES": 50,
+    # Number of functions kept from each profile, by cumulative time.
+    "TOP_FUNCTIONS": 40,
+    "MAX_SQL_STATEMENTS": 500,
+}
+
+HEADER = "HTTP_X_PROFILE_TOKEN"
+SIGNING_SALT = "monitoring.profiler"
+PROFILE_ID = re.compile(r"^\d+-[0-9a-f]{32}$")
+
+
+def profiler_setting(name):
+    return getattr(settings, "PROFILER", {}).get(name, DEFAULTS[name])
+
+
+def profiles_directory():
+    directory = profiler_setting("DIR")
+    if directory is None:
+        directory = Path(tempfile.gettempdir()) / "taskmaster-profiles"
+    return Path(directory)
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign("profile")
+
+
+def has_valid_token(request):
+    token = request.META.get(HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            token, max_age=profiler_setting("TOKEN_MAX_AGE")
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class SQLTrace:
+    """
+    execute_wrapper that records every statement with its duration.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.total_seconds = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.total_seconds += duration
+            if len(self.statements) < profiler_setting("MAX_SQL_STATEMENTS"):
+                # The SQL is kept with its placeholders only. The parameters
+                # include password hashes, token JTIs and user data, and the
+                # traces are plain files readable by every admin.
+                self.statements.append(
+                    {
+                        "sql": sql,
+                        "many": many,
+                        "seconds": round(duration, 6),
+                    }
+                )
+
+
+def top_functions(profile, limit):
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, function), (cc, nc, tt, ct, _) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append(
+            {
+                "function": f"{filename}:{line}({function})",
+                "calls": nc,
+                "primitive_calls": cc,
+                "tottime": round(tt, 6),
+                "cumtime": round(ct, 6),
+            }
+        )
+    rows.sort(key=lambda row: row["cumtime"], reverse=True)
+    return rows[:limit]
+
+
+def save_profile(request, response, duration, trigger, trace, profile=None):
+    """
+    Writes one profile into the ring buffer and drops the oldest ones.
+    """
+    directory = profiles_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    profile_id = f"{time.time_ns()}-{uuid.uuid4().hex}"
+    document = {
+        "id": profile_id,
+        "created_at": time.time(),
+        "method": request.method,
+        "path": request.path,
+        "query_string": request.META.get("QUERY_STRING", ""),
+        "status": response.status_code,
+        "seconds": round(duration, 6),
+        "trigger": trigger,
+        "sql_count": trace.count,
+        "sql_seconds": round(trace.total_seconds, 6),
+        "sql": trace.statements,
+        "functions": (
+            top_functions(profile, profiler_setting("TOP_FUNCTIONS")) if profile else []
+        ),
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w") as tmp_file:
+        json.dump(document, tmp_file)
+    os.replace(tmp_path, directory / f"{profile_id}.json")
+
+    # Names start with a nanosecond timestamp, so they sort by age.
+    stored = sorted(directory.glob("*.json"))
+    for old in stored[: max(len(stored) - profiler_setting("MAX_PROFILES"), 0)]:
+        old.unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles():
+    summaries = []
+    for path in sorted(profiles_directory().glob("*.json"), reverse=True):
+        try:
+            document = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        document.pop("sql")
+        document.pop("functions")
+        summaries.append(document)
+    return summaries
+
+
+def load_profile(profile_id):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = profiles_directory() / f"{profile_id}.json"
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
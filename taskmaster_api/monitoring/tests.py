@@ -0,0 +1,221 @@
+import json
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from .metrics import Registry, collect, metrics_directory, render_prometheus
+from .middleware import MetricsMiddleware
+from .profiler import make_token, profiles_directory
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="s3cret-pass"
+        )
+
+    def profiler(self, **options):
+        return self.settings(
+            PROFILER={"ENABLED": True, "DIR": self.directory, **options}
+        )
+
+    def login(self, **extra):
+        # A new client, so the middleware is built with the current settings.
+        return APIClient().post(
+            "/api/auth/login/",
+            {"email": "alice@example.com", "password": "s3cret-pass"},
+            format="json",
+            **extra,
+        )
+
+    def stored(self):
+        return sorted(profiles_directory().glob("*.json"))
+
+    def test_a_signed_header_profiles_the_request(self):
+        with self.profiler():
+            response = self.login(HTTP_X_PROFILE_TOKEN=make_token())
+            self.assertEqual(response.status_code, 200)
+            (path,) = self.stored()
+            profile = json.loads(path.read_text())
+
+        self.assertEqual(response["X-Profile-Id"], profile["id"])
+        self.assertEqual(profile["trigger"], "header")
+        self.assertEqual(profile["sql_count"], len(profile["sql"]))
+        self.assertTrue(profile["functions"])
+
+    def test_sql_parameters_are_not_stored(self):
+        with self.profiler():
+            self.login(HTTP_X_PROFILE_TOKEN=make_token())
+            (path,) = self.stored()
+            trace = path.read_text()
+
+        self.user.refresh_from_db()
+        self.assertIn("users_customuser", trace)
+        self.assertNotIn(self.user.password, trace)
+        self.assertNotIn("alice@example.com", trace)
+        for statement in json.loads(trace)["sql"]:
+            self.assertEqual(set(statement), {"sql", "many", "seconds"})
+
+    def test_unsigned_and_fast_requests_are_not_kept(self):
+        with self.profiler(LATENCY_THRESHOLD=60):
+            response = self.login(HTTP_X_PROFILE_TOKEN="forged:token")
+            self.assertNotIn("X-Profile-Id", response)
+            self.assertEqual(self.stored(), [])
+
+    def test_slow_requests_are_kept_in_a_bounded_buffer(self):
+        with self.profiler(LATENCY_THRESHOLD=0, MAX_PROFILES=2):
+            ids = [self.login()["X-Profile-Id"] for _ in range(3)]
+            self.assertEqual([path.stem for path in self.stored()], ids[1:])
+            profile = json.loads(self.stored()[0].read_text())
+
+        self.assertEqual(profile["trigger"], "latency")
+        # Only sampled and signed requests pay for cProfile.
+        self.assertEqual(profile["functions"], [])
+
+    def test_profiles_are_listed_for_admins_only(self):
+        admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="s3cret-pass",
+            is_staff=True,
+        )
+        with self.profiler():
+            profile_id = self.login(HTTP_X_PROFILE_TOKEN=make_token())["X-Profile-Id"]
+            client = APIClient()
+            client.force_authenticate(self.user)
+            self.assertEqual(client.get("/api/_profiles/").status_code, 403)
+
+            client.force_authenticate(admin)
+            (summary,) = client.get("/api/_profiles/").data
+            self.assertEqual(summary["id"], profile_id)
+            self.assertNotIn("sql", summary)
+            detail = client.get(f"/api/_profiles/{profile_id}/")
+            self.assertEqual(detail.data["path"], "/api/auth/login/")
+            self.assertEqual(client.get("/api/_profiles/0-nope/").status_code, 404)
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        metrics_dir = self.settings(METRICS={"DIR": directory.name})
+        metrics_dir.enable()
+        self.addCleanup(metrics_dir.disable)
+
+    def worker(self, requests, route="task-list", status=200, duration=0.02):
+        registry = Registry()
+        for _ in range(requests):
+            registry.observe(
+                route=route,
+                method="GET",
+                status=status,
+                duration=duration,
+                sql_queries=3,
+                sql_seconds=0.001,
+                serializer_seconds=0.002,
+                response_bytes=100,
+            )
+        registry.flush()
+        return registry
+
+    def move_snapshot(self, registry, pid):
+        # As if the snapshot had been written by another process.
+        directory = metrics_directory()
+        path = directory / f"{os.getpid()}-{registry._started}.json"
+        path.rename(directory / f"{pid}-{registry._started}.json")
+
+    def totals(self):
+        return {
+            (s["route"], s["method"]): (s["requests"], s["response_bytes"], s["statuses"])
+            for s in collect()
+        }
+
+    def test_workers_are_summed(self):
+        self.worker(2)
+        self.worker(1, status=404)
+        self.worker(1, route="task-detail")
+        self.assertEqual(
+            self.totals(),
+            {
+                ("task-detail", "GET"): (1, 100, {"200": 1}),
+                ("task-list", "GET"): (3, 300, {"200": 2, "404": 1}),
+            },
+        )
+
+    def test_dead_workers_are_retired_without_losing_counts(self):
+        self.move_snapshot(self.worker(2), dead_pid())
+        self.worker(1)
+        self.assertEqual(self.totals()[("task-list", "GET")][0], 3)
+        # Folded into retired.json, and not counted twice on the next scrape.
+        names = {path.name for path in metrics_directory().glob("*.json")}
+        self.assertEqual(len(names), 2)
+        self.assertIn("retired.json", names)
+        self.assertEqual(self.totals()[("task-list", "GET")][0], 3)
+
+    def test_a_reused_pid_does_not_overwrite_the_dead_worker(self):
+        old, new = self.worker(2), self.worker(1)
+        self.assertNotEqual(old._started, new._started)
+        self.assertEqual(self.totals()[("task-list", "GET")][0], 3)
+        # Both files carry this pid; only the newest process can be alive.
+        self.assertEqual(
+            sorted(path.name for path in metrics_directory().glob("*.json")),
+            [f"{os.getpid()}-{new._started}.json", "retired.json"],
+        )
+
+    def test_files_that_are_not_snapshots_are_ignored(self):
+        registry = self.worker(1)
+        snapshot = metrics_directory() / f"{os.getpid()}-{registry._started}.json"
+        # Left behind by an older version that named snapshots <pid>.json.
+        (metrics_directory() / "10534.json").write_text(snapshot.read_text())
+        self.assertEqual(self.totals()[("task-list", "GET")][0], 1)
+
+    def test_streamed_bytes_are_counted_once_sent(self):
+        registry = Registry()
+        views = {
+            "/export": lambda request: StreamingHttpResponse(iter([b"abc", b"de"])),
+            "/page": lambda request: HttpResponse(b"hello"),
+        }
+        middleware = MetricsMiddleware(lambda request: views[request.path](request))
+        with mock.patch("monitoring.middleware.registry", registry):
+            response = middleware(RequestFactory().get("/export"))
+            self.assertEqual(b"".join(response.streaming_content), b"abcde")
+            middleware(RequestFactory().get("/page"))
+        registry.flush()
+        self.assertEqual(self.totals()[("unmatched", "GET")][:2], (2, 10))
+
+    def test_prometheus_exposition(self):
+        self.worker(2, route='say "hi"', duration=0.02)
+        self.worker(1, route='say "hi"', status=500, duration=3.0)
+        text = render_prometheus(collect())
+        labels = 'route="say \\"hi\\"",method="GET"'
+        for line in (
+            "# TYPE taskmaster_http_requests_total counter",
+            f'taskmaster_http_requests_total{{{labels},status="200"}} 2',
+            f'taskmaster_http_requests_total{{{labels},status="500"}} 1',
+            "# TYPE taskmaster_http_request_duration_seconds histogram",
+            f'taskmaster_http_request_duration_seconds_bucket{{{labels},le="0.025"}} 2',
+            f'taskmaster_http_request_duration_seconds_bucket{{{labels},le="2.5"}} 2',
+            f'taskmaster_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3',
+            f"taskmaster_http_request_duration_seconds_count{{{labels}}} 3",
+            f"taskmaster_db_queries_total{{{labels}}} 9",
+            f"taskmaster_http_response_bytes_total{{{labels}}} 300",
+        ):
+            self.assertIn(line + "\n", text)
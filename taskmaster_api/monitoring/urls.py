@@ -0,0 +1,12 @@
+from django.urls import path
+from .views import MetricsView, ProfileDetailView, ProfileListView
+
+urlpatterns = [
+    path("_metrics", MetricsView.as_view(), name="metrics"),
+    path("_profiles/", ProfileListView.as_view(), name="profile-list"),
+    path(
+        "_profiles/<str:profile_id>/",
+        ProfileDetailView.as_view(),
+        name="profile-detail",
+    ),
+]
@@ -0,0 +1,61 @@
+from django.http import HttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from rest_framework.views import APIView
+
+from users.authentication import RevocableJWTAuthentication
+
+from .metrics import collect, registry, render_prometheus
+from .profiler import list_profiles, load_profile
+from .permissions import IsMetricsScraperOrAdmin, MetricsTokenAuthentication
+
+
+# Create your views here.
+class MetricsView(APIView):
+    """
+    Prometheus text export of the per-route metrics of all workers.
+    """
+
+    # The scraper's token is checked first so it is not rejected as a bad JWT.
+    authentication_classes = [MetricsTokenAuthentication, RevocableJWTAuthentication]
+    permission_classes = [IsMetricsScraperOrAdmin]
+
+    @extend_schema(responses={200: OpenApiTypes.STR})
+    def get(self, request, *args, **kwargs):
+        # Make sure this worker's latest numbers are part of the scrape.
+        registry.flush()
+        return HttpResponse(
+            render_prometheus(collect()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class ProfileListView(APIView):
+    """
+    Lists the request profiles in the ring buffer, newest first.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request, *args, **kwargs):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(APIView):
+    """
+    Returns one profile with its SQL trace and hottest functions.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request, profile_id, *args, **kwargs):
+        profile = load_profile(profile_id)
+        if profile is None:
+            return Response(
+                {"detail": "Profile not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(profile)
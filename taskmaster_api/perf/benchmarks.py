@@ -0,0 +1,322 @@
+"""
+Endpoint benchmarks against a dataset generated by `manage.py seed_scale`.
+
+Every endpoint is requested through the Django test client, so URL routing,
+middleware, JWT authentication, permissions, filtering, pagination and
+serialization are all part of the measurement. For each endpoint we record
+the p50/p95 latency, the number of SQL queries of one request and the peak
+memory allocated while serving it, and compare them with a committed
+baseline in perf/baselines/<scale>.json.
+"""
+
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.db import connection, connections
+from django.db.models import Count
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from perf.management.commands.seed_scale import PASSWORD
+from projects.models import Project
+from tasks.models import Task
+from users.revocation import revoked_tokens
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+# (name, path template) - the templates are filled from benchmark_context().
+ENDPOINTS = [
+    ("task-list", "/api/tasks/"),
+    ("task-list-project", "/api/tasks/?project={project}"),
+    ("task-list-unpaginated", "/api/tasks/?project={project}&paginate=false"),
+    ("task-list-overdue", "/api/tasks/?project={project}&overdue=true"),
+    ("task-detail", "/api/tasks/{task}/"),
+    ("my-task-list", "/api/my-tasks/"),
+    ("my-task-list-unpaginated", "/api/my-tasks/?paginate=false"),
+    ("my-task-list-due-soon", "/api/my-tasks/?due_within=7"),
+    ("my-task-list-assigned", "/api/my-tasks/?role=assignee"),
+    ("my-task-counts", "/api/my-tasks/counts/"),
+    ("archived-task-list", "/api/archived-tasks/"),
+    ("project-list", "/api/projects/"),
+    ("project-detail", "/api/projects/{project}/"),
+    ("project-stats", "/api/projects/{project}/stats/"),
+    ("project-activity", "/api/projects/{project}/activity/"),
+    ("project-export", "/api/projects/{project}/export/"),
+    ("project-member-list", "/api/projects/{project}/members/"),
+    ("project-member-search", "/api/projects/{project}/members/?search=seed_1"),
+    ("pending-invitations", "/api/invitations/pending/"),
+    ("user-list", "/api/users/"),
+    ("user-search", "/api/users/?search=seed_1"),
+    ("user-list-project", "/api/users/?project={project}"),
+    ("current-user", "/api/auth/me"),
+]
+
+# Latency differences below this many milliseconds are treated as noise.
+LATENCY_SLACK_MS = 2.0
+# Same for peak memory, in KiB.
+MEMORY_SLACK_KIB = 64.0
+MEMORY_RUNS = 3
+
+
+def benchmark_context(prefix="seed"):
+    """
+    Picks the worst-case user: the owner of the seeded project with the most
+    members, benchmarked against that project and one of its tasks.
+    """
+    project = (
+        Project.objects.filter(owner__username__startswith=f"{prefix}_")
+        .annotate(member_count=Count("members"))
+        .order_by("-member_count", "id")
+        .select_related("owner")
+        .first()
+    )
+    if project is None:
+        raise LookupError(f"No seeded data with prefix {prefix!r}, run seed_scale.")
+    user = project.owner
+    task = Task.objects.filter(project=project).order_by("id").first()
+    return user, {"project": project.pk, "task": task.pk if task else 0}
+
+
+def api_client(user):
+    """
+    A test client that authenticates like the frontend does, with a JWT.
+    """
+    # The test client's default host is not in ALLOWED_HOSTS outside of tests.
+    client = APIClient(SERVER_NAME="localhost")
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+    )
+    return client
+
+
+def fetch(client, path):
+    """
+    GETs `path` and reads the whole body, so streamed responses are measured
+    too. Streamed chunks are dropped as they arrive, like a client would.
+    """
+    response = client.get(path)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def measure_endpoint(client, path, iterations, warmup=2):
+    for _ in range(warmup):
+        fetch(client, path)
+
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = fetch(client, path)
+        durations.append((time.perf_counter() - started) * 1000)
+    if response.status_code != 200:
+        raise AssertionError(f"GET {path} returned {response.status_code}")
+
+    # CaptureQueriesContext can't be used here: request_started clears
+    # connection.queries when DEBUG is on.
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    # The periodic read of new token revocations lands in whichever request
+    # comes after REFRESH_INTERVAL; it belongs to no endpoint.
+    revoked_tokens.refresh(force=True)
+    with connection.execute_wrapper(record):
+        fetch(client, path)
+
+    # Measured separately: tracing allocations slows the request down a lot.
+    # The lowest of a few runs filters out one-off allocations such as a
+    # metrics snapshot being flushed during the request.
+    peaks = []
+    for _ in range(MEMORY_RUNS):
+        revoked_tokens.refresh(force=True)
+        tracemalloc.start()
+        try:
+            fetch(client, path)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    peak = min(peaks)
+
+    durations.sort()
+    return {
+        "p50_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+        "queries": len(queries),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(iterations=20, prefix="seed", only=None):
+    user, context = benchmark_context(prefix)
+    client = api_client(user)
+
+    results = {}
+    for name, template in ENDPOINTS:
+        if only and name not in only:
+            continue
+        results[name] = measure_endpoint(client, template.format(**context), iterations)
+    return results
+
+
+def _latencies(samples):
+    durations = sorted(duration for duration, _ in samples)
+    if not durations:
+        return {"requests": 0, "p50_ms": 0.0, "p95_ms": 0.0}
+    return {
+        "requests": len(durations),
+        "p50_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+    }
+
+
+def _run_threads(workloads, duration):
+    """
+    Runs each (client, request) workload in its own thread for `duration`
+    seconds and returns the (milliseconds, status) samples of each.
+    """
+    stop_at = time.monotonic() + duration
+    samples = [[] for _ in workloads]
+
+    def loop(client, request, out):
+        try:
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                response = request(client)
+                out.append(((time.perf_counter() - started) * 1000, response.status_code))
+        finally:
+            # Each thread has its own database connection.
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=loop, args=(client, request, out))
+        for (client, request), out in zip(workloads, samples)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def run_mixed_traffic(prefix="seed", duration=5.0, readers=4, logins=4):
+    """
+    Measures a task list read by `readers` threads, first alone and then
+    while `logins` more threads log in in a loop, like the threads of the
+    gunicorn workers under a burst of logins. Logins turned away by the
+    hashing limit (users/hashing.py) are counted as busy.
+    """
+    user, _ = benchmark_context(prefix)
+    path = "/api/my-tasks/"
+    credentials = {"email": user.email, "password": PASSWORD}
+
+    def read(client):
+        return fetch(client, path)
+
+    def login(client):
+        return client.post("/api/auth/login/", credentials, format="json")
+
+    reading = [(api_client(user), read) for _ in range(readers)]
+    alone = _run_threads(reading, duration)
+    logging_in = [(APIClient(SERVER_NAME="localhost"), login) for _ in range(logins)]
+    mixed = _run_threads(reading + logging_in, duration)
+
+    login_samples = [sample for out in mixed[readers:] for sample in out]
+    return {
+        "reads": _latencies([sample for out in alone for sample in out]),
+        "reads_during_logins": _latencies(
+            [sample for out in mixed[:readers] for sample in out]
+        ),
+        "logins": {
+            **_latencies([sample for sample in login_samples if sample[1] == 200]),
+            "busy": sum(1 for _, code in login_samples if code == 503),
+        },
+    }
+
+
+def format_mixed_results(results, duration):
+    lines = [f"{'traffic':<24}{'requests':>10}{'per s':>9}{'p50 ms':>10}{'p95 ms':>10}"]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<24}{r['requests']:>10}{r['requests'] / duration:>9.1f}"
+            f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+        )
+    lines.append(f"logins turned away (503): {results['logins']['busy']}")
+    return "\n".join(lines)
+
+
+def baseline_path(scale):
+    return BASELINE_DIR / f"{scale}.json"
+
+
+def load_baseline(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, scale, iterations, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {"scale": scale, "iterations": iterations, "endpoints": results}
+    path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+
+
+def compare(results, baseline, threshold=0.25, check_latency=True):
+    """
+    Returns one message per metric that regressed by more than `threshold`
+    (a fraction) against the baseline. Query counts must not grow at all.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: {current['queries']} queries, baseline {previous['queries']}"
+            )
+        memory_limit = max(
+            previous["peak_memory_kib"] * (1 + threshold),
+            previous["peak_memory_kib"] + MEMORY_SLACK_KIB,
+        )
+        if current["peak_memory_kib"] > memory_limit:
+            regressions.append(
+                f"{name}: peak memory {current['peak_memory_kib']} KiB, "
+                f"baseline {previous['peak_memory_kib']} KiB"
+            )
+        if not check_latency:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            limit = max(
+                previous[metric] * (1 + threshold), previous[metric] + LATENCY_SLACK_MS
+            )
+            if current[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {current[metric]}, baseline {previous[metric]}"
+                )
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = [
+        f"{'endpoint':<28}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak KiB':>11}"
+    ]
+    for name, r in results.items():
+        line = (
+            f"{name:<28}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+            f"{r['queries']:>9}{r['peak_memory_kib']:>11.1f}"
+        )
+        previous = baseline and baseline["endpoints"].get(name)
+        if previous:
+            line += f"   (baseline {previous['p50_ms']:.2f} / {previous['queries']} q)"
+        lines.append(line)
+    return "\n".join(lines)
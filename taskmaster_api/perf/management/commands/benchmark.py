@@ -0,0 +1,106 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from perf.benchmarks import (
+    ENDPOINTS,
+    baseline_path,
+    compare,
+    format_mixed_results,
+    format_results,
+    load_baseline,
+    run_benchmarks,
+    run_mixed_traffic,
+    save_baseline,
+)
+from perf.management.commands.seed_scale import SCALES
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the API endpoints against data from `seed_scale` and fails "
+        "when they regress beyond the committed baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            choices=SCALES,
+            default="small",
+            help="Scale the database was seeded with; selects the baseline file.",
+        )
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed regression as a fraction of the baseline value.",
+        )
+        parser.add_argument("--baseline", help="Baseline file to compare with.")
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=[name for name, _ in ENDPOINTS],
+            help="Only benchmark this endpoint (repeatable).",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Write the results as the new baseline instead of comparing.",
+        )
+        parser.add_argument(
+            "--mixed",
+            action="store_true",
+            help="Instead, measure task list reads alone and during a burst "
+            "of logins. Not compared with a baseline.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=5.0,
+            help="Seconds of each --mixed phase.",
+        )
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--logins", type=int, default=4)
+
+    def handle(self, *args, **options):
+        if options["mixed"]:
+            try:
+                results = run_mixed_traffic(
+                    options["prefix"],
+                    options["duration"],
+                    options["readers"],
+                    options["logins"],
+                )
+            except LookupError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(format_mixed_results(results, options["duration"]))
+            return
+
+        path = options["baseline"] or baseline_path(options["scale"])
+        try:
+            results = run_benchmarks(
+                options["iterations"], options["prefix"], options["endpoint"]
+            )
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        if options["update_baseline"]:
+            save_baseline(path, options["scale"], options["iterations"], results)
+            self.stdout.write(format_results(results))
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {path}."))
+            return
+
+        baseline = load_baseline(path)
+        self.stdout.write(format_results(results, baseline))
+        if baseline is None:
+            self.stdout.write(
+                self.style.WARNING(f"No baseline at {path}, run with --update-baseline.")
+            )
+            return
+
+        regressions = compare(results, baseline, options["threshold"])
+        if regressions:
+            raise CommandError(
+                "Performance regressed:\n" + "\n".join(f"  {r}" for r in regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions."))
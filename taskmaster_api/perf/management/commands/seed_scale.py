@@ -0,0 +1,270 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from invitations.models import Invitation
+from projects.models import Project, ProjectMembership
+from tasks.models import Task
+from tasks.reminders import reminder_time
+
+User = get_user_model()
+
+SCALES = {
+    "tiny": {"users": 40, "projects": 10, "tasks": 600, "invitations": 60},
+    "small": {"users": 300, "projects": 60, "tasks": 20_000, "invitations": 600},
+    "medium": {"users": 3_000, "projects": 600, "tasks": 300_000, "invitations": 6_000},
+    "large": {
+        "users": 10_000,
+        "projects": 2_000,
+        "tasks": 2_000_000,
+        "invitations": 40_000,
+    },
+}
+
+# Every seeded account uses this password.
+PASSWORD = "seed-password"
+
+STATUS_WEIGHTS = {
+    Task.Status.TODO: 25,
+    Task.Status.BACKLOG: 20,
+    Task.Status.IN_PROGRESS: 15,
+    Task.Status.DONE: 40,
+}
+PRIORITY_WEIGHTS = {
+    Task.Priority.LOW: 30,
+    Task.Priority.MEDIUM: 40,
+    Task.Priority.HIGH: 20,
+    None: 10,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a large, realistic dataset with bulk_create: users, projects "
+        "with skewed membership, tasks and invitations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="small")
+        parser.add_argument("--users", type=int)
+        parser.add_argument("--projects", type=int)
+        parser.add_argument("--tasks", type=int)
+        parser.add_argument("--invitations", type=int)
+        parser.add_argument(
+            "--seed", type=int, default=1, help="Random seed, for reproducible data."
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix of the generated usernames, used to find the data again.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete previously seeded data with the same prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        counts = dict(SCALES[options["scale"]])
+        for name in counts:
+            if options[name] is not None:
+                counts[name] = options[name]
+        if counts["users"] < 2 or counts["projects"] < 1:
+            raise CommandError("Need at least 2 users and 1 project.")
+
+        self.rng = random.Random(options["seed"])
+        self.prefix = options["prefix"]
+        self.batch_size = options["batch_size"]
+
+        seeded_users = User.objects.filter(username__startswith=f"{self.prefix}_")
+        if options["flush"]:
+            self._timed("flush", lambda: seeded_users.delete()[0])
+        elif seeded_users.exists():
+            raise CommandError(
+                f"Data with prefix {self.prefix!r} already exists, use --flush."
+            )
+
+        users = self._timed("users", lambda: self._create_users(counts["users"]))
+        projects = self._timed(
+            "projects", lambda: self._create_projects(counts["projects"], users)
+        )
+        members = {}
+        self._timed("memberships", lambda: self._create_memberships(projects, users, members))
+        self._timed("tasks", lambda: self._create_tasks(counts["tasks"], users, members))
+        self._timed(
+            "invitations",
+            lambda: self._create_invitations(counts["invitations"], users, members),
+        )
+
+    def _timed(self, label, func):
+        started = time.monotonic()
+        result = func()
+        elapsed = time.monotonic() - started
+        rows = result if isinstance(result, int) else len(result)
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f"{label}: {rows} row(s) in {elapsed:.1f}s ({rate:.0f} rows/s)")
+        return result
+
+    def _bulk_create(self, model, objects):
+        created = 0
+        for start in range(0, len(objects), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(objects[start : start + self.batch_size])
+            created += len(objects[start : start + self.batch_size])
+        return created
+
+    def _create_users(self, count):
+        password = make_password(PASSWORD)
+        users = [
+            User(
+                username=f"{self.prefix}_{i}",
+                email=f"{self.prefix}_{i}@example.com",
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                password=password,
+            )
+            for i in range(count)
+        ]
+        self._bulk_create(User, users)
+        return list(
+            User.objects.filter(username__startswith=f"{self.prefix}_")
+            .order_by("id")
+            .values_list("id", "email")
+        )
+
+    def _create_projects(self, count, users):
+        projects = [
+            Project(
+                title=f"Project {i}",
+                description=f"Seeded project number {i}.",
+                owner_id=self.rng.choice(users)[0],
+            )
+            for i in range(count)
+        ]
+        # bulk_create() skips Project.save(), so owner memberships are added
+        # together with the other memberships below.
+        self._bulk_create(Project, projects)
+        owner_ids = {user_id for user_id, _ in users}
+        return list(
+            Project.objects.filter(owner_id__in=owner_ids)
+            .order_by("id")
+            .values_list("id", "owner_id")
+        )
+
+    def _create_memberships(self, projects, users, members):
+        user_ids = [user_id for user_id, _ in users]
+        memberships = []
+        for project_id, owner_id in projects:
+            # Pareto-distributed team sizes: most projects are small, a few
+            # have a large share of all users.
+            size = min(len(user_ids), int(self.rng.paretovariate(1.1) * 3))
+            team = {owner_id, *self.rng.sample(user_ids, size)}
+            members[project_id] = list(team)
+            memberships.extend(
+                ProjectMembership(
+                    project_id=project_id,
+                    user_id=user_id,
+                    role=(
+                        ProjectMembership.Role.OWNER
+                        if user_id == owner_id
+                        else ProjectMembership.Role.MEMBER
+                    ),
+                )
+                for user_id in team
+            )
+        return self._bulk_create(ProjectMembership, memberships)
+
+    def _create_tasks(self, count, users, members):
+        project_ids = list(members)
+        # Bigger teams produce more tasks.
+        weights = [len(members[project_id]) for project_id in project_ids]
+        statuses = list(STATUS_WEIGHTS)
+        status_weights = list(STATUS_WEIGHTS.values())
+        priorities = list(PRIORITY_WEIGHTS)
+        priority_weights = list(PRIORITY_WEIGHTS.values())
+        now = timezone.now()
+        order = {}
+
+        created = 0
+        while created < count:
+            batch = []
+            for _ in range(min(self.batch_size, count - created)):
+                # One task in ten is a personal task without a project.
+                if self.rng.random() < 0.1:
+                    project_id = None
+                    author_id = self.rng.choice(users)[0]
+                    assignee_id = author_id if self.rng.random() < 0.5 else None
+                else:
+                    project_id = self.rng.choices(project_ids, weights)[0]
+                    team = members[project_id]
+                    author_id = self.rng.choice(team)
+                    assignee_id = (
+                        self.rng.choice(team) if self.rng.random() < 0.7 else None
+                    )
+                status = self.rng.choices(statuses, status_weights)[0]
+                key = (project_id, author_id if project_id is None else None, status)
+                order[key] = order.get(key, -1) + 1
+                deadline = (
+                    now + timedelta(hours=self.rng.randint(-24 * 60, 24 * 90))
+                    if self.rng.random() < 0.6
+                    else None
+                )
+                batch.append(
+                    Task(
+                        title=f"Task {created + len(batch)}",
+                        description=(
+                            "Seeded task description. " * self.rng.randint(0, 20)
+                        ),
+                        status=status,
+                        priority=self.rng.choices(priorities, priority_weights)[0],
+                        assignee_id=assignee_id,
+                        order=order[key],
+                        author_id=author_id,
+                        project_id=project_id,
+                        deadline=deadline,
+                        # bulk_create() skips Task.save().
+                        reminder_at=reminder_time(deadline, status, now),
+                    )
+                )
+            with transaction.atomic():
+                Task.objects.bulk_create(batch)
+            created += len(batch)
+        return created
+
+    def _create_invitations(self, count, users, members):
+        project_ids = list(members)
+        statuses = [
+            Invitation.Status.PENDING,
+            Invitation.Status.ACCEPTED,
+            Invitation.Status.DECLINED,
+        ]
+        now = timezone.now()
+        seen = set()
+        invitations = []
+        attempts = 0
+        while len(invitations) < count and attempts < count * 10:
+            attempts += 1
+            project_id = self.rng.choice(project_ids)
+            email = self.rng.choice(users)[1]
+            status = self.rng.choices(statuses, [6, 2, 2])[0]
+            if (email, project_id, status) in seen:
+                continue
+            seen.add((email, project_id, status))
+            invitations.append(
+                Invitation(
+                    email=email,
+                    project_id=project_id,
+                    invited_by_id=members[project_id][0],
+                    status=status,
+                    # A fifth of the invitations have already expired.
+                    expires_at=now + timedelta(days=self.rng.randint(-4, 14)),
+                )
+            )
+        return self._bulk_create(Invitation, invitations)
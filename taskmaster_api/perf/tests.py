@@ -0,0 +1,185 @@
+import os
+import re
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.testing import capture_select_plans, full_scans, temp_btrees
+from users.revocation import revoked_tokens
+
+from .benchmarks import (
+    ENDPOINTS,
+    api_client,
+    baseline_path,
+    benchmark_context,
+    compare,
+    fetch,
+    format_results,
+    load_baseline,
+    run_benchmarks,
+    save_baseline,
+)
+
+# BENCHMARK_SCALE=small selects a bigger dataset, BENCHMARK_LATENCY=1 also
+# compares latencies (only meaningful on the machine that wrote the baseline)
+# and UPDATE_BENCHMARK_BASELINE=1 rewrites the baseline file.
+SCALE = os.environ.get("BENCHMARK_SCALE", "tiny")
+ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", "5"))
+
+
+PLAN_SNAPSHOT_DIR = Path(__file__).resolve().parent / "plans"
+
+# Plan problems we know about, per endpoint. The test fails on new problems
+# and on listed ones that went away, so this list always matches reality.
+KNOWN_PLAN_PROBLEMS = {
+    # Index seeks for both visibility branches (project_id IN my projects,
+    # my personal tasks by author_id), then the matches are sorted by "order".
+    "task-list": {"temp b-tree for ORDER BY"},
+    # The project_id index does not cover the default ordering by "order".
+    "task-list-project": {"temp b-tree for ORDER BY"},
+    "task-list-unpaginated": {"temp b-tree for ORDER BY"},
+    # Seeks the (project, deadline) range, then sorts only the matches.
+    "task-list-overdue": {"temp b-tree for ORDER BY"},
+    # UNION of the author and assignee index lookups, then sorted.
+    "my-task-list": {"temp b-tree for ORDER BY"},
+    "my-task-list-unpaginated": {"temp b-tree for ORDER BY"},
+    # Seeks the assignee index; the matches are sorted by "order".
+    "my-task-list-assigned": {"temp b-tree for ORDER BY"},
+    # Index seeks for both visibility branches, then the matches are sorted
+    # by archived_at.
+    "archived-task-list": {"temp b-tree for ORDER BY"},
+    # The directory reads the caller's co-members by id through the
+    # membership indexes, then sorts just those by username.
+    "user-list": {"temp b-tree for ORDER BY"},
+    "user-search": {"temp b-tree for ORDER BY"},
+    "user-list-project": {"temp b-tree for ORDER BY"},
+}
+
+
+def collapse_select_list(sql):
+    """
+    Replaces the column list of the outermost SELECT with "...", so adding
+    a field to a model does not touch every snapshot. Aggregates such as
+    COUNT(*) are kept.
+    """
+    match = re.match(r"SELECT (DISTINCT )?", sql)
+    if not match:
+        return sql
+    depth = 0
+    for position in range(match.end(), len(sql)):
+        char = sql[position]
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if depth == 0 and sql.startswith(" FROM ", position):
+            columns = sql[match.end() : position]
+            if '"."' not in columns:
+                return sql
+            return f"{match.group()}...{sql[position:]}"
+    return sql
+
+
+def plan_snapshot(statements):
+    """
+    Renders the distinct statements of a request with their query plans.
+    """
+    blocks = []
+    for sql, plan in statements:
+        block = "\n".join([collapse_select_list(sql), *plan])
+        if block not in blocks:
+            blocks.append(block)
+    return "\n\n".join(blocks) + "\n"
+
+
+def plan_problems(statements):
+    problems = set()
+    for _, plan in statements:
+        problems.update(f"full scan of {table}" for table in full_scans(plan))
+        problems.update(f"temp b-tree for {use}" for use in temp_btrees(plan))
+    return problems
+
+
+# A private, empty cache: plans must not depend on what earlier runs cached.
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN for every statement of the list and detail endpoints.
+
+    Snapshots live in perf/plans/<endpoint>.txt; after an intended change
+    run the tests with UPDATE_PLAN_SNAPSHOTS=1 and review the diff.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_scale", scale="tiny", stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_query_plans(self):
+        user, context = benchmark_context()
+        client = api_client(user)
+        update = os.environ.get("UPDATE_PLAN_SNAPSHOTS") == "1"
+
+        for name, template in ENDPOINTS:
+            with self.subTest(endpoint=name):
+                path = template.format(**context)
+                # The periodic read of new token revocations is not part of
+                # the endpoint's plan.
+                revoked_tokens.refresh(force=True)
+                statements = capture_select_plans(lambda: fetch(client, path))
+                self.assertEqual(
+                    plan_problems(statements), KNOWN_PLAN_PROBLEMS.get(name, set())
+                )
+
+                snapshot = plan_snapshot(statements)
+                snapshot_path = PLAN_SNAPSHOT_DIR / f"{name}.txt"
+                if update:
+                    PLAN_SNAPSHOT_DIR.mkdir(exist_ok=True)
+                    snapshot_path.write_text(snapshot)
+                    continue
+                self.assertTrue(
+                    snapshot_path.exists(),
+                    f"Missing {snapshot_path}, run with UPDATE_PLAN_SNAPSHOTS=1.",
+                )
+                self.assertEqual(
+                    snapshot,
+                    snapshot_path.read_text(),
+                    f"Query plans of {name} changed; review them and run with "
+                    "UPDATE_PLAN_SNAPSHOTS=1.",
+                )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class EndpointBenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_scale", scale=SCALE, stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_endpoints_do_not_regress(self):
+        results = run_benchmarks(ITERATIONS)
+        path = baseline_path(SCALE)
+
+        if os.environ.get("UPDATE_BENCHMARK_BASELINE") == "1":
+            save_baseline(path, SCALE, ITERATIONS, results)
+            return
+
+        baseline = load_baseline(path)
+        if baseline is None:
+            self.skipTest(f"No baseline at {path}.")
+        regressions = compare(
+            results,
+            baseline,
+            check_latency=os.environ.get("BENCHMARK_LATENCY") == "1",
+        )
+        self.assertEqual(
+            regressions, [], "\n" + format_results(results, baseline)
+        )
@@ -1,16 +1,28 @@
 from django.contrib import admin
+
+from core.admin import AutocompleteFilter, LargeTableAdmin
 from .models import Project, ProjectMembership
 
 
 # Register your models here.
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(LargeTableAdmin):
     list_display = ("id", "title", "owner", "created_at", "updated_at")
-    search_fields = ("title", "description")
-    list_filter = ("created_at", "updated_at", "owner")
+    list_select_related = ("owner",)
+    # Also the search of the project autocompletes.
+    search_fields = ("=id", "^title")
+    list_filter = ("created_at", "updated_at", ("owner", AutocompleteFilter))
+    autocomplete_fields = ("owner",)
 
 
-class ProjectMembershipAdmin(admin.ModelAdmin):
+class ProjectMembershipAdmin(LargeTableAdmin):
     list_display = ("project", "user", "role", "joined_at")
+    list_select_related = ("project", "user")
+    list_filter = (
+        "role",
+        ("project", AutocompleteFilter),
+        ("user", AutocompleteFilter),
+    )
+    autocomplete_fields = ("project", "user")
 
 
 admin.site.register(Project, ProjectAdmin)
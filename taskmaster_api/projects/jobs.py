@@ -0,0 +1,20 @@
+from django.conf import settings
+
+from jobs.registry import job
+from .models import ProjectDeletion
+
+
+@job("projects.purge_project", priority=-1)
+def purge_project(deletion_id):
+    """
+    Purges a deleted project for a few seconds, then queues itself again, so
+    other jobs get a worker in between. Safe to retry: every batch deletes
+    whatever is left.
+    """
+    from .purge import run_purge
+
+    deletion = ProjectDeletion.objects.filter(pk=deletion_id).first()
+    if deletion is None:
+        return
+    if not run_purge(deletion, time_budget=settings.PROJECT_PURGE_JOB_SECONDS):
+        purge_project.enqueue(deletion_id=deletion_id)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_nocase_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectmembership',
+            index=models.Index(fields=['project', 'joined_at'], name='membership_joined_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Collate
 from django.contrib.auth import get_user_model
 from django.db.models.manager import Manager  # Import the Manager type
 
@@ -11,6 +12,16 @@ if TYPE_CHECKING:
     from tasks.models import Task
 
 
+class LiveProjectManager(models.Manager):
+    """
+    Hides projects that were deleted and are waiting for their purge (see
+    projects/purge.py). Related managers, e.g. `user.projects`, use it too.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 # Create your models here.
 class Project(models.Model):
 
@@ -24,8 +35,19 @@ class Project(models.Model):
     members = models.ManyToManyField(
         User, through="ProjectMembership", blank=True, related_name="projects"
     )
+    # Set when the owner deletes the project; the rows are purged later.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
     tasks: Manager["Task"]
 
+    objects = LiveProjectManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Case-insensitive title prefix search, see Task.Meta.
+            models.Index(Collate("title", "NOCASE"), name="project_title_nocase_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -52,6 +74,52 @@ class ProjectMembership(models.Model):
 
     class Meta:
         unique_together = ("project", "user")
+        indexes = [
+            # The member list's keyset order, (joined_at, id) within a
+            # project; SQLite appends the id to every index.
+            models.Index(fields=["project", "joined_at"], name="membership_joined_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.project.title} ({self.role})"
+
+
+class ProjectDeletion(models.Model):
+    """
+    Tracks the background purge of a deleted project, so its owner can
+    follow the progress. Outlives the project, which is why it only keeps
+    the project's id and title.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+
+    project_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="project_deletions"
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    # Rows to purge, counted when the purge starts.
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    deleted_rows = models.PositiveIntegerField(default=0)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Deletion of {self.title} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        """
+        Share of the rows purged so far, from 0 to 1.
+        """
+        if self.status == self.Status.DONE:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.deleted_rows / self.total_rows, 1.0)
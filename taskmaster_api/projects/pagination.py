@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+
+class MemberPagination(CursorPagination):
+    """
+    Keyset pagination for a project's members, in the order they joined.
+    Each page seeks the (project, joined_at) index right after the last
+    member of the previous one.
+    """
+
+    ordering = ("joined_at", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # ?paginate=false returns every member as a plain list, like the
+        # task lists.
+        if request.query_params.get("paginate", "true").lower() == "false":
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,134 @@
+"""
+Background deletion of projects.
+
+Deleting a project through Django's CASCADE collector loads every task,
+invitation and membership into Python and deletes them in one long
+transaction. Instead, the request only marks the project as deleted, which
+hides it everywhere, and a job purges the dependent rows in small raw
+DELETE batches, each in its own short transaction.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from invitations.models import Invitation
+from tasks.models import ArchivedTask, Task, TaskActivity, TaskImport, TaskReminder
+from tasks.stats import invalidate_project_stats
+from .models import Project, ProjectDeletion, ProjectMembership
+
+
+def purge_steps(project_id):
+    """
+    The querysets to empty, in order. The dependents of tasks go with each
+    batch of tasks (see purge_batch()).
+    """
+    return [
+        TaskActivity.objects.filter(project_id=project_id),
+        Task.objects.filter(project_id=project_id),
+        ArchivedTask.objects.filter(project_id=project_id),
+        TaskImport.objects.filter(project_id=project_id),
+        Invitation.objects.filter(project_id=project_id),
+        ProjectMembership.objects.filter(project_id=project_id),
+    ]
+
+
+def count_rows(project_id):
+    return sum(rows.count() for rows in purge_steps(project_id))
+
+
+def _raw_delete(queryset):
+    # Plain DELETE ... WHERE, without the collector's SELECTs and cascades.
+    return queryset._raw_delete(queryset.db)
+
+
+def _delete_uploads(import_ids):
+    # The raw DELETE skips FileField cleanup, so the uploads go first.
+    # Uploads are stored by content: a blob that an import of another
+    # project still uses is left alone.
+    names = set(
+        TaskImport.objects.filter(pk__in=import_ids)
+        .exclude(file="")
+        .values_list("file", flat=True)
+    )
+    if not names:
+        return
+    in_use = set(
+        TaskImport.objects.filter(file__in=names)
+        .exclude(pk__in=import_ids)
+        .values_list("file", flat=True)
+    )
+    storage = TaskImport._meta.get_field("file").storage
+    for name in names - in_use:
+        storage.delete(name)
+
+
+def purge_batch(project_id, batch_size):
+    """
+    Deletes up to `batch_size` rows of the first step with rows left, in one
+    transaction. Returns how many rows were deleted; 0 means done.
+    """
+    for rows in purge_steps(project_id):
+        ids = list(rows.order_by().values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            continue
+        with transaction.atomic():
+            if rows.model is Task:
+                _raw_delete(TaskReminder.objects.filter(task_id__in=ids))
+            elif rows.model is TaskImport:
+                _delete_uploads(ids)
+            return _raw_delete(rows.model.objects.filter(pk__in=ids))
+    return 0
+
+
+def schedule_project_deletion(project):
+    """
+    Hides `project` right away and queues its purge. Only touches the
+    project row and the few rows that grant access to it: memberships (every
+    task, calendar and stats query goes through them) and open invitations.
+    """
+    from .jobs import purge_project
+
+    now = timezone.now()
+    with transaction.atomic():
+        Project.all_objects.filter(pk=project.pk).update(deleted_at=now)
+        ProjectMembership.objects.filter(project=project).delete()
+        Invitation.objects.filter(project=project).active().update(expires_at=now)
+        deletion = ProjectDeletion.objects.create(
+            project_id=project.pk, title=project.title, owner_id=project.owner_id
+        )
+        purge_project.enqueue(deletion_id=deletion.pk)
+        invalidate_project_stats(project.pk)
+    return deletion
+
+
+def run_purge(deletion, time_budget=None):
+    """
+    Purges batches until the project is gone or `time_budget` seconds have
+    passed. Returns True once the purge is complete.
+    """
+    if deletion.status == ProjectDeletion.Status.DONE:
+        return True
+    if deletion.total_rows is None:
+        deletion.total_rows = count_rows(deletion.project_id)
+        deletion.status = ProjectDeletion.Status.RUNNING
+        deletion.save(update_fields=["total_rows", "status"])
+
+    started = time.monotonic()
+    batch_size = settings.PROJECT_PURGE_BATCH_SIZE
+    while time_budget is None or time.monotonic() - started < time_budget:
+        deleted = purge_batch(deletion.project_id, batch_size)
+        if not deleted:
+            with transaction.atomic():
+                _raw_delete(Project.all_objects.filter(pk=deletion.project_id))
+                ProjectDeletion.objects.filter(pk=deletion.pk).update(
+                    status=ProjectDeletion.Status.DONE, finished_at=timezone.now()
+                )
+            return True
+        ProjectDeletion.objects.filter(pk=deletion.pk).update(
+            deleted_rows=F("deleted_rows") + deleted
+        )
+    return False
@@ -1,9 +1,22 @@
 from rest_framework import serializers
-from .models import Project, ProjectMembership
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from .models import Project, ProjectDeletion, ProjectMembership
+from core.fieldsets import Fieldset, SparseFieldsetSerializerMixin
 from users.serializers import UserSerializer
 
+User = get_user_model()
 
-class ProjectSerializer(serializers.ModelSerializer):
+
+def user_columns(prefix=""):
+    """
+    The columns UserSerializer reads, for .only() on a (related) queryset.
+    """
+    return [f"{prefix}{name}" for name in UserSerializer.Meta.fields]
+
+
+class ProjectSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # By default, a read-only field will just return the author's ID.
     # This is a common and good approach.
     owner = UserSerializer(read_only=True)
@@ -21,10 +34,46 @@ class ProjectSerializer(serializers.ModelSerializer):
             "task_count",
             "created_at",
         ]
+        expandable_fields = {"owner": "owner", "members": "members"}
 
     def get_task_count(self, obj: Project) -> int:
+        # Annotated by optimize_queryset(); counted one by one otherwise.
+        if hasattr(obj, "num_tasks"):
+            return obj.num_tasks
         return obj.tasks.count()
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fieldset=None):
+        """
+        Loads what the requested fields need in a fixed number of queries.
+        """
+        from tasks.models import Task
+
+        fieldset = fieldset or Fieldset()
+        columns = ["id", "owner"]
+        for name in ("title", "description", "created_at"):
+            if fieldset.includes(name):
+                columns.append(name)
+
+        if fieldset.expands("owner"):
+            queryset = queryset.select_related("owner")
+            columns += user_columns("owner__")
+        if fieldset.includes("members"):
+            members = User.objects.only(
+                *(user_columns() if fieldset.expands("members") else ["id"])
+            )
+            queryset = queryset.prefetch_related(Prefetch("members", queryset=members))
+        if fieldset.includes("task_count"):
+            tasks = (
+                Task.objects.filter(project=OuterRef("pk"))
+                .order_by()
+                .values("project")
+                .annotate(count=Count("id"))
+                .values("count")
+            )
+            queryset = queryset.annotate(num_tasks=Coalesce(Subquery(tasks), 0))
+        return queryset.only(*columns)
+
 
 class ProjectBasicSerializer(serializers.ModelSerializer):
 
@@ -43,4 +92,47 @@ class ProjectMemberSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProjectMembership
-        fields = ["id", "username", "email", "avatar"]
+        fields = ["id", "username", "email", "avatar", "role", "joined_at"]
+
+
+class AssigneeStatsSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    count = serializers.IntegerField()
+
+
+class ProjectStatsSerializer(serializers.Serializer):
+    """
+    Output of tasks.stats.project_stats(), for the API schema.
+    """
+
+    project = serializers.IntegerField()
+    total = serializers.IntegerField()
+    by_status = serializers.DictField(child=serializers.IntegerField())
+    by_priority = serializers.DictField(child=serializers.IntegerField())
+    by_assignee = AssigneeStatsSerializer(many=True)
+    unassigned = serializers.IntegerField()
+    overdue = serializers.IntegerField()
+    due_this_week = serializers.IntegerField(
+        help_text="Open tasks due within the next seven days."
+    )
+    generated_at = serializers.DateTimeField()
+
+
+class ProjectDeletionSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ProjectDeletion
+        fields = [
+            "id",
+            "project_id",
+            "title",
+            "status",
+            "total_rows",
+            "deleted_rows",
+            "progress",
+            "requested_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
@@ -1,3 +1,262 @@
-from django.test import TestCase
+import os
+from datetime import timedelta
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.worker import StopFlag, work
+from tasks.models import Task, TaskImport
+from .models import Project, ProjectDeletion, ProjectMembership
+from .purge import run_purge
+
+User = get_user_model()
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ProjectStatsTests(TestCase):
+    def setUp(self):
+        # Ids are reused once a test's transaction is rolled back.
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.member = User.objects.create_user(
+            username="member", email="member@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.owner)
+        ProjectMembership.objects.create(project=self.project, user=self.member)
+        now = timezone.now()
+        self.tasks = [
+            Task.objects.create(
+                title="Late",
+                author=self.owner,
+                project=self.project,
+                assignee=self.member,
+                priority=Task.Priority.HIGH,
+                deadline=now - timedelta(days=1),
+            ),
+            Task.objects.create(
+                title="Soon",
+                author=self.owner,
+                project=self.project,
+                assignee=self.member,
+                status=Task.Status.IN_PROGRESS,
+                deadline=now + timedelta(days=2),
+            ),
+            Task.objects.create(
+                title="Finished late",
+                author=self.owner,
+                project=self.project,
+                status=Task.Status.DONE,
+                deadline=now - timedelta(days=3),
+            ),
+        ]
+        self.url = f"/api/projects/{self.project.id}/stats/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_counts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 3)
+        self.assertEqual(response.data["by_status"]["TODO"], 1)
+        self.assertEqual(response.data["by_status"]["BACKLOG"], 0)
+        self.assertEqual(response.data["by_priority"], {"L": 0, "M": 0, "H": 1, "none": 2})
+        self.assertEqual(
+            response.data["by_assignee"],
+            [{"id": self.member.id, "username": "member", "count": 2}],
+        )
+        self.assertEqual(response.data["unassigned"], 1)
+        self.assertEqual(response.data["overdue"], 1)
+        self.assertEqual(response.data["due_this_week"], 1)
+
+    def test_cached_until_a_task_changes(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse(any('"tasks_task"' in q["sql"] for q in queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title="New", author=self.owner, project=self.project)
+        self.assertEqual(self.client.get(self.url).data["total"], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/tasks/update-order/",
+                {"status": "DONE", "ordered_ids": [self.tasks[0].id]},
+                format="json",
+            )
+        self.assertEqual(self.client.get(self.url).data["by_status"]["DONE"], 2)
+
+    def test_non_members_are_refused(self):
+        outsider = User.objects.create_user(
+            username="outsider", email="outsider@example.com", password="s3cret-pass"
+        )
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PROJECT_PURGE_BATCH_SIZE=2,
+)
+class ProjectDeletionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.member = User.objects.create_user(
+            username="member", email="member@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.owner)
+        ProjectMembership.objects.create(project=self.project, user=self.member)
+        for i in range(5):
+            Task.objects.create(
+                title=f"Task {i}",
+                author=self.owner,
+                assignee=self.member,
+                project=self.project,
+            )
+        self.personal = Task.objects.create(title="Personal", author=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def delete_project(self):
+        response = self.client.delete(f"/api/projects/{self.project.id}/")
+        self.assertEqual(response.status_code, 202)
+        return response
+
+    def test_project_is_hidden_before_the_purge(self):
+        self.delete_project()
+        self.assertEqual(self.client.get("/api/projects/").data, [])
+        self.assertEqual(
+            self.client.get(f"/api/projects/{self.project.id}/").status_code, 404
+        )
+        member = APIClient()
+        member.force_authenticate(self.member)
+        self.assertEqual(member.get("/api/my-tasks/?paginate=false").data, [])
+        self.assertEqual(member.get("/api/tasks/?paginate=false").data, [])
+        # Nothing but the memberships was deleted yet.
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 5)
+
+    def test_purge_runs_in_batches_and_reports_progress(self):
+        response = self.delete_project()
+        deletion = ProjectDeletion.objects.get()
+        self.assertEqual(
+            response["Location"], f"http://testserver/api/project-deletions/{deletion.id}/"
+        )
+
+        self.assertFalse(run_purge(deletion, time_budget=0))
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, "running")
+        # 5 tasks and 5 CREATE activity entries; memberships went right away.
+        self.assertEqual(deletion.total_rows, 10)
+
+        with self.settings(PROJECT_PURGE_JOB_SECONDS=60):
+            work(StopFlag(), burst=True)
+        data = self.client.get(f"/api/project-deletions/{deletion.id}/").data
+        self.assertEqual(data["status"], "done")
+        self.assertEqual(data["progress"], 1.0)
+        self.assertEqual(data["deleted_rows"], 10)
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertEqual(list(Task.objects.all()), [self.personal])
+
+    def test_purge_deletes_the_import_uploads(self):
+        other = Project.objects.create(title="Gemini", owner=self.owner)
+        with TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            uploads = {}
+            for project, content in (
+                (self.project, b"title\nMine\n"),
+                (self.project, b"title\nShared\n"),
+                (other, b"title\nShared\n"),
+            ):
+                task_import = TaskImport(
+                    project=project, user=self.owner, file_format="csv"
+                )
+                task_import.file.save("tasks.csv", ContentFile(content))
+                uploads[project.pk, content] = task_import.file.path
+
+            self.delete_project()
+            self.assertTrue(run_purge(ProjectDeletion.objects.get()))
+            mine = uploads[self.project.pk, b"title\nMine\n"]
+            self.assertFalse(os.path.exists(mine))
+            # Still used by the other project's import.
+            self.assertTrue(os.path.exists(uploads[other.pk, b"title\nShared\n"]))
+
+    def test_only_the_owner_can_delete_and_follow(self):
+        member = APIClient()
+        member.force_authenticate(self.member)
+        self.assertEqual(
+            member.delete(f"/api/projects/{self.project.id}/").status_code, 403
+        )
+        self.delete_project()
+        self.assertEqual(member.get("/api/project-deletions/").data, [])
+
+
+class ProjectMembersListTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.owner)
+        self.members = [
+            User.objects.create_user(
+                username=f"{name}{i}",
+                email=f"{name}{i}@example.com",
+                password="s3cret-pass",
+            )
+            for i, name in enumerate(["ada", "alan", "grace", "ada"] * 3)
+        ]
+        for user in self.members:
+            ProjectMembership.objects.create(project=self.project, user=user)
+        self.url = f"/api/projects/{self.project.id}/members/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_pages_follow_the_join_order(self):
+        seen, url = [], f"{self.url}?page_size=5"
+        while url:
+            data = self.client.get(url).data
+            seen += [member["username"] for member in data["results"]]
+            url = data["next"]
+        self.assertEqual(seen, ["owner"] + [user.username for user in self.members])
+        self.assertEqual(
+            len(self.client.get(f"{self.url}?paginate=false").data), 13
+        )
+
+    def test_role_filter_and_prefix_search(self):
+        data = self.client.get(f"{self.url}?role=owner").data
+        self.assertEqual([m["username"] for m in data["results"]], ["owner"])
+        self.assertEqual(data["results"][0]["role"], "owner")
+
+        data = self.client.get(f"{self.url}?search=AD").data
+        self.assertEqual(len(data["results"]), 6)
+        data = self.client.get(f"{self.url}?search=grace6@").data
+        self.assertEqual([m["email"] for m in data["results"]], ["grace6@example.com"])
+        # Only prefixes match.
+        self.assertEqual(self.client.get(f"{self.url}?search=race").data["results"], [])
+        self.assertEqual(self.client.get(f"{self.url}?role=admin").status_code, 400)
+
+    def test_membership_is_checked_by_the_list_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        outsider = APIClient()
+        outsider.force_authenticate(
+            User.objects.create_user(username="eve", password="s3cret-pass")
+        )
+        self.assertEqual(outsider.get(self.url).status_code, 404)
+        self.assertEqual(outsider.get(f"{self.url}?search=ada").status_code, 404)
+        self.assertEqual(self.client.get("/api/projects/999/members/").status_code, 404)
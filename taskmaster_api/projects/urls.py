@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     ProjectViewSet,
+    ProjectDeletionViewSet,
     ProjectMemberRemoveView,
     ProjectMemberLeave,
     ProjectMembersList,
@@ -9,6 +10,9 @@ from .views import (
 
 router = DefaultRouter()
 router.register(r"projects", ProjectViewSet, basename="project")
+router.register(
+    r"project-deletions", ProjectDeletionViewSet, basename="project-deletion"
+)
 
 urlpatterns = [
     path("", include(router.urls)),
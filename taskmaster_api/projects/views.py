@@ -1,20 +1,50 @@
 from rest_framework import viewsets, permissions, status, generics
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import SearchFilter
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.views import APIView
-from .models import Project, ProjectMembership
-from .serializers import ProjectMemberSerializer, ProjectSerializer
+from .models import Project, ProjectDeletion, ProjectMembership
+from .purge import schedule_project_deletion
+from .serializers import (
+    ProjectDeletionSerializer,
+    ProjectMemberSerializer,
+    ProjectSerializer,
+    ProjectStatsSerializer,
+)
+from .pagination import MemberPagination
 from .permissions import IsMember, IsProjectOwner
 from typing import cast
+from users.directory import invalidate_user_directory
 from users.models import CustomUser
+from django.db.models import Exists
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import extend_schema
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from core.fieldsets import SparseFieldsetViewMixin
+from tasks.export import FORMATS as EXPORT_FORMATS, export_tasks
+from tasks.models import Task, TaskActivity
+from tasks.importer import schedule_import
+from tasks.serializers import (
+    TaskActivitySerializer,
+    TaskImportSerializer,
+    TaskImportUploadSerializer,
+)
+from tasks.stats import project_stats
+from tasks.views import ActivityFeedMixin
 
 
 # Create your views here.
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(
+    ActivityFeedMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet
+):
     """
     API endpoint that allows projects to be viewed or edited.
     A user can only see and edit their own project.
+    Supports sparse fieldsets, e.g., /api/projects/?fields=id,title&expand=
     """
 
     serializer_class = ProjectSerializer
@@ -30,12 +60,32 @@ class ProjectViewSet(viewsets.ModelViewSet):
         user = cast(CustomUser, self.request.user)
 
         # Now this line is considered type-safe.
-        return user.projects.all()
+        if self.action in ["stats", "activity", "export", "import_tasks"]:
+            return user.projects.only("id")
+        return self.optimize_queryset(user.projects.all())
 
     def perform_create(self, serializer):
         """Ensure the author is the currently logged-in user."""
         serializer.save(owner=self.request.user)
 
+    @extend_schema(responses={202: ProjectDeletionSerializer})
+    def destroy(self, request, *args, **kwargs):
+        """
+        Hides the project at once and purges its tasks, invitations and
+        memberships in the background. Follow the purge at the returned
+        Location.
+        """
+        project = self.get_object()
+        deletion = schedule_project_deletion(project)
+        location = reverse(
+            "project-deletion-detail", args=[deletion.pk], request=request
+        )
+        return Response(
+            ProjectDeletionSerializer(deletion).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
+
     def get_permissions(self):
         """
         Dynamically assign permissions based on the action.
@@ -43,7 +93,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
         - Only the owner can edit or delete.
         - Any authenticated user can create.
         """
-        if self.action in ["retrieve", "list"]:
+        if self.action in [
+            "retrieve",
+            "list",
+            "stats",
+            "activity",
+            "export",
+            "import_tasks",
+        ]:
             # For viewing, you must be a member.
             permission_classes = [permissions.IsAuthenticated, IsMember]
         elif self.action in ["update", "partial_update", "destroy"]:
@@ -55,6 +112,98 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    @extend_schema(responses=ProjectStatsSerializer)
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """
+        Task counts by status, priority and assignee, plus overdue and
+        due-this-week counts, for the project dashboard.
+        """
+        project = self.get_object()
+        return Response(ProjectStatsSerializer(project_stats(project.pk)).data)
+
+    @extend_schema(responses=TaskActivitySerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def activity(self, request, pk=None):
+        """
+        Changes to the project's tasks, deleted ones included, newest first.
+        Page with the `next` and `previous` links.
+        """
+        project = self.get_object()
+        return self.activity_response(TaskActivity.objects.filter(project=project))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                description="csv (default) or ndjson",
+                required=False,
+                type=str,
+                enum=list(EXPORT_FORMATS),
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(detail=True, methods=["get"])
+    def export(self, request, pk=None):
+        """
+        Streams the project's tasks as CSV or NDJSON, in id order, which the
+        project_id index yields without sorting. Takes the task list filters,
+        e.g. ?status=DONE&assignee=3&deadline__gte=...
+        """
+        project = self.get_object()
+        tasks = Task.objects.filter(project=project).order_by("pk")
+        return export_tasks(request, tasks, f"project-{project.pk}-tasks")
+
+    @extend_schema(
+        request={"multipart/form-data": TaskImportUploadSerializer},
+        responses={202: TaskImportSerializer},
+    )
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_tasks(self, request, pk=None):
+        """
+        Imports tasks from an uploaded CSV or NDJSON file with the export's
+        columns (title is required; assignee is a member's email or
+        username). The rows are imported in the background; follow the
+        progress and the per-row errors at the returned Location.
+        """
+        project = self.get_object()
+        upload = TaskImportUploadSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        task_import = schedule_import(
+            project,
+            request.user,
+            upload.validated_data["file"],
+            upload.validated_data["file_format"],
+        )
+        location = reverse("task-import-detail", args=[task_import.pk], request=request)
+        return Response(
+            TaskImportSerializer(task_import).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
+
+
+class ProjectDeletionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Progress of the purges of the projects the user deleted, newest first.
+    """
+
+    serializer_class = ProjectDeletionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):  # type: ignore
+        if not self.request.user.is_authenticated:
+            return ProjectDeletion.objects.none()
+        return ProjectDeletion.objects.filter(owner=self.request.user).order_by(
+            "-requested_at"
+        )
+
 
 class ProjectMemberRemoveView(APIView):
     """
@@ -87,6 +236,7 @@ class ProjectMemberRemoveView(APIView):
             )
 
         membership.delete()
+        invalidate_user_directory(project.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -114,25 +264,53 @@ class ProjectMemberLeave(APIView):
             )
 
         membership.delete()
+        invalidate_user_directory(project.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ProjectMembersList(generics.GenericAPIView):
+class ProjectMembersList(generics.ListAPIView):
+    """
+    The members of a project in the order they joined, 50 per page. Filter
+    with ?role=owner|member, search the start of usernames and emails with
+    ?search=, and get everyone at once with ?paginate=false.
+    """
+
     permission_classes = [permissions.IsAuthenticated, IsMember]
     serializer_class = ProjectMemberSerializer
+    pagination_class = MemberPagination
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_fields = ["role"]
+    search_fields = ["^user__username", "^user__email"]
 
-    def get(self, request, project_pk):
-        project = get_object_or_404(Project, pk=project_pk)
+    def caller_membership(self):
+        return ProjectMembership.objects.filter(
+            project_id=self.kwargs["project_pk"], user=self.request.user
+        )
 
-        try:
-            ProjectMembership.objects.get(project=project, user=request.user)
-        except:
-            return Response(
-                {"detail": "You are not a member of this project."},
-                status=status.HTTP_404_NOT_FOUND,
+    def get_queryset(self):  # type: ignore
+        # The caller's own membership is checked by the same query, as an
+        # uncorrelated EXISTS that SQLite evaluates once.
+        return (
+            ProjectMembership.objects.filter(project_id=self.kwargs["project_pk"])
+            .filter(Exists(self.caller_membership()))
+            .select_related("user")
+            .only(
+                "id",
+                "role",
+                "joined_at",
+                "user__id",
+                "user__username",
+                "user__email",
+                "user__avatar",
             )
-        memberships = ProjectMembership.objects.filter(project=project).select_related(
-            "user"
         )
-        serializer = self.get_serializer(memberships, many=True)
-        return Response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        page = response.data
+        rows = page["results"] if isinstance(page, dict) else page
+        # An empty page is either a filter without matches or a project
+        # the caller is not a member of (deleted ones included).
+        if not rows and not self.caller_membership().exists():
+            raise NotFound("You are not a member of this project.")
+        return response
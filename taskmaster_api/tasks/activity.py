@@ -0,0 +1,92 @@
+"""
+Recording of the task activity log (TaskActivity).
+
+Task.save() and Task.delete() record their own entries, diffing against the
+values the task was loaded with. Views say who is acting with `acting_as()`,
+and bulk operations wrap their work in `batched_activity()`, so their entries
+go to the database as one bulk INSERT instead of one per task.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .models import TRACKED_FIELDS, TaskActivity
+
+_actor = ContextVar("task_activity_actor", default=None)
+_buffer = ContextVar("task_activity_buffer", default=None)
+
+
+@contextmanager
+def acting_as(user):
+    """
+    Attributes the activity recorded inside the block to `user`.
+    """
+    token = _actor.set(user if user is not None and user.is_authenticated else None)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+@contextmanager
+def batched_activity():
+    """
+    Collects the activity recorded inside the block and writes it with one
+    bulk_create() when the block exits. Nested blocks join the outer batch.
+    """
+    if _buffer.get() is not None:
+        yield
+        return
+    entries = []
+    token = _buffer.set(entries)
+    try:
+        yield
+    finally:
+        _buffer.reset(token)
+    TaskActivity.objects.bulk_create(entries, batch_size=500)
+
+
+def diff(old, new):
+    """
+    Returns {field: [old, new]} for the tracked attributes that differ.
+    Attributes missing from either side (e.g. deferred ones) are skipped.
+    """
+    return {
+        TRACKED_FIELDS[attname]: [old[attname], new[attname]]
+        for attname in TRACKED_FIELDS
+        if attname in old and attname in new and old[attname] != new[attname]
+    }
+
+
+def classify(changes):
+    """
+    Board moves get their own actions, so the feed (and compaction) can tell
+    them apart from real edits.
+    """
+    fields = set(changes)
+    if fields == {"order"}:
+        return TaskActivity.Action.REORDER
+    if "status" in fields and fields <= {"status", "order"}:
+        return TaskActivity.Action.STATUS
+    return TaskActivity.Action.UPDATE
+
+
+def record(task, action, changes=None):
+    """
+    Records one entry for `task`, or adds it to the current batch.
+    """
+    actor = _actor.get()
+    entry = TaskActivity(
+        task_id=task.pk,
+        project_id=task.project_id,
+        actor_id=actor.pk if actor is not None else None,
+        action=action,
+        task_title=task.title,
+        changes=changes or {},
+    )
+    entries = _buffer.get()
+    if entries is not None:
+        entries.append(entry)
+    else:
+        entry.save()
+    return entry
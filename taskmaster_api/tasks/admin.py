@@ -1,8 +1,10 @@
 from django.contrib import admin
 
+from core.admin import AutocompleteFilter, LargeTableAdmin
+
 
 # Register your models here.
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(LargeTableAdmin):
     list_display = (
         "id",
         "title",
@@ -12,8 +14,17 @@ class TaskAdmin(admin.ModelAdmin):
         "order",
         "created_at",
     )
-    search_fields = ("title", "description")
-    list_filter = ("created_at", "updated_at", "author")
+    list_select_related = ("project", "author")
+    # Both seek an index: the primary key and task_title_nocase_idx.
+    search_fields = ("=id", "^title")
+    list_filter = (
+        "status",
+        ("project", AutocompleteFilter),
+        ("author", AutocompleteFilter),
+        "created_at",
+        "updated_at",
+    )
+    autocomplete_fields = ("project", "author", "assignee")
 
 
 # Register your models here.
@@ -0,0 +1,67 @@
+"""
+Archival of finished tasks.
+
+DONE tasks that haven't changed for TASK_ARCHIVE_AFTER are moved, batch by
+batch, from the live task table into ArchivedTask. Boards, my-tasks and their
+indexes then only carry the working set. Archived tasks keep their id and
+can be restored as they were.
+"""
+
+from django.db import transaction
+
+from .activity import batched_activity, record
+from .models import ArchivedTask, Task, TaskActivity
+from .stats import invalidate_project_stats
+
+# The columns a task and its archived copy share.
+COLUMNS = [
+    field.attname
+    for field in ArchivedTask._meta.concrete_fields
+    if field.attname != "archived_at"
+]
+
+
+def archivable_tasks(cutoff):
+    # Served by the (status, updated_at) index.
+    return Task.objects.filter(status=Task.Status.DONE, updated_at__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size=500):
+    """
+    Moves up to `batch_size` archivable tasks in one transaction and returns
+    how many were moved.
+    """
+    with transaction.atomic(), batched_activity():
+        tasks = list(archivable_tasks(cutoff).order_by()[:batch_size])
+        if not tasks:
+            return 0
+        ArchivedTask.objects.bulk_create(
+            [
+                ArchivedTask(**{column: getattr(task, column) for column in COLUMNS})
+                for task in tasks
+            ]
+        )
+        for task in tasks:
+            record(task, TaskActivity.Action.ARCHIVE)
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+        invalidate_project_stats(*{task.project_id for task in tasks})
+    return len(tasks)
+
+
+def restore_task(archived):
+    """
+    Moves an archived task back to the live table, with its id and creation
+    time. Its updated_at is bumped, so the next archiver run leaves it alone.
+    """
+    with transaction.atomic():
+        task = Task(**{column: getattr(archived, column) for column in COLUMNS})
+        # Unlike save(), bulk_create() inserts the given id as is.
+        Task.objects.bulk_create([task])
+        # ...but it still stamps created_at like any new row.
+        Task.objects.filter(pk=task.pk).update(created_at=archived.created_at)
+        task.created_at = archived.created_at
+        archived.delete()
+        record(task, TaskActivity.Action.RESTORE)
+        invalidate_project_stats(task.project_id)
+    return task
+
@@ -0,0 +1,115 @@
+"""
+iCalendar (RFC 5545) feed of the tasks with a deadline that a user can see.
+
+The feed is written by a generator over a values() iterator, so a user with
+thousands of tasks never has them all in memory, as model instances or as
+one big string.
+"""
+
+import hashlib
+from datetime import timezone as dt_timezone
+
+from django.db.models import Count, Max, Q, Sum
+
+from projects.models import ProjectMembership
+from .models import Task
+
+# iCalendar priorities: 1 is the highest, 9 the lowest.
+PRIORITIES = {Task.Priority.HIGH: 1, Task.Priority.MEDIUM: 5, Task.Priority.LOW: 9}
+COLUMNS = ("id", "title", "description", "status", "priority", "deadline", "updated_at")
+
+
+def calendar_tasks(user):
+    """
+    Tasks with a deadline in the user's projects, plus their personal ones.
+    Unlike the task list, the projects are matched with an IN subquery, so
+    both branches of the OR seek an index.
+    """
+    memberships = ProjectMembership.objects.filter(user=user).values("project_id")
+    return Task.objects.filter(
+        Q(project__in=memberships)
+        | Q(author=user, project__isnull=True),
+        deadline__isnull=False,
+    ).order_by()
+
+
+def feed_etag(tasks):
+    """
+    Returns the ETag for conditional GETs, from one aggregate. Every edit,
+    board moves included, moves the latest updated_at. Deletions change the
+    count, and the sum of the ids changes when tasks come and go with a
+    project, even if an older one takes the place of another.
+
+    There is no Last-Modified: removals don't move the latest updated_at,
+    so a client polling with If-Modified-Since alone would keep tasks that
+    are gone.
+    """
+    summary = tasks.aggregate(
+        count=Count("id"), ids=Sum("id"), last_modified=Max("updated_at")
+    )
+    digest = hashlib.sha256(
+        f"{summary['count']}:{summary['ids']}:{summary['last_modified']}".encode()
+    ).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def escape_text(value):
+    return (
+        (value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """
+    Folds a content line at 75 octets, without splitting UTF-8 sequences.
+    """
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def iter_calendar(tasks, host, chunk_size=500):
+    yield fold("BEGIN:VCALENDAR")
+    yield fold("VERSION:2.0")
+    yield fold("PRODID:-//Taskmaster//Tasks//EN")
+    yield fold("CALSCALE:GREGORIAN")
+    yield fold("X-WR-CALNAME:Taskmaster")
+
+    for task in tasks.values(*COLUMNS).iterator(chunk_size=chunk_size):
+        deadline = format_datetime(task["deadline"])
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:task-{task['id']}@{host}",
+            f"DTSTAMP:{format_datetime(task['updated_at'])}",
+            f"DTSTART:{deadline}",
+            f"DTEND:{deadline}",
+            f"SUMMARY:{escape_text(task['title'])}",
+            f"CATEGORIES:{task['status']}",
+        ]
+        if task["description"]:
+            lines.append(f"DESCRIPTION:{escape_text(task['description'])}")
+        if task["priority"] in PRIORITIES:
+            lines.append(f"PRIORITY:{PRIORITIES[task['priority']]}")
+        lines.append("END:VEVENT")
+        yield "".join(fold(line) for line in lines)
+
+    yield fold("END:VCALENDAR")
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+import django_filters
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task
+
+
+class TaskFilter(django_filters.FilterSet):
+    """
+    Filters shared by the task lists, e.g.
+    /api/tasks/?deadline__gte=2025-01-01T00:00:00Z&deadline__lte=2025-02-01T00:00:00Z
+    /api/my-tasks/?overdue=true
+    /api/my-tasks/?due_within=7
+    /api/my-tasks/export/?status=DONE&assignee=3
+    """
+
+    overdue = django_filters.BooleanFilter(
+        method="filter_overdue",
+        label="Open tasks whose deadline has passed (or, with false, has not).",
+    )
+    due_within = django_filters.NumberFilter(
+        method="filter_due_within",
+        min_value=0,
+        label="Open tasks due within this many days from now.",
+    )
+
+    class Meta:
+        model = Task
+        fields = {
+            "status": ["exact"],
+            "project": ["exact"],
+            "author": ["exact"],
+            "assignee": ["exact"],
+            "deadline": ["gte", "lte"],
+        }
+
+    def filter_overdue(self, queryset, name, value):
+        overdue = Q(deadline__lt=timezone.now()) & ~Q(status=Task.Status.DONE)
+        return queryset.filter(overdue) if value else queryset.exclude(overdue)
+
+    def filter_due_within(self, queryset, name, value):
+        now = timezone.now()
+        return queryset.filter(
+            deadline__gte=now, deadline__lt=now + timedelta(days=float(value))
+        ).exclude(status=Task.Status.DONE)
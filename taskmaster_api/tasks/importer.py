@@ -0,0 +1,328 @@
+"""
+Chunked bulk import of tasks from CSV / NDJSON.
+
+The file is read as a stream of rows. Each batch of rows is validated
+together: the assignees of the whole batch are resolved with one query. The
+valid rows are then inserted with one bulk_create() in a transaction that
+also advances the import's `rows_processed`. A failed or interrupted import
+picks up after the last committed batch, and the counters double as its
+progress report.
+
+The columns are those of the export (tasks/export.py), so an export can be
+imported into another project as is. Columns that only make sense in the
+source project (id, project, author, order, timestamps) are ignored.
+"""
+
+import codecs
+import csv
+import json
+import time
+from datetime import datetime, time as dt_time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from projects.models import ProjectMembership
+from .activity import acting_as, batched_activity, record
+from .export import unescape_formula
+from .models import Task, TaskActivity, TaskImport
+from .reminders import reminder_time
+from .stats import invalidate_project_stats
+
+TITLE_MAX_LENGTH = Task._meta.get_field("title").max_length
+
+
+def _aliases(choices):
+    # Accepts both the stored value and the label, in any case:
+    # "IN_PROGRESS", "in progress", "H", "high".
+    aliases = {}
+    for value, label in choices:
+        aliases[value.lower()] = value
+        aliases[label.lower()] = value
+        aliases[value.lower().replace("_", " ")] = value
+    return aliases
+
+
+STATUSES = _aliases(Task.Status.choices)
+PRIORITIES = _aliases(Task.Priority.choices)
+
+
+def format_for(filename):
+    """
+    Guesses the file format from a file name; None when it can't.
+    """
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return TaskImport.Format.CSV
+    if name.endswith((".ndjson", ".jsonl")):
+        return TaskImport.Format.NDJSON
+    return None
+
+
+def read_rows(stream, file_format):
+    """
+    Yields (row number, row) for each row of a binary stream, numbered from
+    1 (CSV rows after the header). A row that can't be parsed comes through
+    as a ValueError in place of the row.
+    """
+    text = codecs.getreader("utf-8-sig")(stream)
+    if file_format == TaskImport.Format.CSV:
+        for number, row in enumerate(csv.DictReader(text), 1):
+            # Undoes the export's protection against spreadsheet formulas.
+            yield number, {key: unescape_formula(value) for key, value in row.items()}
+        return
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, ValueError(f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield number, ValueError("Expected a JSON object.")
+            continue
+        yield number, row
+
+
+def _text(row, column):
+    value = row.get(column)
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def parse_deadline(value):
+    """
+    Reads an ISO 8601 date-time, or a date (due at the end of that day).
+    Naive values are in the current time zone.
+    """
+    deadline = parse_datetime(value)
+    if deadline is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError("Enter a valid date or date-time.")
+        deadline = datetime.combine(day, dt_time(23, 59, 59))
+    if timezone.is_naive(deadline):
+        deadline = timezone.make_aware(deadline)
+    return deadline
+
+
+def resolve_assignees(project_id, rows):
+    """
+    Maps the emails and usernames in the batch's assignee column to member
+    ids, with one query. Keys are lowercased; stored emails already are.
+    """
+    emails, usernames = set(), set()
+    for row in rows:
+        assignee = _text(row, "assignee").lower()
+        if assignee:
+            (emails if "@" in assignee else usernames).add(assignee)
+    if not emails and not usernames:
+        return {}
+    members = (
+        ProjectMembership.objects.filter(project_id=project_id)
+        .annotate(username_lower=Lower("user__username"))
+        .filter(Q(user__email__in=emails) | Q(username_lower__in=usernames))
+    )
+    resolved = {}
+    for user_id, email, username in members.values_list(
+        "user_id", "user__email", "username_lower"
+    ):
+        resolved[email] = user_id
+        resolved[username] = user_id
+    return resolved
+
+
+def build_task(task_import, row, assignees, next_order):
+    """
+    Validates one row and returns an unsaved Task, or raises ValueError with
+    a {column: [message]} dict.
+    """
+    if isinstance(row, ValueError):
+        raise ValueError({"row": [str(row)]})
+    errors = {}
+
+    title = _text(row, "title")
+    if not title:
+        errors["title"] = ["This field is required."]
+    elif len(title) > TITLE_MAX_LENGTH:
+        errors["title"] = [
+            f"Ensure this field has no more than {TITLE_MAX_LENGTH} characters."
+        ]
+
+    status = Task.Status.TODO
+    if value := _text(row, "status"):
+        status = STATUSES.get(value.lower())
+        if status is None:
+            errors["status"] = [f'"{value}" is not a valid status.']
+
+    priority = None
+    if value := _text(row, "priority"):
+        priority = PRIORITIES.get(value.lower())
+        if priority is None:
+            errors["priority"] = [f'"{value}" is not a valid priority.']
+
+    assignee_id = None
+    if value := _text(row, "assignee"):
+        assignee_id = assignees.get(value.lower())
+        if assignee_id is None:
+            errors["assignee"] = [f'"{value}" is not a member of this project.']
+
+    deadline = None
+    if value := _text(row, "deadline"):
+        try:
+            deadline = parse_deadline(value)
+        except ValueError as exc:
+            errors["deadline"] = [str(exc)]
+
+    if errors:
+        raise ValueError(errors)
+    task = Task(
+        title=title,
+        description=_text(row, "description") or None,
+        status=status,
+        priority=priority,
+        assignee_id=assignee_id,
+        author_id=task_import.user_id,
+        project_id=task_import.project_id,
+        order=next_order[status],
+        deadline=deadline,
+        # bulk_create() skips save(), which keeps this in sync otherwise.
+        reminder_at=reminder_time(deadline, status),
+    )
+    next_order[status] += 1
+    return task
+
+
+def import_batch(task_import, batch, next_order):
+    """
+    Validates and inserts one batch of (row number, row) in one transaction,
+    together with the import's counters, so the rows are committed exactly
+    once.
+    """
+    rows = [row for _, row in batch if not isinstance(row, ValueError)]
+    assignees = resolve_assignees(task_import.project_id, rows)
+    tasks, errors = [], []
+    for number, row in batch:
+        try:
+            tasks.append(build_task(task_import, row, assignees, next_order))
+        except ValueError as exc:
+            errors.append({"row": number, "errors": exc.args[0]})
+
+    with transaction.atomic(), acting_as(task_import.user), batched_activity():
+        Task.objects.bulk_create(tasks)
+        for task in tasks:
+            record(task, TaskActivity.Action.CREATE)
+        task_import.rows_processed = batch[-1][0]
+        task_import.rows_imported += len(tasks)
+        task_import.rows_failed += len(errors)
+        room = settings.TASK_IMPORT_MAX_ERRORS - len(task_import.errors)
+        task_import.errors.extend(errors[: max(room, 0)])
+        task_import.save(
+            update_fields=["rows_processed", "rows_imported", "rows_failed", "errors"]
+        )
+        if tasks:
+            invalidate_project_stats(task_import.project_id)
+
+
+def _next_order(project_id):
+    # New tasks go to the end of their column, in file order.
+    last = dict(
+        Task.objects.filter(project_id=project_id)
+        .order_by()
+        .values_list("status")
+        .annotate(Max("order"))
+    )
+    return {
+        status: (last[status] + 1 if last.get(status) is not None else 0)
+        for status in Task.Status.values
+    }
+
+
+def run_import(task_import, stream, batch_size=None, time_budget=None, progress=None):
+    """
+    Imports the rows of `stream` past `task_import.rows_processed` until the
+    file ends or `time_budget` seconds have passed, calling
+    `progress(task_import)` after each batch. Returns True once the whole
+    file has been imported.
+    """
+    if task_import.status == TaskImport.Status.DONE:
+        return True
+    batch_size = batch_size or settings.TASK_IMPORT_BATCH_SIZE
+    if task_import.status != TaskImport.Status.RUNNING:
+        task_import.status = TaskImport.Status.RUNNING
+        task_import.last_error = ""
+        task_import.save(update_fields=["status", "last_error"])
+
+    started = time.monotonic()
+    next_order = _next_order(task_import.project_id)
+    batch = []
+    for number, row in read_rows(stream, task_import.file_format):
+        if number <= task_import.rows_processed:
+            continue
+        batch.append((number, row))
+        if len(batch) < batch_size:
+            continue
+        import_batch(task_import, batch, next_order)
+        batch = []
+        if progress:
+            progress(task_import)
+        if time_budget is not None and time.monotonic() - started >= time_budget:
+            return False
+    if batch:
+        import_batch(task_import, batch, next_order)
+        if progress:
+            progress(task_import)
+
+    task_import.status = TaskImport.Status.DONE
+    task_import.finished_at = timezone.now()
+    task_import.save(update_fields=["status", "finished_at"])
+    return True
+
+
+def release_upload(task_import):
+    """
+    Drops the uploaded file of a finished import. Uploads are stored by
+    content, so the blob is only deleted when no other import still needs
+    it; `gc_media` collects whatever is left behind.
+    """
+    name = task_import.file.name
+    if not name:
+        return
+    storage = task_import.file.storage
+    TaskImport.objects.filter(pk=task_import.pk).update(file="")
+    task_import.file = ""
+    if not TaskImport.objects.filter(file=name).exists():
+        storage.delete(name)
+
+
+def open_upload(task_import):
+    """
+    Opens the uploaded file for reading in binary mode.
+    """
+    task_import.file.open("rb")
+    return task_import.file
+
+
+def schedule_import(project, user, upload, file_format):
+    """
+    Stores an uploaded file and queues its import.
+    """
+    from .jobs import import_tasks
+
+    with transaction.atomic():
+        task_import = TaskImport(
+            project=project,
+            user=user,
+            source=upload.name,
+            file_format=file_format,
+        )
+        task_import.file.save(upload.name, upload, save=False)
+        task_import.save()
+        import_tasks.enqueue(import_id=task_import.pk)
+    return task_import
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core import mail
+from django.utils import timezone
+
+from jobs.registry import job
+from .models import TaskImport, TaskReminder
+
+
+def reminder_message(reminder):
+    task = reminder.task
+    deadline = timezone.localtime(reminder.deadline).strftime("%Y-%m-%d %H:%M %Z")
+    lines = [f'"{task.title}" is due on {deadline}.']
+    if task.project_id:
+        lines.append(f"Project: {task.project.title}")
+    return mail.EmailMessage(
+        subject=f"Reminder: {task.title} is due soon",
+        body="\n".join(lines),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[reminder.recipient.email],
+    )
+
+
+@job("tasks.send_reminders")
+def send_task_reminders(reminder_ids):
+    """
+    Emails a batch of deadline reminders over one mail connection.
+
+    Each reminder is marked as sent right after its email, so a retry after
+    a failure only sends the ones that didn't go out.
+    """
+    reminders = (
+        TaskReminder.objects.filter(id__in=reminder_ids, sent_at__isnull=True)
+        .select_related("task__project", "recipient")
+        .order_by("id")
+    )
+    with mail.get_connection() as connection:
+        for reminder in reminders:
+            project = reminder.task.project
+            # Tasks of a deleted project stay around until it is purged.
+            if reminder.recipient.email and not (project and project.deleted_at):
+                connection.send_messages([reminder_message(reminder)])
+            TaskReminder.objects.filter(pk=reminder.pk).update(sent_at=timezone.now())
+
+
+@job("tasks.import_tasks", max_attempts=5)
+def import_tasks(import_id):
+    """
+    Imports an uploaded file for a few minutes at a time, then queues its
+    continuation. A failed attempt is recorded on the import and retried
+    from the last committed batch.
+    """
+    from .importer import open_upload, release_upload, run_import
+
+    task_import = TaskImport.objects.filter(pk=import_id).first()
+    if task_import is None:
+        return
+    if task_import.status == TaskImport.Status.DONE:
+        release_upload(task_import)
+        return
+    try:
+        with open_upload(task_import) as stream:
+            done = run_import(
+                task_import, stream, time_budget=settings.TASK_IMPORT_JOB_SECONDS
+            )
+    except Exception as exc:
+        TaskImport.objects.filter(pk=import_id).update(
+            status=TaskImport.Status.FAILED, last_error=repr(exc)
+        )
+        raise
+    if done:
+        # The rows are in the task table now.
+        release_upload(task_import)
+    else:
+        import_tasks.enqueue(import_id=import_id)
@@ -0,0 +1,69 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tasks.archive import archivable_tasks, archive_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves DONE tasks that haven't changed for a while into the archive "
+        "table, in small batches, so it can run while the app is serving "
+        "traffic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=float,
+            default=settings.TASK_ARCHIVE_AFTER.total_seconds() / 86400,
+            help="Archive DONE tasks last updated before this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Tasks moved per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.05,
+            help="Seconds to pause between batches to let other writers in.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the tasks that would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        if options["dry_run"]:
+            count = archivable_tasks(cutoff).count()
+            self.stdout.write(f"{count} task(s) would be archived")
+            return
+
+        started = time.monotonic()
+        total = 0
+        while True:
+            moved = archive_batch(cutoff, batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+            time.sleep(options["sleep"])
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {total} task(s) in {elapsed:.2f}s ({rate:.0f} tasks/s)."
+            )
+        )
@@ -0,0 +1,129 @@
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.models import Project
+from tasks.importer import format_for, run_import
+from tasks.models import TaskImport
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports tasks into a project from a local CSV or NDJSON file, in "
+        "batches. An interrupted import can be resumed with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The CSV or NDJSON file to import.")
+        parser.add_argument("--project", type=int, help="The project's id.")
+        parser.add_argument(
+            "--user",
+            help="Username of the member the tasks are created by.",
+        )
+        parser.add_argument(
+            "--file-format",
+            choices=TaskImport.Format.values,
+            help="Defaults to the file's extension.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TASK_IMPORT_BATCH_SIZE,
+            help="Rows validated and inserted per transaction.",
+        )
+        parser.add_argument(
+            "--resume",
+            type=int,
+            metavar="IMPORT_ID",
+            help="Continue an earlier import of the same file after its last "
+            "committed batch.",
+        )
+
+    def get_import(self, options):
+        if options["resume"]:
+            try:
+                return TaskImport.objects.get(pk=options["resume"])
+            except TaskImport.DoesNotExist:
+                raise CommandError(f"Import {options['resume']} does not exist.")
+
+        if not options["project"] or not options["user"]:
+            raise CommandError("--project and --user are required for a new import.")
+        try:
+            project = Project.objects.get(pk=options["project"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project {options['project']} does not exist.")
+        try:
+            user = get_user_model().objects.get(username=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']!r} does not exist.")
+        if not project.members.filter(pk=user.pk).exists():
+            raise CommandError(f"{user.username} is not a member of the project.")
+
+        file_format = options["file_format"] or format_for(options["path"])
+        if file_format is None:
+            raise CommandError("Can't tell the file's format; pass --file-format.")
+        return TaskImport.objects.create(
+            project=project,
+            user=user,
+            source=os.path.basename(options["path"]),
+            file_format=file_format,
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        try:
+            stream = open(options["path"], "rb")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with stream:
+            task_import = self.get_import(options)
+            self.stdout.write(
+                f"Import {task_import.pk}: {task_import.source} into project "
+                f"{task_import.project_id}"
+            )
+            started = time.monotonic()
+            skipped = task_import.rows_processed
+
+            def progress(task_import):
+                elapsed = time.monotonic() - started
+                rate = (task_import.rows_processed - skipped) / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"  row {task_import.rows_processed}: "
+                    f"{task_import.rows_imported} imported, "
+                    f"{task_import.rows_failed} failed ({rate:.0f} rows/s)"
+                )
+
+            try:
+                run_import(
+                    task_import, stream, options["batch_size"], progress=progress
+                )
+            except Exception as exc:
+                TaskImport.objects.filter(pk=task_import.pk).update(
+                    status=TaskImport.Status.FAILED, last_error=repr(exc)
+                )
+                raise CommandError(
+                    f"Import failed after row {task_import.rows_processed}: {exc!r}. "
+                    f"Continue with --resume {task_import.pk}."
+                )
+
+        elapsed = time.monotonic() - started
+        rows = task_import.rows_processed - skipped
+        rate = rows / elapsed if elapsed else 0
+        for error in task_import.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"  row {error['row']}: {error['errors']}"))
+        if task_import.rows_failed > 20:
+            self.stdout.write(
+                f"  ... see /api/task-imports/{task_import.pk}/ for the full report."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {task_import.rows_imported} task(s), "
+                f"{task_import.rows_failed} row(s) failed, in {elapsed:.2f}s "
+                f"({rate:.0f} rows/s)."
+            )
+        )
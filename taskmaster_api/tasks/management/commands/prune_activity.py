@@ -0,0 +1,125 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.models import TaskActivity
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes task activity past its retention period and compacts older "
+        "history by dropping reorder-only entries, in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            default=settings.TASK_ACTIVITY_RETENTION.total_seconds() / 86400,
+            help="Delete all entries older than this.",
+        )
+        parser.add_argument(
+            "--compact-after-days",
+            type=float,
+            default=settings.TASK_ACTIVITY_COMPACT_AFTER.total_seconds() / 86400,
+            help="Drop reorder-only entries older than this.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.05,
+            help="Seconds to pause between batches to let other writers in.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        now = timezone.now()
+        expired = TaskActivity.objects.filter(
+            created_at__lt=now - timedelta(days=options["retention_days"])
+        )
+        compact_before = now - timedelta(days=options["compact_after_days"])
+        compactable = TaskActivity.objects.filter(
+            action=TaskActivity.Action.REORDER, created_at__lt=compact_before
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"expired: {expired.count()} row(s) would be deleted")
+            self.stdout.write(
+                f"compacted: {compactable.count()} row(s) would be deleted"
+            )
+            return
+
+        started = time.monotonic()
+        # Expired rows are a prefix of the created_at index, and deleted rows
+        # leave it, so every batch starts where the previous one ended.
+        deleted = self.delete_in_batches(lambda last_pk: expired, options)
+        self.stdout.write(f"expired: deleted {deleted} row(s)")
+
+        # The entries kept by compaction would be read again by every batch,
+        # so walk the primary key instead, up to the newest compactable id
+        # (ids grow with created_at).
+        boundary = (
+            TaskActivity.objects.filter(created_at__lt=compact_before)
+            .order_by("-created_at")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        compacted = 0
+        if boundary is not None:
+            compacted = self.delete_in_batches(
+                lambda last_pk: TaskActivity.objects.filter(
+                    pk__gt=last_pk,
+                    pk__lte=boundary,
+                    action=TaskActivity.Action.REORDER,
+                ).order_by("pk"),
+                options,
+            )
+        self.stdout.write(f"compacted: deleted {compacted} row(s)")
+        total = deleted + compacted
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {total} activity row(s) in {elapsed:.2f}s ({rate:.0f} rows/s)."
+            )
+        )
+
+    def delete_in_batches(self, batch_rows, options):
+        """
+        Deletes `batch_rows(last_pk)` batch by batch, where `last_pk` is the
+        highest id handled so far.
+        """
+        batch_size = options["batch_size"]
+        deleted = 0
+        last_pk = 0
+        while True:
+            ids = list(batch_rows(last_pk).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                count, _ = TaskActivity.objects.filter(pk__in=ids).delete()
+            deleted += count
+            last_pk = max(ids)
+            if len(ids) < batch_size:
+                break
+            time.sleep(options["sleep"])
+        return deleted
@@ -0,0 +1,90 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from jobs.worker import StopFlag
+from tasks.reminders import due_reminders, schedule_due_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Reminds assignees of upcoming task deadlines. Every tick only reads "
+        "the tasks whose reminder is due, through the reminder_at index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="Seconds between two ticks.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Reminders scheduled per transaction.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run a single tick and exit.",
+        )
+        parser.add_argument(
+            "--inline",
+            action="store_true",
+            help="Send the emails from this process instead of queueing a job.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the reminders that are due.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        if options["dry_run"]:
+            self.stdout.write(f"{due_reminders().count()} reminder(s) are due.")
+            return
+
+        if options["once"]:
+            self.tick(options)
+            return
+
+        stopping = StopFlag()
+        signal.signal(signal.SIGINT, lambda *args: stopping.set())
+        signal.signal(signal.SIGTERM, lambda *args: stopping.set())
+        self.stdout.write("Sending reminders. Press Ctrl-C to stop.")
+        while not stopping.is_set():
+            close_old_connections()
+            self.tick(options)
+            stopping.wait(options["interval"])
+
+    def tick(self, options):
+        now = timezone.now()
+        started = time.monotonic()
+        total = 0
+        while True:
+            total += len(
+                schedule_due_reminders(
+                    now, batch_size=options["batch_size"], inline=options["inline"]
+                )
+            )
+            # A batch can come back empty when all its tasks were finished in
+            # the meantime, so ask the index whether anything is left.
+            if not due_reminders(now).exists():
+                break
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        verb = "Sent" if options["inline"] else "Queued"
+        self.stdout.write(
+            f"[{time.strftime('%H:%M:%S')}] {verb} {total} reminder(s) "
+            f"in {elapsed:.2f}s ({rate:.0f} reminders/s)."
+        )
+        return total
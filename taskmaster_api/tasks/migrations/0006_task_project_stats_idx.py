@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_initial'),
+        ('tasks', '0005_task_assignee'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'priority', 'assignee', 'deadline'], name='task_project_stats_idx'),
+        ),
+    ]
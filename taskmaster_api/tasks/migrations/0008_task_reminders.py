@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_reminder_at(apps, schema_editor):
+    # Open tasks with an upcoming deadline get their reminder; the ones due
+    # within the lead time are reminded on the first tick.
+    Task = apps.get_model("tasks", "Task")
+    now = timezone.now()
+    lead = settings.TASK_REMINDER_LEAD_TIME
+    upcoming = Task.objects.filter(deadline__gt=now).exclude(status="DONE")
+    upcoming.filter(deadline__gt=now + lead).update(reminder_at=F("deadline") - lead)
+    upcoming.filter(deadline__lte=now + lead).update(reminder_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_initial'),
+        ('tasks', '0007_task_deadline_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deadline', models.DateTimeField()),
+                ('batch', models.CharField(max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='reminder_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_reminder_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('reminder_at__isnull', False)), fields=['reminder_at'], name='task_reminder_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_reminders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='tasks.task'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskreminder',
+            constraint=models.UniqueConstraint(fields=('task', 'deadline'), name='task_reminder_once'),
+        ),
+    ]
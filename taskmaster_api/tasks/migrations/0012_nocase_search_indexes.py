@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:46
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_nocase_search_indexes'),
+        ('tasks', '0011_task_import'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(django.db.models.functions.comparison.Collate('title', 'NOCASE'), name='task_title_nocase_idx'),
+        ),
+    ]
@@ -1,9 +1,24 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Collate
 from django.contrib.auth import get_user_model
 
 from projects.models import Project
 
 
+# Task attribute -> name used in the activity log's `changes`.
+TRACKED_FIELDS = {
+    "title": "title",
+    "description": "description",
+    "status": "status",
+    "priority": "priority",
+    "assignee_id": "assignee",
+    "project_id": "project",
+    "deadline": "deadline",
+    "order": "order",
+}
+
+
 # Create your models here.
 class Task(models.Model):
     User = get_user_model()
@@ -46,14 +61,287 @@ class Task(models.Model):
         Project, on_delete=models.CASCADE, related_name="tasks", null=True, blank=True
     )
     deadline = models.DateTimeField(
-        blank=True, null=True, help_text="The date and time the task is due."
+        blank=True,
+        null=True,
+        db_index=True,
+        help_text="The date and time the task is due.",
     )
+    # When `manage.py send_reminders` should remind the assignee of the
+    # deadline; cleared once the reminder is scheduled. Kept in sync with the
+    # deadline and status by save().
+    reminder_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the task was loaded with: the activity log diffs the
+        # next save() against it, moving the task to another project must
+        # refresh the old project's statistics too, and unrelated edits must
+        # not re-arm a reminder that was already sent.
+        loaded = instance.__dict__
+        instance._loaded_values = {
+            attname: loaded[attname] for attname in TRACKED_FIELDS if attname in loaded
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        from .activity import classify, diff, record
+        from .reminders import reminder_time
+        from .stats import invalidate_project_stats
+
+        adding = self._state.adding
+        loaded = getattr(self, "_loaded_values", None)
+        update_fields = kwargs.get("update_fields")
+        if loaded is None or (self.deadline, self.status) != (
+            loaded.get("deadline"),
+            loaded.get("status"),
+        ):
+            self.reminder_at = reminder_time(self.deadline, self.status)
+            if update_fields is not None and "reminder_at" not in update_fields:
+                kwargs["update_fields"] = [*update_fields, "reminder_at"]
+        super().save(*args, **kwargs)
+
+        current = self.__dict__  # deferred fields stay unloaded
+        saved = {
+            attname: current[attname] for attname in TRACKED_FIELDS if attname in current
+        }
+        if update_fields is not None:
+            names = set(update_fields)
+            saved = {
+                attname: value
+                for attname, value in saved.items()
+                if attname in names or TRACKED_FIELDS[attname] in names
+            }
+        if adding:
+            record(
+                self,
+                TaskActivity.Action.CREATE,
+                {
+                    TRACKED_FIELDS[attname]: [None, value]
+                    for attname, value in saved.items()
+                    if value not in (None, "")
+                },
+            )
+        elif loaded is not None:
+            changes = diff(loaded, saved)
+            if changes:
+                record(self, classify(changes), changes)
+
+        invalidate_project_stats(
+            self.project_id, loaded.get("project_id") if loaded else None
+        )
+        self._loaded_values = {**(loaded or {}), **saved}
+
+    def delete(self, *args, **kwargs):
+        from .activity import record
+        from .stats import invalidate_project_stats
+
+        invalidate_project_stats(self.project_id)
+        record(self, TaskActivity.Action.DELETE)
+        return super().delete(*args, **kwargs)
+
     class Meta:
         # ordering = ["-created_at"]
         ordering = ["order"]
+        indexes = [
+            # Covers the grouped aggregate in tasks/stats.py, which then never
+            # touches the table rows.
+            models.Index(
+                fields=["project", "status", "priority", "assignee", "deadline"],
+                name="task_project_stats_idx",
+            ),
+            # Deadline ranges on a project board.
+            models.Index(fields=["project", "deadline"], name="task_project_deadline_idx"),
+            # The archiver's scan for long-finished tasks.
+            models.Index(fields=["status", "updated_at"], name="task_status_updated_idx"),
+            # The reminder scheduler's due scan. Partial, so it only holds
+            # the tasks still waiting for their reminder.
+            models.Index(
+                fields=["reminder_at"],
+                name="task_reminder_due_idx",
+                condition=models.Q(reminder_at__isnull=False),
+            ),
+            # Case-insensitive prefix search (title__istartswith, the
+            # admin's "^title"): SQLite's LIKE only seeks NOCASE indexes.
+            models.Index(Collate("title", "NOCASE"), name="task_title_nocase_idx"),
+        ]
+
+
+class TaskReminder(models.Model):
+    """
+    One deadline reminder. The unique (task, deadline) pair is what makes the
+    scheduler idempotent: a task is reminded at most once per deadline, even
+    if two schedulers pick it up at the same time.
+    """
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="reminders")
+    deadline = models.DateTimeField()
+    recipient = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="task_reminders"
+    )
+    # Random token of the scheduler tick that created the row.
+    batch = models.CharField(max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Reminder for task {self.task_id} due {self.deadline}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task", "deadline"], name="task_reminder_once"
+            ),
+        ]
+
+
+class TaskActivity(models.Model):
+    """
+    Append-only history of task changes. `changes` maps each changed field
+    to its [old, new] values. Entries outlive their task (and project), so
+    the foreign keys to them have no database constraint.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = "CREATE", "Created"
+        UPDATE = "UPDATE", "Updated"
+        STATUS = "STATUS", "Status changed"
+        REORDER = "REORDER", "Reordered"
+        DELETE = "DELETE", "Deleted"
+        ARCHIVE = "ARCHIVE", "Archived"
+        RESTORE = "RESTORE", "Restored"
+
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,  # covered by activity_task_feed_idx
+        related_name="activity",
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,  # covered by activity_project_feed_idx
+        null=True,
+        blank=True,
+        related_name="task_activity",
+    )
+    actor = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="task_activity",
+    )
+    action = models.CharField(max_length=10, choices=Action.choices)
+    # The title at the time, so deleted tasks still read well in the feed.
+    task_title = models.CharField(max_length=255)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.get_action_display()} task {self.task_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Task activity is append-only.")
+        super().save(*args, **kwargs)
+
+    class Meta:
+        # The feeds page by id, newest first: each page is one range read of
+        # one of these indexes.
+        indexes = [
+            models.Index(fields=["project", "id"], name="activity_project_feed_idx"),
+            models.Index(fields=["task", "id"], name="activity_task_feed_idx"),
+        ]
+
+
+class ArchivedTask(models.Model):
+    """
+    A finished task moved out of the live table by `manage.py archive_tasks`
+    (see tasks/archive.py). It keeps its id, so restoring it brings back the
+    same task, and its activity history stays attached.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Task.Status.choices)
+    priority = models.CharField(
+        max_length=1, choices=Task.Priority.choices, null=True, blank=True
+    )
+    assignee = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_assigned_tasks",
+    )
+    order = models.PositiveIntegerField(default=0)
+    author = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="archived_tasks"
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name="archived_tasks",
+        null=True,
+        blank=True,
+    )
+    deadline = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
+
+class TaskImport(models.Model):
+    """
+    A bulk import of tasks into a project (see tasks/importer.py). Rows are
+    committed in batches together with `rows_processed`, which is where a
+    failed or interrupted import resumes.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        NDJSON = "ndjson", "NDJSON"
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="task_imports"
+    )
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="task_imports"
+    )
+    # The uploaded file; imports run by `manage.py import_tasks` read a local
+    # file instead and only record its name.
+    file = models.FileField(upload_to="imports/", blank=True)
+    source = models.CharField(max_length=255, blank=True)
+    file_format = models.CharField(max_length=10, choices=Format.choices)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    # [{"row": n, "errors": {...}}], capped at TASK_IMPORT_MAX_ERRORS.
+    errors = models.JSONField(default=list, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import of {self.source or self.file.name} ({self.get_status_display()})"
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class TaskPagination(PageNumberPagination):
@@ -29,3 +29,27 @@ class TaskPagination(PageNumberPagination):
 
         # Otherwise, perform the default pagination behavior.
         return super().paginate_queryset(queryset, request, view)
+
+
+class ActivityPagination(CursorPagination):
+    """
+    Keyset pagination for the activity feeds: each page continues below the
+    last id of the previous one, so deep pages cost the same as the first.
+    """
+
+    ordering = "-id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class ArchivePagination(CursorPagination):
+    """
+    Keyset pagination for archived tasks, most recently archived first. An
+    archive only grows, so page numbers (and their COUNT(*)) are avoided.
+    """
+
+    ordering = "-archived_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
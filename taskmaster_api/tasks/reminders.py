@@ -0,0 +1,92 @@
+"""
+Deadline reminders.
+
+Every task with an upcoming deadline carries a `reminder_at` timestamp
+(deadline minus TASK_REMINDER_LEAD_TIME) in a partial index, so a scheduler
+tick is one index range read over the reminders that are due, however large
+the task table is. Each due task gets a TaskReminder row, its `reminder_at`
+is cleared, and the emails are sent by a background job.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task, TaskReminder
+
+
+def reminder_time(deadline, status, now=None):
+    """
+    When a task with this deadline and status should be reminded, or None.
+    A deadline closer than the lead time is reminded right away.
+    """
+    now = now or timezone.now()
+    if deadline is None or status == Task.Status.DONE or deadline <= now:
+        return None
+    return max(deadline - settings.TASK_REMINDER_LEAD_TIME, now)
+
+
+def due_reminders(now=None):
+    return Task.objects.filter(reminder_at__lte=now or timezone.now()).order_by(
+        "reminder_at"
+    )
+
+
+def schedule_due_reminders(now=None, batch_size=500, inline=False):
+    """
+    Turns the tasks whose reminder is due into TaskReminder rows and queues
+    the job that emails them, or with `inline=True` sends them right away.
+    Returns the ids of the new reminders.
+
+    Safe to run concurrently and to re-run after a crash: the batch commits
+    as a whole, and the unique (task, deadline) constraint drops reminders
+    another scheduler already created.
+    """
+    from .jobs import send_task_reminders
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(
+            due_reminders(now).values(
+                "id", "deadline", "status", "assignee_id", "author_id"
+            )[:batch_size]
+        )
+        if not due:
+            return []
+
+        token = uuid.uuid4().hex
+        TaskReminder.objects.bulk_create(
+            [
+                TaskReminder(
+                    task_id=task["id"],
+                    deadline=task["deadline"],
+                    recipient_id=task["assignee_id"] or task["author_id"],
+                    batch=token,
+                )
+                # Bulk status updates (e.g. the board's reordering) don't go
+                # through save(), so a task may have been finished since.
+                for task in due
+                if task["deadline"] and task["status"] != Task.Status.DONE
+            ],
+            ignore_conflicts=True,
+        )
+        task_ids = [task["id"] for task in due]
+        # Only rows we inserted carry our token.
+        reminder_ids = list(
+            TaskReminder.objects.filter(task_id__in=task_ids, batch=token).values_list(
+                "id", flat=True
+            )
+        )
+        # The reminder_at check leaves tasks alone whose deadline was moved
+        # (and their reminder re-armed) since they were selected.
+        Task.objects.filter(id__in=task_ids, reminder_at__lte=now).update(
+            reminder_at=None
+        )
+        if reminder_ids and not inline:
+            send_task_reminders.enqueue(reminder_ids=reminder_ids)
+    if reminder_ids and inline:
+        send_task_reminders(reminder_ids=reminder_ids)
+    return reminder_ids
+
@@ -1,14 +1,16 @@
 from rest_framework import serializers
-from .models import Task
+from django.db.models import Prefetch
+from .models import ArchivedTask, Task, TaskActivity, TaskImport
+from core.fieldsets import Fieldset, SparseFieldsetSerializerMixin
 from users.serializers import UserSerializer
 from projects.models import Project
-from projects.serializers import ProjectSerializer
+from projects.serializers import ProjectSerializer, user_columns
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # By default, a read-only field will just return the author's ID.
     # This is a common and good approach.
     author = UserSerializer(read_only=True)
@@ -44,6 +46,49 @@ class TaskSerializer(serializers.ModelSerializer):
             "author",
             "created_at",
         ]
+        expandable_fields = {
+            "author": "author",
+            "assignee_details": "assignee",
+            "project_details": "project",
+        }
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fieldset=None):
+        """
+        Reads only the columns of the requested fields and joins only the
+        relations that are expanded. The project and author ids are always
+        loaded because the permission checks use them.
+        """
+        fieldset = fieldset or Fieldset()
+        columns = ["id", "project", "author"]
+        for name in (
+            "title",
+            "description",
+            "status",
+            "priority",
+            "order",
+            "deadline",
+            "created_at",
+        ):
+            if fieldset.includes(name):
+                columns.append(name)
+
+        if fieldset.expands("author"):
+            queryset = queryset.select_related("author")
+            columns += user_columns("author__")
+        if fieldset.includes("assignee_details"):
+            columns.append("assignee")
+            if fieldset.expands("assignee_details"):
+                queryset = queryset.select_related("assignee")
+                columns += user_columns("assignee__")
+        if fieldset.expands("project_details"):
+            # Prefetched rather than joined: a page of tasks usually shares a
+            # handful of projects, and their members are prefetched as well.
+            projects = ProjectSerializer.optimize_queryset(
+                Project.objects.all(), fieldset.nested("project_details")
+            )
+            queryset = queryset.prefetch_related(Prefetch("project", queryset=projects))
+        return queryset.only(*columns)
 
     def validate_project(self, project):
         """
@@ -80,3 +125,93 @@ class TaskOrderUpdateSerializer(serializers.Serializer):
         required=True,
         allow_empty=True,  # Don't allow empty lists
     )
+
+
+class MyTaskCountsSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    author = serializers.IntegerField(help_text="Tasks the user created.")
+    assignee = serializers.IntegerField(help_text="Tasks assigned to the user.")
+
+
+class CalendarFeedSerializer(serializers.Serializer):
+    url = serializers.URLField(read_only=True)
+
+
+class TaskActivitySerializer(serializers.ModelSerializer):
+    actor = UserSerializer(read_only=True)
+
+    class Meta:
+        model = TaskActivity
+        fields = [
+            "id",
+            "task",
+            "task_title",
+            "project",
+            "actor",
+            "action",
+            "changes",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTask
+        fields = [
+            "id",
+            "title",
+            "description",
+            "status",
+            "priority",
+            "assignee",
+            "author",
+            "project",
+            "order",
+            "deadline",
+            "created_at",
+            "updated_at",
+            "archived_at",
+        ]
+        read_only_fields = fields
+
+
+class TaskImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TaskImport
+        fields = [
+            "id",
+            "project",
+            "source",
+            "file_format",
+            "status",
+            "rows_processed",
+            "rows_imported",
+            "rows_failed",
+            "errors",
+            "last_error",
+            "created_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+class TaskImportUploadSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(
+        choices=TaskImport.Format.choices, required=False
+    )
+
+    def validate(self, attrs):
+        """
+        Without an explicit file_format, it is taken from the file name.
+        """
+        from .importer import format_for
+
+        if not attrs.get("file_format"):
+            attrs["file_format"] = format_for(attrs["file"].name)
+            if attrs["file_format"] is None:
+                raise serializers.ValidationError(
+                    {"file_format": ["Name the file .csv or .ndjson, or set file_format."]}
+                )
+        return attrs
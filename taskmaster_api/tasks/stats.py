@@ -0,0 +1,102 @@
+"""
+Per-project task statistics for the project dashboard.
+
+Everything comes from one aggregate over the project's tasks, grouped by
+(status, priority, assignee) and rolled up in Python, so the cost is one
+index range read however the counts are sliced. Results are cached per
+project; every task write invalidates them (see Task.save()/delete() and
+TaskOrderUpdateView), and a short timeout bounds how stale the time-based
+counts (overdue, due this week) can get.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Task
+
+CACHE_KEY = "project-stats:{}"
+
+
+def stats_cache_key(project_id):
+    return CACHE_KEY.format(project_id)
+
+
+def invalidate_project_stats(*project_ids):
+    """
+    Drops the cached statistics of the given projects once the current
+    transaction commits, so a concurrent request can't cache the old counts
+    again in between.
+    """
+    keys = [stats_cache_key(pk) for pk in set(project_ids) if pk is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def compute_project_stats(project_id):
+    now = timezone.now()
+    open_tasks = ~Q(status=Task.Status.DONE)
+    rows = (
+        Task.objects.filter(project_id=project_id)
+        .order_by()
+        .values("status", "priority", "assignee")
+        .annotate(
+            count=Count("id"),
+            overdue=Count("id", filter=open_tasks & Q(deadline__lt=now)),
+            due_this_week=Count(
+                "id",
+                filter=open_tasks
+                & Q(deadline__gte=now, deadline__lt=now + timedelta(days=7)),
+            ),
+            # One username per assignee; Max() keeps it out of the GROUP BY.
+            assignee_username=Max("assignee__username"),
+        )
+    )
+
+    by_status = {status: 0 for status in Task.Status.values}
+    by_priority = {priority: 0 for priority in Task.Priority.values}
+    by_priority["none"] = 0
+    by_assignee = {}
+    stats = {
+        "project": project_id,
+        "total": 0,
+        "overdue": 0,
+        "due_this_week": 0,
+        "unassigned": 0,
+    }
+    for row in rows:
+        count = row["count"]
+        stats["total"] += count
+        stats["overdue"] += row["overdue"]
+        stats["due_this_week"] += row["due_this_week"]
+        by_status[row["status"]] = by_status.get(row["status"], 0) + count
+        by_priority[row["priority"] or "none"] += count
+        if row["assignee"] is None:
+            stats["unassigned"] += count
+            continue
+        assignee = by_assignee.setdefault(
+            row["assignee"],
+            {"id": row["assignee"], "username": row["assignee_username"], "count": 0},
+        )
+        assignee["count"] += count
+
+    stats["by_status"] = by_status
+    stats["by_priority"] = by_priority
+    stats["by_assignee"] = sorted(
+        by_assignee.values(), key=lambda a: (-a["count"], a["username"])
+    )
+    stats["generated_at"] = now
+    return stats
+
+
+def project_stats(project_id):
+    key = stats_cache_key(project_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_project_stats(project_id)
+        cache.set(key, stats, settings.PROJECT_STATS_CACHE_TIMEOUT)
+    return stats
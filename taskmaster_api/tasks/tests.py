@@ -1,3 +1,790 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+from datetime import timedelta
+from io import BytesIO, StringIO
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.admin import LargeTablePaginator, estimated_count
+from core.testing import full_scans, queryset_plan, temp_btrees
+from jobs.worker import StopFlag, work
+from projects.models import Project, ProjectMembership
+from .importer import run_import
+from .jobs import import_tasks
+from .models import Task, TaskActivity, TaskImport
+from .reminders import due_reminders, schedule_due_reminders
+
+User = get_user_model()
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.owner)
+        for i in range(3):
+            Task.objects.create(
+                title=f"Task {i}",
+                description="A long description",
+                author=self.owner,
+                assignee=self.owner,
+                project=self.project,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_default_response_is_unchanged(self):
+        response = self.client.get("/api/tasks/?paginate=false")
+        task = response.data[0]
+        self.assertEqual(task["description"], "A long description")
+        self.assertEqual(task["author"]["username"], "owner")
+        self.assertEqual(task["project_details"]["task_count"], 3)
+        self.assertEqual(task["project_details"]["members"][0]["id"], self.owner.id)
+
+    def test_fields_and_expand(self):
+        response = self.client.get(
+            "/api/tasks/?paginate=false&fields=id,title,author,assignee_details"
+            "&expand=assignee_details"
+        )
+        task = response.data[0]
+        self.assertEqual(set(task), {"id", "title", "author", "assignee_details"})
+        self.assertEqual(task["author"], self.owner.id)
+        self.assertEqual(task["assignee_details"]["username"], "owner")
+
+    def test_nested_fields(self):
+        response = self.client.get(
+            "/api/tasks/?paginate=false&fields=id,project_details.title"
+        )
+        self.assertEqual(response.data[0]["project_details"], {"title": "Apollo"})
+
+    def test_unrequested_columns_and_joins_are_skipped(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/tasks/?paginate=false&fields=id,title&expand=")
+        task_query = next(
+            q["sql"] for q in queries if 'FROM "tasks_task"' in q["sql"]
+        )
+        self.assertNotIn('"description"', task_query)
+        self.assertNotIn("users_customuser", task_query)
+        self.assertEqual(len(queries), 1)
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/tasks/?paginate=false")
+        before = len(queries)
+        Task.objects.create(title="Another", author=self.owner, project=self.project)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/tasks/?paginate=false")
+        self.assertEqual(len(queries), before)
+
+
+class DeadlineFilterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        now = timezone.now()
+        self.late = Task.objects.create(
+            title="Late", author=self.user, deadline=now - timedelta(days=1)
+        )
+        self.done = Task.objects.create(
+            title="Done",
+            author=self.user,
+            status=Task.Status.DONE,
+            deadline=now - timedelta(days=1),
+        )
+        self.soon = Task.objects.create(
+            title="Soon", author=self.user, deadline=now + timedelta(days=2)
+        )
+        self.later = Task.objects.create(
+            title="Later", author=self.user, deadline=now + timedelta(days=30)
+        )
+        self.undated = Task.objects.create(title="Undated", author=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def titles(self, query):
+        response = self.client.get(f"/api/my-tasks/?paginate=false&{query}")
+        self.assertEqual(response.status_code, 200)
+        return {task["title"] for task in response.data}
+
+    def test_overdue(self):
+        self.assertEqual(self.titles("overdue=true"), {"Late"})
+        self.assertEqual(
+            self.titles("overdue=false"), {"Done", "Soon", "Later", "Undated"}
+        )
+
+    def test_due_within(self):
+        self.assertEqual(self.titles("due_within=7"), {"Soon"})
+
+    def test_deadline_range(self):
+        start = (timezone.now() + timedelta(days=1)).isoformat()
+        response = self.client.get(
+            "/api/tasks/", {"paginate": "false", "deadline__gte": start}
+        )
+        self.assertEqual({task["title"] for task in response.data}, {"Soon", "Later"})
+
+
+class MyTasksTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="me", email="me@example.com", password="s3cret-pass"
+        )
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="s3cret-pass"
+        )
+        # Authored, authored and assigned, assigned, and someone else's.
+        Task.objects.create(title="Mine", author=self.user)
+        Task.objects.create(title="Both", author=self.user, assignee=self.user)
+        Task.objects.create(
+            title="Given", author=self.other, assignee=self.user, status=Task.Status.DONE
+        )
+        Task.objects.create(title="Theirs", author=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def titles(self, query=""):
+        response = self.client.get(f"/api/my-tasks/?paginate=false&{query}")
+        self.assertEqual(response.status_code, 200)
+        return sorted(task["title"] for task in response.data)
+
+    def test_union_lists_each_task_once(self):
+        self.assertEqual(self.titles(), ["Both", "Given", "Mine"])
+        response = self.client.get("/api/my-tasks/?page_size=2")
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_role(self):
+        self.assertEqual(self.titles("role=author"), ["Both", "Mine"])
+        self.assertEqual(self.titles("role=assignee"), ["Both", "Given"])
+        self.assertEqual(self.client.get("/api/my-tasks/?role=owner").status_code, 400)
+
+    def test_counts(self):
+        response = self.client.get("/api/my-tasks/counts/")
+        self.assertEqual(response.data, {"total": 3, "author": 2, "assignee": 2})
+        response = self.client.get("/api/my-tasks/counts/?status=DONE")
+        self.assertEqual(response.data, {"total": 1, "author": 0, "assignee": 1})
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.admin)
+        self.authors = [
+            User.objects.create_user(
+                username=f"author{i}", email=f"author{i}@example.com", password="x"
+            )
+            for i in range(3)
+        ]
+        self.client.force_login(self.admin)
+
+    def add_tasks(self, count):
+        for i in range(count):
+            Task.objects.create(
+                title=f"Task {i}", author=self.authors[i % 3], project=self.project
+            )
+
+    def changelist_queries(self, url="/admin/tasks/task/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_tasks(2)
+        few, _ = self.changelist_queries()
+        self.add_tasks(20)
+        many, response = self.changelist_queries()
+        self.assertEqual(few, many)
+        self.assertContains(response, "Apollo")
+
+    def test_autocomplete_filter(self):
+        self.add_tasks(6)
+        author = self.authors[1]
+        _, response = self.changelist_queries(
+            f"/admin/tasks/task/?author__id__exact={author.id}"
+        )
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertContains(response, "admin-autocomplete")
+        # The selected author is the only option rendered.
+        self.assertContains(response, f'<option value="{author.id}" selected>')
+        self.assertNotContains(response, f'<option value="{self.authors[0].id}"')
+
+    def test_prefix_search_uses_index(self):
+        plan = queryset_plan(Task.objects.filter(title__istartswith="Tas"))
+        self.assertIn("task_title_nocase_idx", " ".join(plan))
+        self.add_tasks(3)
+        _, response = self.changelist_queries("/admin/tasks/task/?q=task+1")
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+    def test_paginator(self):
+        self.add_tasks(7)
+        tasks = Task.objects.order_by("-pk")
+        paginator = LargeTablePaginator(tasks, 3)
+        paginator.count_limit = 5
+        # No statistics yet: counted, up to the limit.
+        self.assertIsNone(estimated_count(tasks))
+        self.assertEqual(paginator.count, 5)
+        ids = list(tasks.values_list("pk", flat=True))
+        self.assertEqual([task.pk for task in paginator.page(2)], ids[3:6])
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        paginator = LargeTablePaginator(tasks, 3)
+        paginator.count_limit = 5
+        self.assertEqual(paginator.count, 7)
+        self.assertIsNone(estimated_count(tasks.filter(status="DONE")))
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.user)
+        Task.objects.create(
+            title="Launch, finally; really",
+            author=self.user,
+            project=self.project,
+            priority=Task.Priority.HIGH,
+            deadline=timezone.now() + timedelta(days=1),
+        )
+        Task.objects.create(title="No deadline", author=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        url = self.client.get("/api/calendar/").data["url"]
+        self.feed_path = url.removeprefix("http://testserver")
+        self.anonymous = APIClient()
+
+    def test_feed_streams_events(self):
+        response = self.anonymous.get(self.feed_path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertIn("SUMMARY:Launch\\, finally\; really\r\n", body)
+        self.assertIn("PRIORITY:1\r\n", body)
+        self.assertEqual(body.count("BEGIN:VEVENT"), 1)
+
+    def test_conditional_get(self):
+        response = self.anonymous.get(self.feed_path)
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.anonymous.get(
+                self.feed_path, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(len(queries), 2)  # token lookup and the aggregate
+
+        Task.objects.create(
+            title="New",
+            author=self.user,
+            project=self.project,
+            deadline=timezone.now(),
+        )
+        modified = self.anonymous.get(
+            self.feed_path, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(modified.status_code, 200)
+
+    def test_board_moves_change_the_etag(self):
+        etag = self.anonymous.get(self.feed_path)["ETag"]
+        task = Task.objects.get(title__startswith="Launch")
+        self.client.post(
+            "/api/tasks/update-order/",
+            {"status": "DONE", "ordered_ids": [task.id]},
+            format="json",
+        )
+        response = self.anonymous.get(self.feed_path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("CATEGORIES:DONE", b"".join(response.streaming_content).decode())
+
+    def test_removed_tasks_are_not_hidden_behind_if_modified_since(self):
+        response = self.anonymous.get(self.feed_path)
+        self.assertNotIn("Last-Modified", response)
+        Task.objects.get(title__startswith="Launch").delete()
+        # A removal doesn't move the latest updated_at, so only the ETag can
+        # tell the client that the feed changed.
+        response = self.anonymous.get(
+            self.feed_path,
+            HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("BEGIN:VEVENT", b"".join(response.streaming_content).decode())
+
+    def test_rotating_the_token_revokes_the_old_url(self):
+        self.client.post("/api/calendar/")
+        self.assertEqual(self.anonymous.get(self.feed_path).status_code, 404)
+
+
+class DeadlineReminderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.assignee = User.objects.create_user(
+            username="assignee", email="assignee@example.com", password="s3cret-pass"
+        )
+        now = timezone.now()
+        self.soon = Task.objects.create(
+            title="Soon",
+            author=self.user,
+            assignee=self.assignee,
+            deadline=now + timedelta(hours=2),
+        )
+        self.later = Task.objects.create(
+            title="Later", author=self.user, deadline=now + timedelta(days=5)
+        )
+        self.done = Task.objects.create(
+            title="Done",
+            author=self.user,
+            status=Task.Status.DONE,
+            deadline=now + timedelta(hours=2),
+        )
+
+    def test_reminder_at_follows_deadline_and_status(self):
+        self.assertEqual(
+            self.later.reminder_at,
+            self.later.deadline - settings.TASK_REMINDER_LEAD_TIME,
+        )
+        self.assertIsNone(self.done.reminder_at)
+        self.later.status = Task.Status.DONE
+        self.later.save(update_fields=["status"])
+        self.later.refresh_from_db()
+        self.assertIsNone(self.later.reminder_at)
+
+    def test_tick_reminds_each_task_once(self):
+        sent = schedule_due_reminders(inline=True)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["assignee@example.com"])
+        self.assertIn("Soon", mail.outbox[0].subject)
+
+        # Nothing is due any more, and unrelated edits don't re-arm it.
+        self.soon.refresh_from_db()
+        self.soon.title = "Soon, renamed"
+        self.soon.save()
+        self.assertEqual(schedule_due_reminders(inline=True), [])
+
+        # A second scheduler that read the task before it was claimed can't
+        # create a duplicate reminder.
+        Task.objects.filter(pk=self.soon.pk).update(reminder_at=timezone.now())
+        self.assertEqual(schedule_due_reminders(inline=True), [])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_moving_the_deadline_rearms_the_reminder(self):
+        schedule_due_reminders(inline=True)
+        self.soon.refresh_from_db()
+        self.soon.deadline += timedelta(hours=1)
+        self.soon.save()
+        self.assertEqual(len(schedule_due_reminders(inline=True)), 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_tick_only_reads_due_tasks(self):
+        plan = queryset_plan(due_reminders())
+        self.assertEqual(full_scans(plan), [])
+        self.assertEqual(temp_btrees(plan), [])
+        self.assertIn("task_reminder_due_idx", " ".join(plan))
+
+
+class ActivityLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tasks = [
+            self.client.post(
+                "/api/tasks/",
+                {"title": f"Task {i}", "project": self.project.id},
+                format="json",
+            ).data["id"]
+            for i in range(3)
+        ]
+
+    def feed(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_update_records_field_changes(self):
+        self.client.patch(
+            f"/api/tasks/{self.tasks[0]}/",
+            {"title": "Renamed", "priority": "H"},
+            format="json",
+        )
+        entry = self.feed(f"/api/tasks/{self.tasks[0]}/activity/")["results"][0]
+        self.assertEqual(entry["action"], "UPDATE")
+        self.assertEqual(
+            entry["changes"], {"title": ["Task 0", "Renamed"], "priority": [None, "H"]}
+        )
+        self.assertEqual(entry["actor"]["username"], "owner")
+
+    def test_reorder_is_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                "/api/tasks/update-order/",
+                {"status": "DONE", "ordered_ids": list(reversed(self.tasks))},
+                format="json",
+            )
+        inserts = [
+            q for q in queries if q["sql"].startswith('INSERT INTO "tasks_taskactivity"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        entry = self.feed(f"/api/tasks/{self.tasks[0]}/activity/")["results"][0]
+        self.assertEqual(entry["action"], "STATUS")
+        self.assertEqual(entry["changes"], {"status": ["TODO", "DONE"], "order": [0, 2]})
+
+    def test_project_feed_keeps_deleted_tasks_and_pages_by_keyset(self):
+        self.client.delete(f"/api/tasks/{self.tasks[1]}/")
+        url = f"/api/projects/{self.project.id}/activity/?page_size=2"
+        first = self.feed(url)
+        self.assertEqual(first["results"][0]["action"], "DELETE")
+        self.assertEqual(first["results"][0]["task_title"], "Task 1")
+        second = self.feed(first["next"])
+        ids = [entry["id"] for entry in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 4)
+
+    def test_prune_compacts_old_reorders(self):
+        self.client.post(
+            "/api/tasks/update-order/",
+            {"status": "TODO", "ordered_ids": list(reversed(self.tasks))},
+            format="json",
+        )
+        TaskActivity.objects.update(created_at=timezone.now() - timedelta(days=60))
+        call_command("prune_activity", sleep=0, stdout=StringIO())
+        self.assertEqual(
+            set(TaskActivity.objects.values_list("action", flat=True)), {"CREATE"}
+        )
+        call_command("prune_activity", retention_days=30, sleep=0, stdout=StringIO())
+        self.assertFalse(TaskActivity.objects.exists())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.user)
+        self.old_done = Task.objects.create(
+            title="Launch rehearsal",
+            author=self.user,
+            project=self.project,
+            status=Task.Status.DONE,
+        )
+        self.recent_done = Task.objects.create(
+            title="Recent", author=self.user, project=self.project, status=Task.Status.DONE
+        )
+        self.old_open = Task.objects.create(
+            title="Still open", author=self.user, project=self.project
+        )
+        long_ago = timezone.now() - timedelta(days=365)
+        Task.objects.filter(pk__in=[self.old_done.pk, self.old_open.pk]).update(
+            updated_at=long_ago, created_at=long_ago
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def archive(self):
+        call_command("archive_tasks", sleep=0, stdout=StringIO())
+
+    def test_only_old_finished_tasks_are_moved(self):
+        self.archive()
+        self.assertEqual(
+            set(Task.objects.values_list("title", flat=True)), {"Recent", "Still open"}
+        )
+        response = self.client.get("/api/archived-tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [task["id"] for task in response.data["results"]], [self.old_done.id]
+        )
+        self.assertEqual(
+            TaskActivity.objects.filter(task=self.old_done).latest("id").action,
+            "ARCHIVE",
+        )
+
+    def test_tasks_moved_to_done_on_the_board_are_not_archived_yet(self):
+        response = self.client.post(
+            "/api/tasks/update-order/",
+            {"status": "DONE", "ordered_ids": [self.old_open.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.old_open.refresh_from_db()
+        self.assertGreater(self.old_open.updated_at, timezone.now() - timedelta(minutes=1))
+        self.archive()
+        self.assertTrue(Task.objects.filter(pk=self.old_open.pk).exists())
+
+    def test_search(self):
+        self.archive()
+        self.assertEqual(
+            len(self.client.get("/api/archived-tasks/?search=rehearsal").data["results"]), 1
+        )
+        self.assertEqual(
+            len(self.client.get("/api/archived-tasks/?search=nothing").data["results"]), 0
+        )
+
+    def test_restore(self):
+        self.archive()
+        response = self.client.post(f"/api/archived-tasks/{self.old_done.id}/restore/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], self.old_done.id)
+        task = Task.objects.get(pk=self.old_done.pk)
+        self.assertLess(task.created_at, timezone.now() - timedelta(days=300))
+        self.assertGreater(task.updated_at, timezone.now() - timedelta(days=1))
+        self.assertFalse(self.client.get("/api/archived-tasks/").data["results"])
+
+    def test_other_users_cannot_see_or_restore(self):
+        self.archive()
+        outsider = User.objects.create_user(
+            username="outsider", email="outsider@example.com", password="s3cret-pass"
+        )
+        self.client.force_authenticate(outsider)
+        self.assertFalse(self.client.get("/api/archived-tasks/").data["results"])
+        response = self.client.post(f"/api/archived-tasks/{self.old_done.id}/restore/")
+        self.assertEqual(response.status_code, 404)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.user)
+        for i in range(3):
+            Task.objects.create(
+                title=f"Task {i}, quoted \"{i}\"",
+                author=self.user,
+                assignee=self.user if i == 0 else None,
+                project=self.project,
+                status=Task.Status.DONE if i == 2 else Task.Status.TODO,
+                deadline=timezone.now() + timedelta(days=i),
+            )
+        Task.objects.create(title="Not mine", author=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_project_csv(self):
+        response = self.client.get(f"/api/projects/{self.project.id}/export/")
+        self.assertIn("project-", response["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(self.body(response).decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["title"], 'Task 0, quoted "0"')
+        self.assertEqual(rows[0]["author"], "owner")
+        self.assertEqual(rows[0]["assignee"], "owner")
+        self.assertEqual(rows[1]["assignee"], "")
+
+    def test_csv_cells_cannot_run_as_formulas(self):
+        titles = ['=HYPERLINK("http://evil.test","x")', "@SUM(A1)", "-2+3", "'quoted"]
+        for title in titles:
+            Task.objects.create(
+                title=title,
+                description="=cmd|' /C calc'!A0",
+                author=self.user,
+                project=self.project,
+            )
+        response = self.client.get(f"/api/projects/{self.project.id}/export/")
+        body = self.body(response)
+        rows = list(csv.DictReader(StringIO(body.decode())))[3:]
+        self.assertEqual([row["title"] for row in rows], ["'" + t for t in titles])
+        self.assertEqual(rows[0]["description"], "'=cmd|' /C calc'!A0")
+
+        # The export still imports as is.
+        other = Project.objects.create(title="Gemini", owner=self.user)
+        task_import = TaskImport.objects.create(
+            project=other, user=self.user, file_format="csv"
+        )
+        self.assertTrue(run_import(task_import, BytesIO(body)))
+        imported = Task.objects.filter(project=other, title__in=titles)
+        self.assertEqual(
+            sorted(imported.values_list("title", flat=True)), sorted(titles)
+        )
+        self.assertEqual(imported.first().description, "=cmd|' /C calc'!A0")
+
+    def test_ndjson_with_filters(self):
+        response = self.client.get(
+            "/api/my-tasks/export/",
+            {"file_format": "ndjson", "status": "TODO", "assignee": self.user.id},
+        )
+        lines = self.body(response).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["title"], 'Task 0, quoted "0"')
+
+    def test_gzip(self):
+        response = self.client.get(
+            "/api/my-tasks/export/", HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        rows = gzip.decompress(self.body(response)).decode().splitlines()
+        self.assertEqual(len(rows), 4)  # header and my three tasks
+
+    def test_unknown_format(self):
+        response = self.client.get("/api/my-tasks/export/?file_format=xml")
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_members_cannot_export(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get(f"/api/projects/{self.project.id}/export/")
+        self.assertEqual(response.status_code, 404)
+
+
+class ImportTests(TestCase):
+    CSV = (
+        "title,status,priority,assignee,deadline\n"
+        "Write docs,in progress,High,Member@Example.com,2030-01-31\n"
+        ",TODO,,,\n"
+        "Ship it,DONE,L,member,2030-02-01T10:00:00Z\n"
+        "Bad status,WONTFIX,,,\n"
+        "Stranger,TODO,,other@example.com,soon\n"
+        "Plain,,,,\n"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="s3cret-pass"
+        )
+        self.member = User.objects.create_user(
+            username="member", email="member@example.com", password="s3cret-pass"
+        )
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.user)
+        ProjectMembership.objects.create(project=self.project, user=self.member)
+        Task.objects.create(title="Existing", author=self.user, project=self.project)
+
+    def new_import(self, file_format="csv"):
+        return TaskImport.objects.create(
+            project=self.project, user=self.user, file_format=file_format
+        )
+
+    def test_rows_and_error_report(self):
+        task_import = self.new_import()
+        self.assertTrue(run_import(task_import, BytesIO(self.CSV.encode())))
+
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.status, "done")
+        self.assertEqual(task_import.rows_processed, 6)
+        self.assertEqual(task_import.rows_imported, 3)
+        self.assertEqual(task_import.rows_failed, 3)
+        self.assertEqual(
+            [(error["row"], list(error["errors"])) for error in task_import.errors],
+            [(2, ["title"]), (4, ["status"]), (5, ["assignee", "deadline"])],
+        )
+
+        docs = Task.objects.get(title="Write docs")
+        self.assertEqual(docs.status, Task.Status.IN_PROGRESS)
+        self.assertEqual(docs.priority, Task.Priority.HIGH)
+        self.assertEqual(docs.assignee, self.member)
+        self.assertEqual(docs.author, self.user)
+        self.assertIsNotNone(docs.reminder_at)
+        self.assertEqual(Task.objects.get(title="Ship it").assignee, self.member)
+        # Appended after the existing task of the TODO column.
+        self.assertEqual(Task.objects.get(title="Plain").order, 1)
+        self.assertEqual(
+            TaskActivity.objects.filter(action=TaskActivity.Action.CREATE).count(), 4
+        )
+
+    def test_one_assignee_lookup_per_batch(self):
+        rows = "".join(
+            json.dumps({"title": f"Task {i}", "assignee": "member@example.com"}) + "\n"
+            for i in range(20)
+        )
+        task_import = self.new_import("ndjson")
+        with CaptureQueriesContext(connection) as queries:
+            run_import(task_import, BytesIO(rows.encode()), batch_size=10)
+        lookups = [q for q in queries if "projects_projectmembership" in q["sql"]]
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(Task.objects.filter(assignee=self.member).count(), 20)
+
+    def test_resume_skips_committed_rows(self):
+        rows = "title\n" + "".join(f"Task {i}\n" for i in range(10))
+        task_import = self.new_import()
+        self.assertFalse(
+            run_import(task_import, BytesIO(rows.encode()), batch_size=4, time_budget=0)
+        )
+        task_import.refresh_from_db()
+        self.assertEqual(task_import.rows_processed, 4)
+
+        self.assertTrue(run_import(task_import, BytesIO(rows.encode()), batch_size=4))
+        titles = Task.objects.filter(title__startswith="Task").values_list(
+            "title", flat=True
+        )
+        self.assertEqual(sorted(titles), sorted(f"Task {i}" for i in range(10)))
+
+    def test_upload(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = SimpleUploadedFile("tasks.csv", self.CSV.encode())
+        with TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            response = client.post(
+                f"/api/projects/{self.project.id}/import/", {"file": upload}
+            )
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data["file_format"], "csv")
+            stored = TaskImport.objects.get().file.path
+            self.assertTrue(os.path.exists(stored))
+            work(StopFlag(), burst=True)
+            # Done, so the upload is deleted.
+            self.assertFalse(os.path.exists(stored))
+
+        data = client.get(response["Location"]).data
+        self.assertEqual(data["status"], "done")
+        self.assertEqual(data["rows_imported"], 3)
+        self.assertEqual(len(data["errors"]), 3)
+        self.assertEqual(TaskImport.objects.get().file.name, "")
+
+    def test_an_upload_shared_by_another_import_is_kept(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            for _ in range(2):
+                upload = SimpleUploadedFile("tasks.csv", self.CSV.encode())
+                client.post(f"/api/projects/{self.project.id}/import/", {"file": upload})
+            first, second = TaskImport.objects.order_by("pk")
+            # Stored by content, so both point at the same blob.
+            self.assertEqual(first.file.name, second.file.name)
+            stored = first.file.path
+
+            import_tasks(import_id=first.pk)
+            self.assertTrue(os.path.exists(stored))
+            import_tasks(import_id=second.pk)
+            self.assertFalse(os.path.exists(stored))
+
+    def test_upload_requires_membership(self):
+        client = APIClient()
+        client.force_authenticate(self.other)
+        upload = SimpleUploadedFile("tasks.ndjson", b'{"title": "x"}\n')
+        response = client.post(
+            f"/api/projects/{self.project.id}/import/", {"file": upload}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(TaskImport.objects.exists())
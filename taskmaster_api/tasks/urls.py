@@ -1,11 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet, TaskOrderUpdateView, MyTasksViewSet
+from .views import (
+    TaskViewSet,
+    TaskOrderUpdateView,
+    MyTasksViewSet,
+    ArchivedTaskViewSet,
+    TaskImportViewSet,
+    CalendarTokenView,
+    CalendarFeedView,
+)
 
 # Create a router and register our viewset with it
 router = DefaultRouter()
 router.register(r"tasks", TaskViewSet, basename="task")
 router.register(r"my-tasks", MyTasksViewSet, basename="my-task")
+router.register(r"archived-tasks", ArchivedTaskViewSet, basename="archived-task")
+router.register(r"task-imports", TaskImportViewSet, basename="task-import")
 # The API URLs are now determined automatically by the render
 urlpatterns = [
     path(
@@ -13,5 +23,9 @@ urlpatterns = [
         TaskOrderUpdateView.as_view(),
         name="update_order",
     ),
+    path("calendar/", CalendarTokenView.as_view(), name="calendar-token"),
+    path(
+        "calendar/<str:token>.ics", CalendarFeedView.as_view(), name="calendar-feed"
+    ),
     path("", include(router.urls)),
 ]
@@ -1,34 +1,79 @@
 from rest_framework import viewsets, permissions, status, generics
-from .models import Task
-from django.db.models import Q
-from .serializers import TaskOrderUpdateSerializer, TaskSerializer
+from rest_framework.decorators import action
+from .models import ArchivedTask, Task, TaskActivity, TaskImport
+from django.db.models import Count, Q
+from .serializers import (
+    ArchivedTaskSerializer,
+    CalendarFeedSerializer,
+    MyTaskCountsSerializer,
+    TaskActivitySerializer,
+    TaskImportSerializer,
+    TaskOrderUpdateSerializer,
+    TaskSerializer,
+)
+from .activity import acting_as, batched_activity, classify, diff, record
+from .calendar import calendar_tasks, feed_etag, iter_calendar
+from projects.models import ProjectMembership
+from rest_framework.filters import SearchFilter
+from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models.query import QuerySet
 from .permissions import IsProjectMemberForTask
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .pagination import TaskPagination
+from .filters import TaskFilter
+from .pagination import ActivityPagination, ArchivePagination, TaskPagination
+from .archive import restore_task
+from .reminders import reminder_time
+from .export import FORMATS as EXPORT_FORMATS, export_tasks
+from .stats import invalidate_project_stats
 from rest_framework.request import Request
 from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from rest_framework.views import APIView
+from core.fieldsets import SparseFieldsetViewMixin
 
 
 from typing import cast
 from users.models import CustomUser
 
 
+class ActivityFeedMixin:
+    """
+    Adds `activity_response()`, which returns a page of task activity,
+    newest first, with keyset (cursor) pagination.
+    """
+
+    def activity_response(self, activity):
+        paginator = ActivityPagination()
+        page = paginator.paginate_queryset(
+            activity.select_related("actor"), self.request, view=self
+        )
+        serializer = TaskActivitySerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
 # Create your views here.
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ActivityFeedMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows tasks to be viewed or edited.
     A user can only see and edit their own tasks.
     Supports filtering by status, e.g., /api/tasks/?status=TODO
+    and sparse fieldsets, e.g., /api/tasks/?fields=id,title,assignee_details
     """
 
     serializer_class = TaskSerializer
     # allow only logged in users
     permission_classes = [permissions.IsAuthenticated, IsProjectMemberForTask]
 
-    filterset_fields = ["status", "project", "author"]
+    filterset_class = TaskFilter
     pagination_class = TaskPagination
     request: Request
 
@@ -48,6 +93,18 @@ class TaskViewSet(viewsets.ModelViewSet):
                 required=False,
                 type=OpenApiTypes.INT,  # Use INT since it's an ID
             ),
+            OpenApiParameter(
+                name="fields",
+                description="Comma-separated fields to return, e.g. id,title,project_details.title",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="expand",
+                description="Comma-separated relations to nest; the others are returned as ids",
+                required=False,
+                type=str,
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -69,15 +126,44 @@ class TaskViewSet(viewsets.ModelViewSet):
 
         user = cast(CustomUser, self.request.user)
 
-        tasks_in_my_projects = Q(project__members=user)
+        # An IN subquery rather than a join through project__members, so
+        # both branches of the OR seek an index (project_id and author_id)
+        # instead of scanning every task. It also yields each task once, so
+        # no .distinct() is needed.
+        memberships = ProjectMembership.objects.filter(user=user).values("project_id")
+        tasks_in_my_projects = Q(project__in=memberships)
         # assigned_to_me = Q(assignee=user, project__isnull=True)
         my_personal_tasks = Q(author=user, project__isnull=True)
+        tasks = Task.objects.filter(tasks_in_my_projects | my_personal_tasks)
 
-        return Task.objects.filter(tasks_in_my_projects | my_personal_tasks).distinct()
+        if self.action == "activity":
+            # Only what the permission check needs.
+            return tasks.only("id", "project", "author")
+
+        return self.optimize_queryset(tasks)
 
     def perform_create(self, serializer):
         """Ensure the author is the currently logged-in user."""
-        serializer.save(author=self.request.user)
+        with acting_as(self.request.user):
+            serializer.save(author=self.request.user)
+
+    def perform_update(self, serializer):
+        with acting_as(self.request.user):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with acting_as(self.request.user):
+            instance.delete()
+
+    @extend_schema(responses=TaskActivitySerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def activity(self, request, pk=None):
+        """
+        The task's change history, newest first. Page with the `next` and
+        `previous` links.
+        """
+        task = self.get_object()
+        return self.activity_response(TaskActivity.objects.filter(task=task))
 
     def create(self, request, *args, **kwargs):
         """
@@ -129,9 +215,49 @@ class TaskOrderUpdateView(generics.GenericAPIView):
         status_update = serializer.validated_data["status"]
         ordered_ids = serializer.validated_data["ordered_ids"] or []
 
-        # The rest of your logic remains the same.
-        for index, task_id in enumerate(ordered_ids):
-            Task.objects.filter(id=task_id).update(order=index, status=status_update)
+        positions = {task_id: index for index, task_id in enumerate(ordered_ids)}
+        tasks = list(
+            Task.objects.filter(id__in=positions).only(
+                "id",
+                "title",
+                "project",
+                "status",
+                "order",
+                "deadline",
+                "reminder_at",
+                "updated_at",
+            )
+        )
+
+        # Only the tasks that actually move are written, with one UPDATE per
+        # batch, and their activity is one bulk INSERT.
+        moved = []
+        now = timezone.now()
+        with acting_as(request.user), batched_activity():
+            for task in tasks:
+                changes = diff(
+                    task._loaded_values,
+                    {"status": status_update, "order": positions[task.id]},
+                )
+                if changes:
+                    if "status" in changes:
+                        # What Task.save() would do: bulk_update() skips
+                        # auto_now, and the archiver and the calendar feed
+                        # go by updated_at.
+                        task.updated_at = now
+                        task.reminder_at = reminder_time(task.deadline, status_update)
+                    task.status = status_update
+                    task.order = positions[task.id]
+                    moved.append(task)
+                    record(task, classify(changes), changes)
+            Task.objects.bulk_update(
+                moved,
+                ["order", "status", "updated_at", "reminder_at"],
+                batch_size=500,
+            )
+
+        # bulk_update() skips Task.save(), so refresh the dashboards here.
+        invalidate_project_stats(*{task.project_id for task in moved})
 
         return Response(
             {"detail": "Task order updated successfully."},
@@ -139,16 +265,40 @@ class TaskOrderUpdateView(generics.GenericAPIView):
         )
 
 
-class MyTasksViewSet(viewsets.ReadOnlyModelViewSet):
+class MyTasksViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     A read-only endpoint that returns tasks relevant to the current user,
     specifically where they are the author OR an assignee.
+    Narrow it down with ?role=author or ?role=assignee.
     """
 
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = TaskPagination
-    filterset_fields = ["status", "project"]  # You can still filter your tasks
+    filterset_class = TaskFilter  # You can still filter your tasks
+
+    ROLES = ["author", "assignee"]
+
+    def my_tasks(self, user, role=None):
+        """
+        The user's tasks in the given role, or in either role.
+
+        Each role is one index lookup. For both, the ids of the two lookups
+        are merged with a UNION (which only deduplicates ids) and the rows
+        are then read by primary key, so filters, ordering and LIMIT/OFFSET
+        all stay in SQL.
+        """
+        if role == "author":
+            tasks = Task.objects.filter(author=user)
+        elif role == "assignee":
+            tasks = Task.objects.filter(assignee=user)
+        else:
+            authored = Task.objects.filter(author=user).order_by().values("pk")
+            assigned = Task.objects.filter(assignee=user).order_by().values("pk")
+            tasks = Task.objects.filter(pk__in=authored.union(assigned))
+        # Projects waiting for their purge are hidden; their tasks may still
+        # be around for a while.
+        return tasks.filter(Q(project__isnull=True) | Q(project__deleted_at__isnull=True))
 
     def get_queryset(self) -> QuerySet[Task]:  # type: ignore
         """
@@ -158,13 +308,174 @@ class MyTasksViewSet(viewsets.ReadOnlyModelViewSet):
             return Task.objects.none()
 
         user = cast(CustomUser, self.request.user)
+        role = self.request.query_params.get("role")
+        if role and role not in self.ROLES:
+            raise ValidationError(
+                {"role": [f"Choose one of: {', '.join(self.ROLES)}."]}
+            )
+
+        tasks = self.my_tasks(user, role)
+        if self.action in ["export", "counts"]:
+            return tasks
+        return self.optimize_queryset(tasks)
+
+    @extend_schema(responses=MyTaskCountsSerializer)
+    @action(detail=False, methods=["get"])
+    def counts(self, request):
+        """
+        How many of the user's tasks there are, and how many of them they
+        authored and are assigned, with the same filters as the list
+        (?role= is ignored). One pass over the union of both roles.
+        """
+        user = cast(CustomUser, request.user)
+        tasks = self.filter_queryset(self.my_tasks(user))
+        counts = tasks.aggregate(
+            total=Count("pk"),
+            author=Count("pk", filter=Q(author=user)),
+            assignee=Count("pk", filter=Q(assignee=user)),
+        )
+        return Response(MyTaskCountsSerializer(counts).data)
 
-        # Condition 1: The user is the author of the task.
-        is_author = Q(author=user)
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                description="csv (default) or ndjson",
+                required=False,
+                type=str,
+                enum=list(EXPORT_FORMATS),
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Streams the user's tasks as CSV or NDJSON, with the same filters as
+        the list. Rows are unordered: sorting the two index lookups behind
+        the UNION would hold back the first byte until every row was read.
+        """
+        return export_tasks(request, self.get_queryset().order_by(), "my-tasks")
 
-        # Condition 2: The user is one of the assignees for the task.
-        # This assumes you have a ManyToManyField named 'assignees' on your Task model.
-        is_assignee = Q(assignee=user)
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="role",
+                description="Only tasks the user authored, or is assigned",
+                required=False,
+                type=str,
+                enum=ROLES,
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class ArchivedTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Archived (long-finished) tasks the user can see, most recently archived
+    first. Supports ?project=, ?author= and ?search= on title and description.
+    POST .../restore/ moves a task back to the board.
+    """
+
+    serializer_class = ArchivedTaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivePagination
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_fields = ["project", "author"]
+    search_fields = ["title", "description"]
+
+    def get_queryset(self):  # type: ignore
+        if not self.request.user.is_authenticated:
+            return ArchivedTask.objects.none()
+
+        user = cast(CustomUser, self.request.user)
+        # Same visibility as the live tasks; the IN subquery lets both
+        # branches of the OR use an index.
+        memberships = ProjectMembership.objects.filter(user=user).values("project_id")
+        return ArchivedTask.objects.filter(
+            Q(project__in=memberships) | Q(author=user, project__isnull=True)
+        )
+
+    @extend_schema(request=None, responses=TaskSerializer)
+    @action(detail=True, methods=["post"])
+    def restore(self, request, pk=None):
+        archived = self.get_object()
+        with acting_as(request.user):
+            task = restore_task(archived)
+        return Response(TaskSerializer(task, context=self.get_serializer_context()).data)
+
+
+class TaskImportViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Progress and error reports of the user's task imports, newest first.
+    Start one with POST /api/projects/<id>/import/.
+    """
+
+    serializer_class = TaskImportSerializer
+    permission_classes = [permissions.IsAuthenticated]
 
-        # Combine them with an OR and use distinct() to avoid duplicates.
-        return Task.objects.filter(is_author | is_assignee).distinct()
+    def get_queryset(self):  # type: ignore
+        if not self.request.user.is_authenticated:
+            return TaskImport.objects.none()
+        return TaskImport.objects.filter(user=self.request.user).order_by(
+            "-created_at"
+        )
+
+
+class CalendarTokenView(generics.GenericAPIView):
+    """
+    GET returns the URL of the user's iCalendar feed, creating its token on
+    first use. POST replaces the token, so previously shared URLs stop working.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CalendarFeedSerializer
+
+    def get_feed_response(self, user):
+        url = self.request.build_absolute_uri(
+            reverse("calendar-feed", args=[user.calendar_token])
+        )
+        return Response(self.get_serializer({"url": url}).data)
+
+    def get(self, request, *args, **kwargs):
+        user = cast(CustomUser, request.user)
+        if not user.calendar_token:
+            user.rotate_calendar_token()
+        return self.get_feed_response(user)
+
+    def post(self, request, *args, **kwargs):
+        user = cast(CustomUser, request.user)
+        user.rotate_calendar_token()
+        return self.get_feed_response(user)
+
+
+class CalendarFeedView(APIView):
+    """
+    The iCalendar feed itself. Calendar apps can't send a JWT, so the
+    unguessable token in the URL is the credential. Responses carry an ETag,
+    and polls with If-None-Match get a 304 after a single aggregate query.
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(exclude=True)
+    def get(self, request, token):
+        user = get_object_or_404(CustomUser, calendar_token=token, is_active=True)
+        tasks = calendar_tasks(user)
+
+        etag = feed_etag(tasks)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = StreamingHttpResponse(
+            iter_calendar(tasks, request.get_host().split(":")[0]),
+            content_type="text/calendar; charset=utf-8",
+        )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        response["Content-Disposition"] = 'inline; filename="taskmaster.ics"'
+        return response
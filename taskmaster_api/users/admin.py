@@ -1,9 +1,14 @@
 from django.contrib import admin
 
+from core.admin import LargeTableAdmin
+
 
 # Register your models here.
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = ("username", "email", "first_name", "last_name", "bio", "avatar")
+    # Also the search of the user autocompletes. Emails are stored
+    # lowercase, so an exact match can use the unique index.
+    search_fields = ("^username", "email__exact")
 
 
 # Register your models here.
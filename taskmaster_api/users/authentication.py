@@ -0,0 +1,21 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import revoked_tokens
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that also refuses logged-out tokens. The check is an
+    in-memory Bloom filter lookup (users/revocation.py); tokens issued
+    before a password change are refused by simplejwt's CHECK_REVOKE_TOKEN,
+    against the user it loads anyway.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revoked_tokens.is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token has been revoked."))
+        return token
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .models import normalize_email
+
+User = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticates with an email and a password, finding the user with one
+    lookup on the unique email index. Username logins (the admin) fall
+    through to ModelBackend.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        try:
+            user = User.objects.get(email=normalize_email(email))
+        except User.DoesNotExist:
+            # Hash anyway, so unknown emails take as long as wrong passwords
+            # and can't be told apart by timing.
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,57 @@
+"""
+The user directory behind the assignee and invitation pickers.
+
+A user only sees the people they share a project with (and themselves).
+Lists for one project (?project=) are cached under a per-project version,
+which changes whenever someone joins or leaves the project.
+"""
+
+import hashlib
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from projects.models import ProjectMembership
+
+User = get_user_model()
+
+VERSION_KEY = "user-directory-version:{}"
+
+
+def directory_users(user, project_id=None):
+    """
+    The users visible to `user`, optionally only the members of one of
+    their projects. The IN subqueries read the membership indexes, so a
+    user's directory never depends on the size of the users table.
+    """
+    if project_id is not None:
+        members = ProjectMembership.objects.filter(project_id=project_id)
+        return User.objects.filter(pk__in=members.values("user_id"))
+    projects = ProjectMembership.objects.filter(user=user).values("project_id")
+    members = ProjectMembership.objects.filter(project_id__in=projects)
+    return User.objects.filter(Q(pk__in=members.values("user_id")) | Q(pk=user.pk))
+
+
+def directory_cache_key(project_id, query_params):
+    version = cache.get(VERSION_KEY.format(project_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() keeps whichever version a concurrent request set first.
+        cache.add(VERSION_KEY.format(project_id), version, None)
+        version = cache.get(VERSION_KEY.format(project_id), version)
+    query = sorted(query_params.lists())
+    query = hashlib.sha256(repr(query).encode()).hexdigest()[:16]
+    return f"user-directory:{project_id}:{version}:{query}"
+
+
+def invalidate_user_directory(*project_ids):
+    """
+    Drops the cached member lists of the given projects once the current
+    transaction commits. The old entries are left to expire.
+    """
+    keys = [VERSION_KEY.format(pk) for pk in set(project_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,71 @@
+"""
+A limit on the password hashes computed at once, across all workers.
+
+A password hash is made deliberately slow, so a burst of logins or
+registrations can keep every worker busy hashing while the task endpoints
+wait. Requests that hash (login, register, password change) first lease one
+of HASHING["SLOTS"] slots in the shared cache. When they are all taken the
+request is turned away with a 503 and a Retry-After header, instead of
+taking a worker away from everyone else. A lease expires after
+HASHING["LEASE"] seconds, in case its worker died before releasing it.
+"""
+
+import random
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    "SLOTS": 2,
+    "LEASE": 10,
+    # Seconds clients are asked to wait before trying again.
+    "RETRY_AFTER": 1,
+}
+
+
+def hashing_setting(name):
+    return getattr(settings, "PASSWORD_HASHING", {}).get(name, DEFAULTS[name])
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-ins right now, please try again in a moment."
+    default_code = "hashing_busy"
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF's exception handler turns `wait` into the Retry-After header.
+        self.wait = wait
+
+
+def slot_key(number):
+    return f"password-hashing-slot:{number}"
+
+
+@contextmanager
+def hashing_slot():
+    """
+    Holds one hashing slot for the duration of the block, or raises
+    HashingBusy when none is free.
+    """
+    slots = hashing_setting("SLOTS")
+    lease = uuid.uuid4().hex
+    # Starting at a random slot spreads the attempts of concurrent requests.
+    first = random.randrange(slots)
+    for offset in range(slots):
+        key = slot_key((first + offset) % slots)
+        # add() is atomic across processes: only one request gets the slot.
+        if cache.add(key, lease, hashing_setting("LEASE")):
+            break
+    else:
+        raise HashingBusy(hashing_setting("RETRY_AFTER"))
+    try:
+        yield
+    finally:
+        # Unless the lease expired and the slot went to another request.
+        if cache.get(key) == lease:
+            cache.delete(key)
@@ -0,0 +1,98 @@
+import os
+import posixpath
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import TaskImport
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes content-addressed avatar and import blobs that are no longer "
+        "referenced by any CustomUser.avatar or TaskImport.file. Uploads of "
+        "imports that failed more than TASK_IMPORT_FAILED_UPLOAD_TTL ago count "
+        "as unreferenced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the blobs that would be deleted.",
+        )
+        parser.add_argument(
+            "--grace-seconds",
+            type=int,
+            default=int(settings.MEDIA_GC_GRACE_PERIOD.total_seconds()),
+            help="Keep unreferenced blobs that were written more recently than this.",
+        )
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        if not hasattr(storage, "is_content_addressed"):
+            self.stderr.write("The default storage is not content-addressed.")
+            return
+
+        avatars = (
+            CustomUser.objects.exclude(avatar="")
+            .exclude(avatar__isnull=True)
+            .values_list("avatar", flat=True)
+        )
+        # Imports that are done have already released their upload.
+        abandoned = TaskImport.objects.filter(
+            status=TaskImport.Status.FAILED,
+            created_at__lt=timezone.now() - settings.TASK_IMPORT_FAILED_UPLOAD_TTL,
+        )
+        imports = (
+            TaskImport.objects.exclude(file="")
+            .exclude(pk__in=abandoned.values("pk"))
+            .values_list("file", flat=True)
+        )
+        referenced = set(avatars.iterator()) | set(imports.iterator())
+        cutoff = time.time() - options["grace_seconds"]
+
+        deleted = kept = 0
+        for name in self._names(storage):
+            # Leftovers of interrupted writes are garbage as well.
+            interrupted = posixpath.basename(name).startswith(".tmp-")
+            if not interrupted and (
+                not storage.is_content_addressed(name) or name in referenced
+            ):
+                kept += 1
+                continue
+
+            # A blob that was just written may belong to a request that has not
+            # committed its user row yet, or may still be being written.
+            if os.path.getmtime(storage.path(name)) > cutoff:
+                kept += 1
+                continue
+
+            if options["dry_run"]:
+                self.stdout.write(f"would delete {name}")
+            else:
+                storage.delete(name)
+                abandoned.filter(file=name).update(file="")
+            deleted += 1
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {deleted} blob(s), kept {kept} file(s).")
+        )
+
+    def _names(self, storage):
+        for directory in ("avatars", "imports"):
+            yield from self._walk(storage, directory)
+
+    def _walk(self, storage, directory):
+        if not storage.exists(directory):
+            return
+        subdirectories, files = storage.listdir(directory)
+        for filename in files:
+            yield posixpath.join(directory, filename)
+        for subdirectory in subdirectories:
+            yield from self._walk(storage, posixpath.join(directory, subdirectory))
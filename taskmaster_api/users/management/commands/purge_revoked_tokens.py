@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the revocations of tokens that have expired since, in small "
+        "batches. Expired tokens are refused without them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows deleted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        started = time.monotonic()
+        now = timezone.now()
+        total = 0
+        while True:
+            # Served by the expires_at index.
+            ids = list(
+                RevokedToken.objects.filter(expires_at__lte=now).values_list(
+                    "pk", flat=True
+                )[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                count, _ = RevokedToken.objects.filter(pk__in=ids).delete()
+            total += count
+            if len(ids) < batch_size:
+                break
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {total} revoked token(s) in {elapsed:.2f}s.")
+        )
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+
+    clashes = list(
+        CustomUser.objects.annotate(normalized=Lower("email"))
+        .values("normalized")
+        .annotate(accounts=Count("id"))
+        .filter(accounts__gt=1)
+        .values_list("normalized", flat=True)
+    )
+    if clashes:
+        raise RuntimeError(
+            "These emails belong to several accounts that only differ by case, "
+            f"merge them before migrating: {', '.join(clashes)}"
+        )
+
+    CustomUser.objects.exclude(email=Lower("email")).update(email=Lower("email"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_customuser_created_at_customuser_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
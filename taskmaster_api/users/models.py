@@ -1,8 +1,11 @@
+import secrets
+
 from django.db import models
 
 # Create your models here.
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Collate
 from django.db.models.manager import Manager  # Import the Manager type
 
 # We use a string 'Project' as a "forward reference" to avoid circular imports.
@@ -14,8 +17,18 @@ if TYPE_CHECKING:
 
 
 def avatar_upload_path(instance, filename):
-    # file will be uploaded to MEDIA_ROOT/avatars/user_<id>/<filename>
-    return f"avatars/user_{instance.id}/{filename}"
+    # The default storage renames the file after its content hash, so the file
+    # ends up in MEDIA_ROOT/avatars/<xx>/<sha256>.<ext> and identical images
+    # uploaded by different users share one blob.
+    return f"avatars/{filename}"
+
+
+def normalize_email(email):
+    """
+    Emails are stored lowercased, so case-insensitive lookups can be plain
+    `email=` filters that seek the index instead of scanning with LIKE/UPPER.
+    """
+    return (email or "").strip().lower()
 
 
 class CustomUser(AbstractUser):
@@ -27,9 +40,53 @@ class CustomUser(AbstractUser):
         blank=True,
         help_text="User's profile picture.",
     )
+    # Secret part of the user's iCalendar feed URL; calendar apps can't send
+    # a JWT. Generated on first use, replaced when the user rotates it.
+    calendar_token = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
     projects: Manager["Project"]
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # The admin's case-insensitive prefix search on usernames; the
+            # unique index is case-sensitive, which SQLite's LIKE can't seek.
+            # Emails are stored lowercased and searched with email__exact.
+            models.Index(
+                Collate("username", "NOCASE"), name="user_username_nocase_idx"
+            ),
+        ]
+
     def __str__(self):
         return self.username
+
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
+
+    def rotate_calendar_token(self):
+        self.calendar_token = secrets.token_urlsafe(32)
+        self.save(update_fields=["calendar_token"])
+        return self.calendar_token
+
+
+class RevokedToken(models.Model):
+    """
+    A token that was revoked before it expired, by a logout. Workers keep a
+    Bloom filter of these (users/revocation.py), so only tokens that hit the
+    filter are looked up here.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="revoked_tokens"
+    )
+    # Past this the token is refused anyway; `manage.py purge_revoked_tokens`
+    # deletes the row.
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
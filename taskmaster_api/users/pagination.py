@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserDirectoryPagination(CursorPagination):
+    """
+    Keyset pagination for the user directory, by username. A type-ahead
+    only needs the first page; `next` continues after the last username.
+    """
+
+    ordering = "username"
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,162 @@
+"""
+Revocation of JSON web tokens before they expire.
+
+A logout stores the JTIs of the user's tokens in the RevokedToken table.
+Checking that table on every request would add a query to each of them, so
+each worker process keeps a Bloom filter of the revoked JTIs in memory and
+tops it up with the rows added since its last refresh, at most every
+REFRESH_INTERVAL seconds. A token the filter has never seen is accepted
+without touching the database. Only a hit, a revoked token or one of the
+rare false positives, is confirmed with a lookup of the JTI.
+
+A revocation is refused at once by the process that stored it, and by the
+other workers within REFRESH_INTERVAL seconds.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+DEFAULTS = {
+    # Seconds between two reads of the new revocations by a worker.
+    "REFRESH_INTERVAL": 2.0,
+    # Revoked tokens the filter is sized for; it is rebuilt twice as large
+    # when more are live.
+    "CAPACITY": 10_000,
+    # Share of the tokens that aren't revoked but still hit the filter, and
+    # are looked up in the database.
+    "ERROR_RATE": 0.001,
+}
+
+
+def revocation_setting(name):
+    return getattr(settings, "TOKEN_REVOCATION", {}).get(name, DEFAULTS[name])
+
+
+class BloomFilter:
+    """
+    A fixed-size set of strings that answers "maybe present" or "certainly
+    absent", sized for `capacity` entries at `error_rate` false positives.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationList:
+    """
+    The revoked JTIs known to this worker process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._filter = BloomFilter(
+            revocation_setting("CAPACITY"), revocation_setting("ERROR_RATE")
+        )
+        # Highest RevokedToken id in the filter; newer rows are read on the
+        # next refresh.
+        self._last_id = 0
+        self._refreshed_at = float("-inf")
+
+    def refresh(self, force=False):
+        """
+        Adds the revocations stored since the last refresh, unless that was
+        less than REFRESH_INTERVAL seconds ago.
+        """
+        now = time.monotonic()
+        if not force and now - self._refreshed_at < revocation_setting("REFRESH_INTERVAL"):
+            return
+        # Requests served meanwhile by other threads use the current filter.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            rows = (
+                RevokedToken.objects.filter(
+                    id__gt=self._last_id, expires_at__gt=timezone.now()
+                )
+                .order_by("id")
+                .values_list("id", "jti")
+            )
+            for row_id, jti in rows:
+                self._filter.add(jti)
+                self._last_id = row_id
+            if self._filter.count > self._filter.capacity:
+                self._rebuild()
+            self._refreshed_at = now
+        finally:
+            self._lock.release()
+
+    def _rebuild(self):
+        # A Bloom filter can't forget, so a full one is replaced by a larger
+        # one holding only the tokens that haven't expired yet.
+        rows = list(
+            RevokedToken.objects.filter(expires_at__gt=timezone.now())
+            .order_by("id")
+            .values_list("id", "jti")
+        )
+        bloom = BloomFilter(
+            max(revocation_setting("CAPACITY"), 2 * len(rows)),
+            revocation_setting("ERROR_RATE"),
+        )
+        for row_id, jti in rows:
+            bloom.add(jti)
+            self._last_id = max(self._last_id, row_id)
+        self._filter = bloom
+
+    def add(self, jti):
+        self._filter.add(jti)
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti is None or jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revoked_tokens = RevocationList()
+
+
+def revoke(user, *tokens):
+    """
+    Revokes validated simplejwt tokens of `user` until they expire.
+    """
+    for token in tokens:
+        jti = token[api_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+        RevokedToken.objects.get_or_create(
+            jti=jti, defaults={"user": user, "expires_at": expires_at}
+        )
+        revoked_tokens.add(jti)
@@ -1,14 +1,35 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth import get_user_model
 
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth.password_validation import validate_password
+
+from .models import normalize_email
+from .revocation import revoked_tokens
 
 
 User = get_user_model()
 
 
+class NormalizedEmailField(serializers.EmailField):
+    """
+    An EmailField that lowercases its value, matching how emails are stored.
+    Validators (e.g. uniqueness) run on the normalized value.
+    """
+
+    def to_internal_value(self, data):
+        return normalize_email(super().to_internal_value(data))
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -45,12 +66,22 @@ class RegisterSerializer(serializers.ModelSerializer):
         style={"input_type": "password"},
     )
 
+    email = NormalizedEmailField(
+        required=True,
+        max_length=254,
+        validators=[
+            UniqueValidator(
+                queryset=User.objects.all(),
+                message="A user with that email already exists.",
+            )
+        ],
+    )
+
     tokens = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ["username", "email", "password", "password2", "tokens"]
-        extra_kwargs = {"email": {"required": True}}
 
     def get_tokens(self, user):
         refresh = RefreshToken.for_user(user)
@@ -76,21 +107,18 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class EmailLoginSerializer(serializers.Serializer):
-    email = serializers.EmailField(required=True)
+    email = NormalizedEmailField(required=True)
     password = serializers.CharField(required=True, write_only=True)
 
     def validate(self, attrs):
         email = attrs["email"]
         password = attrs["password"]
 
-        try:
-            # We must get the user by email to find their actual username
-            user_obj = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid credentials, please try again.")
-
-        # Now we can authenticate with the username and password
-        user = authenticate(username=user_obj.username, password=password)
+        # users.backends.EmailBackend finds the user by email with a single
+        # query before checking the password.
+        user = authenticate(
+            self.context.get("request"), email=email, password=password
+        )
 
         if not user:
             raise serializers.ValidationError("Invalid credentials, please try again.")
@@ -108,4 +136,61 @@ class CheckEmailSerializer(serializers.Serializer):
     Defines the expected input.
     """
 
-    email = serializers.EmailField(required=True)
+    email = NormalizedEmailField(required=True)
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses refresh tokens that were logged out or issued before the user's
+    last password change.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if revoked_tokens.is_revoked(refresh.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken("Token has been revoked.")
+        user = (
+            User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM))
+            .only("password")
+            .first()
+        )
+        if user is not None and refresh.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise InvalidToken("The user's password has been changed.")
+        return super().validate(attrs)
+
+
+class LogoutSerializer(serializers.Serializer):
+    """
+    The refresh token to revoke along with the access token of the request.
+    """
+
+    refresh = serializers.CharField(required=False, write_only=True)
+
+    def validate_refresh(self, value):
+        try:
+            refresh = RefreshToken(value)  # type: ignore
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc))
+        if refresh.get(api_settings.USER_ID_CLAIM) != self.context["request"].user.pk:
+            raise serializers.ValidationError("This token belongs to another user.")
+        return refresh
+
+
+class ChangePasswordSerializer(serializers.Serializer):
+    old_password = serializers.CharField(
+        write_only=True, style={"input_type": "password"}
+    )
+    new_password = serializers.CharField(
+        write_only=True, style={"input_type": "password"}
+    )
+
+    def validate_old_password(self, value):
+        if not self.context["request"].user.check_password(value):
+            raise serializers.ValidationError("Wrong password.")
+        return value
+
+    def validate_new_password(self, value):
+        validate_password(value, self.context["request"].user)
+        return value
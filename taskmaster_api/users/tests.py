@@ -1,3 +1,420 @@
-from django.test import TestCase
+import os
+import time
+from datetime import timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.testing import explain_query_plan, full_scans, queryset_plan
+from projects.models import Project, ProjectMembership
+from tasks.models import TaskImport
+from .hashing import slot_key
+from .models import RevokedToken
+from .revocation import BloomFilter, revoked_tokens
+
+User = get_user_model()
+
+
+class EmailNormalizationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="alice", email="Alice@Example.COM", password="s3cret-pass"
+        )
+        self.client = APIClient()
+
+    def test_email_is_stored_lowercased(self):
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "alice@example.com")
+
+    def test_login_is_case_insensitive(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            {"email": "ALICE@example.com", "password": "s3cret-pass"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["user"]["id"], self.user.id)
+
+    def test_register_rejects_email_differing_only_by_case(self):
+        response = self.client.post(
+            "/api/auth/register/",
+            {
+                "username": "alice2",
+                "email": "alice@EXAMPLE.com",
+                "password": "an0ther-pass",
+                "password2": "an0ther-pass",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.data)
+
+    def test_check_email_seeks_the_email_index(self):
+        self.client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                "/api/auth/users/check-email/",
+                {"email": "ALICE@Example.com"},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], self.user.id)
+
+        lookups = [q["sql"] for q in context.captured_queries if "email" in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+        plan = explain_query_plan(lookups[0])
+        self.assertEqual(full_scans(plan), [], plan)
+        self.assertTrue(
+            any(line.startswith("SEARCH users_customuser USING") for line in plan), plan
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.me = User.objects.create_user(
+            username="me", email="me@example.com", password="s3cret-pass"
+        )
+        self.project = Project.objects.create(title="Apollo", owner=self.me)
+        self.colleagues = []
+        for i in range(12):
+            user = User.objects.create_user(
+                username=f"colleague{i:02}",
+                email=f"c{i}@example.com",
+                password="s3cret-pass",
+            )
+            ProjectMembership.objects.create(project=self.project, user=user)
+            self.colleagues.append(user)
+        self.stranger = User.objects.create_user(
+            username="colleague-stranger", email="stranger@example.com", password="x"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def usernames(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [user["username"] for user in response.data["results"]]
+
+    def test_scoped_and_paginated(self):
+        response = self.client.get("/api/users/")
+        usernames = self.usernames(response)
+        self.assertEqual(len(usernames), 10)
+        self.assertEqual(usernames, sorted(usernames))
+        rest = self.usernames(self.client.get(response.data["next"]))
+        self.assertEqual(len(usernames + rest), 13)
+        self.assertNotIn("colleague-stranger", usernames + rest)
+        self.assertEqual(
+            self.client.get(f"/api/users/{self.stranger.id}/").status_code, 404
+        )
+
+    def test_prefix_search(self):
+        self.assertEqual(
+            self.usernames(self.client.get("/api/users/?search=COLLEAGUE1")),
+            ["colleague10", "colleague11"],
+        )
+        self.assertEqual(
+            self.usernames(self.client.get("/api/users/?search=c3@")), ["colleague03"]
+        )
+        # Not a prefix.
+        self.assertEqual(self.usernames(self.client.get("/api/users/?search=league")), [])
+
+    def test_search_plans(self):
+        # The admin's "^username" search seeks the NOCASE index.
+        plan = queryset_plan(User.objects.filter(username__istartswith="c"))
+        self.assertIn("user_username_nocase_idx", " ".join(plan))
+
+        # The directory applies the LIKEs to the co-members only.
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/api/users/?search=c3@")
+        (search,) = [q["sql"] for q in context.captured_queries if "LIKE" in q["sql"]]
+        plan = explain_query_plan(search)
+        self.assertEqual(full_scans(plan), [], plan)
+
+    def test_project_members_are_cached(self):
+        other = Project.objects.create(title="Gemini", owner=self.stranger)
+        url = f"/api/users/?project={self.project.id}"
+        self.assertEqual(len(self.usernames(self.client.get(url))), 10)
+        self.assertEqual(
+            self.client.get(f"/api/users/?project={other.id}").status_code, 403
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        # Only the membership check.
+        self.assertEqual(len(queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                f"/api/projects/{self.project.id}/members/{self.colleagues[0].id}/"
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn("colleague00", self.usernames(self.client.get(url)))
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        # Ids of rolled back revocations are reused by the next test.
+        revoked_tokens.reset()
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="s3cret-pass"
+        )
+
+    def login(self):
+        response = APIClient().post(
+            "/api/auth/login/",
+            {"email": "alice@example.com", "password": "s3cret-pass"},
+            format="json",
+        )
+        return response.data["tokens"]
+
+    def client_for(self, tokens):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        return client
+
+    def refresh(self, tokens):
+        return APIClient().post(
+            "/api/auth/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+        )
+
+    def test_logout_revokes_the_tokens_without_a_query_per_request(self):
+        laptop, phone = self.login(), self.login()
+        revoked_tokens.refresh(force=True)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client_for(laptop).get("/api/auth/me").status_code, 200)
+        # Just the user; the token was checked against the filter.
+        self.assertEqual(len(queries), 1)
+
+        response = self.client_for(laptop).post(
+            "/api/auth/logout/", {"refresh": laptop["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client_for(laptop).get("/api/auth/me").status_code, 401)
+        self.assertEqual(self.refresh(laptop).status_code, 401)
+        # The other session is still signed in.
+        self.assertEqual(self.client_for(phone).get("/api/auth/me").status_code, 200)
+        self.assertEqual(self.refresh(phone).status_code, 200)
+
+    def test_revoked_tokens_are_refused_on_the_metrics_endpoint(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        tokens = self.login()
+        self.assertEqual(self.client_for(tokens).get("/api/_metrics").status_code, 200)
+
+        self.client_for(tokens).post(
+            "/api/auth/logout/", {"refresh": tokens["refresh"]}, format="json"
+        )
+        # 403 rather than 401: the metrics token authenticator comes first and
+        # sends no WWW-Authenticate challenge.
+        self.assertEqual(self.client_for(tokens).get("/api/_metrics").status_code, 403)
+
+    def test_other_workers_pick_up_revocations(self):
+        tokens = self.login()
+        client = self.client_for(tokens)
+        revoked_tokens.refresh(force=True)
+        # As if another worker process had stored the revocation.
+        access = AccessToken(tokens["access"])  # type: ignore
+        RevokedToken.objects.create(
+            jti=access["jti"],
+            user=self.user,
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertEqual(client.get("/api/auth/me").status_code, 200)
+        with self.settings(TOKEN_REVOCATION={"REFRESH_INTERVAL": 0}):
+            self.assertEqual(client.get("/api/auth/me").status_code, 401)
+
+    def test_password_change_revokes_older_tokens(self):
+        old = self.login()
+        response = self.client_for(old).post(
+            "/api/auth/password/",
+            {"old_password": "s3cret-pass", "new_password": "an0ther-pass!"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client_for(old).get("/api/auth/me").status_code, 401)
+        self.assertEqual(self.refresh(old).status_code, 401)
+        new = response.data["tokens"]
+        self.assertEqual(self.client_for(new).get("/api/auth/me").status_code, 200)
+
+        response = self.client_for(new).post(
+            "/api/auth/password/",
+            {"old_password": "wrong", "new_password": "an0ther-pass!"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bloom_filter_and_purge(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}")
+        self.assertTrue(all(f"revoked-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives, 200)
+
+        now = timezone.now()
+        RevokedToken.objects.create(
+            jti="expired", user=self.user, expires_at=now - timedelta(seconds=1)
+        )
+        RevokedToken.objects.create(
+            jti="live", user=self.user, expires_at=now + timedelta(days=1)
+        )
+        call_command("purge_revoked_tokens", stdout=StringIO())
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)), ["live"]
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PASSWORD_HASHING={"SLOTS": 2, "LEASE": 10, "RETRY_AFTER": 1},
+)
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="s3cret-pass"
+        )
+        self.client = APIClient()
+
+    def login(self, password="s3cret-pass"):
+        return self.client.post(
+            "/api/auth/login/",
+            {"email": "alice@example.com", "password": password},
+            format="json",
+        )
+
+    def test_login_looks_the_user_up_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.login("wrong").status_code, 400)
+        # Username logins (the admin) still work.
+        self.assertEqual(
+            authenticate(username="alice", password="s3cret-pass"), self.user
+        )
+
+    def test_logins_are_turned_away_when_every_slot_is_hashing(self):
+        cache.add(slot_key(0), "other-request")
+        self.assertEqual(self.login().status_code, 200)
+        # The slot taken by the login was given back.
+        self.assertIsNone(cache.get(slot_key(1)))
+
+        cache.add(slot_key(1), "other-request")
+        response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        response = self.client.post(
+            "/api/auth/register/",
+            {
+                "username": "bob",
+                "email": "bob@example.com",
+                "password": "an0ther-pass!",
+                "password2": "an0ther-pass!",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(User.objects.filter(username="bob").exists())
+
+        cache.delete(slot_key(0))
+        self.assertEqual(self.login().status_code, 200)
+
+
+class GcMediaTests(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media_root = self.settings(MEDIA_ROOT=directory.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.user = User.objects.create_user(
+            username="alice", email="alice@example.com", password="s3cret-pass"
+        )
+
+    def save_blob(self, content, age=None):
+        name = default_storage.save("avatars/upload.png", ContentFile(content))
+        if age is not None:
+            written = time.time() - age
+            os.utime(default_storage.path(name), (written, written))
+        return name
+
+    def gc_media(self, **options):
+        out = StringIO()
+        call_command("gc_media", grace_seconds=3600, stdout=out, **options)
+        return out.getvalue()
+
+    def test_only_old_unreferenced_blobs_are_deleted(self):
+        referenced = self.save_blob(b"in use", age=86400)
+        User.objects.filter(pk=self.user.pk).update(avatar=referenced)
+        orphan = self.save_blob(b"orphan", age=86400)
+        recent = self.save_blob(b"just uploaded")
+        # Uploaded before the storage was content-addressed.
+        legacy = default_storage.path("avatars/legacy.png")
+        with open(legacy, "wb") as legacy_file:
+            legacy_file.write(b"not hashed")
+        os.utime(legacy, (time.time() - 86400,) * 2)
+
+        output = self.gc_media()
+        self.assertIn("Deleted 1 blob(s), kept 3 file(s).", output)
+        self.assertFalse(default_storage.exists(orphan))
+        for name in (referenced, recent, "avatars/legacy.png"):
+            self.assertTrue(default_storage.exists(name), name)
+
+    def test_dry_run_deletes_nothing(self):
+        orphan = self.save_blob(b"orphan", age=86400)
+        output = self.gc_media(dry_run=True)
+        self.assertIn(f"would delete {orphan}", output)
+        self.assertTrue(default_storage.exists(orphan))
+
+    def test_uploads_of_abandoned_imports_are_collected(self):
+        project = Project.objects.create(title="Apollo", owner=self.user)
+        long_ago = timezone.now() - settings.TASK_IMPORT_FAILED_UPLOAD_TTL
+        imports = {}
+        for label, status, created_at in (
+            ("abandoned", TaskImport.Status.FAILED, long_ago),
+            ("failed", TaskImport.Status.FAILED, timezone.now()),
+            ("pending", TaskImport.Status.PENDING, long_ago),
+        ):
+            task_import = TaskImport(
+                project=project, user=self.user, file_format="csv", status=status
+            )
+            task_import.file.save(f"{label}.csv", ContentFile(label.encode()))
+            TaskImport.objects.filter(pk=task_import.pk).update(created_at=created_at)
+            written = time.time() - 86400
+            os.utime(task_import.file.path, (written, written))
+            imports[label] = task_import
+        orphan = default_storage.save("imports/lost.csv", ContentFile(b"lost"))
+        os.utime(default_storage.path(orphan), (time.time() - 86400,) * 2)
+
+        self.assertIn("Deleted 2 blob(s), kept 2 file(s).", self.gc_media())
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(default_storage.exists(imports["abandoned"].file.name))
+        self.assertEqual(TaskImport.objects.get(pk=imports["abandoned"].pk).file, "")
+        for label in ("failed", "pending"):
+            self.assertTrue(default_storage.exists(imports[label].file.name), label)
+
+    def test_reuploading_an_old_blob_restarts_its_grace_period(self):
+        orphan = self.save_blob(b"orphan", age=86400)
+        # Uploaded again by a request that hasn't committed its user row yet.
+        self.assertEqual(self.save_blob(b"orphan"), orphan)
+
+        self.gc_media()
+        self.assertTrue(default_storage.exists(orphan))
@@ -4,6 +4,8 @@ from .views import (
     UserViewSet,
     RegisterView,
     EmailLoginView,
+    LogoutView,
+    ChangePasswordView,
     CurrentUserView,
     UpdateUserView,
     CheckEmailView,
@@ -13,6 +15,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 auth_urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path("login/", EmailLoginView.as_view(), name="login"),
+    path("logout/", LogoutView.as_view(), name="logout"),
+    path("password/", ChangePasswordView.as_view(), name="change_password"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("me", CurrentUserView.as_view(), name="current_user"),
     path("profile/", UpdateUserView.as_view(), name="update_user"),
@@ -10,8 +10,22 @@ from .serializers import (
     EmailLoginSerializer,
     UserDetailSerializer,
     CheckEmailSerializer,
+    LogoutSerializer,
+    ChangePasswordSerializer,
 )
 from rest_framework.views import APIView
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.filters import SearchFilter
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from projects.models import ProjectMembership
+from .directory import directory_cache_key, directory_users
+from .pagination import UserDirectoryPagination
+from .hashing import hashing_slot
+from .revocation import revoke
 
 
 # Create your views here.
@@ -21,12 +35,60 @@ User = get_user_model()
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    API endpoint that allows users to be viewed.
+    The user directory: the people who share a project with you, by
+    username, 10 per page. ?search= matches the start of the username or
+    email, ?project= lists the members of one of your projects.
     """
 
-    queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserDirectoryPagination
+    filter_backends = [SearchFilter]
+    # Prefix matches. They are checked only on the rows the membership
+    # subqueries select, which bounds the scan to the caller's co-members.
+    search_fields = ["^username", "^email"]
+
+    @cached_property
+    def project_id(self):
+        value = self.request.query_params.get("project")
+        if not value:
+            return None
+        try:
+            project_id = int(value)
+        except ValueError:
+            raise ValidationError({"project": ["A valid integer is required."]})
+        if not ProjectMembership.objects.filter(
+            project_id=project_id, user=self.request.user
+        ).exists():
+            raise PermissionDenied("You are not a member of this project.")
+        return project_id
+
+    def get_queryset(self):  # type: ignore
+        if not self.request.user.is_authenticated:
+            return User.objects.none()
+        return directory_users(self.request.user, self.project_id).only(
+            "id", "username", "email", "avatar"
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="project",
+                description="Only the members of this project",
+                required=False,
+                type=OpenApiTypes.INT,
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        if self.project_id is None:
+            return super().list(request, *args, **kwargs)
+        key = directory_cache_key(self.project_id, request.query_params)
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, settings.USER_DIRECTORY_CACHE_TIMEOUT)
+        return Response(data)
 
 
 class RegisterView(generics.CreateAPIView):
@@ -37,7 +99,8 @@ class RegisterView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        with hashing_slot():
+            user = serializer.save()
 
         refresh = RefreshToken.for_user(user)
 
@@ -63,7 +126,9 @@ class EmailLoginView(generics.GenericAPIView):
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        # Validation checks the password.
+        with hashing_slot():
+            serializer.is_valid(raise_exception=True)
         user = serializer.validated_data
 
         refresh = RefreshToken.for_user(user)
@@ -83,6 +148,53 @@ class EmailLoginView(generics.GenericAPIView):
         )
 
 
+class LogoutView(generics.GenericAPIView):
+    """
+    Revokes the access token of the request, and the refresh token in the
+    body when given, until they expire.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = LogoutSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens = [request.auth]
+        if "refresh" in serializer.validated_data:
+            tokens.append(serializer.validated_data["refresh"])
+        revoke(request.user, *tokens)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ChangePasswordView(generics.GenericAPIView):
+    """
+    Changes the password, which revokes every token issued before. Returns
+    a new pair for this client.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ChangePasswordSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        with hashing_slot():
+            serializer.is_valid(raise_exception=True)
+            user = request.user
+            user.set_password(serializer.validated_data["new_password"])
+            user.save(update_fields=["password"])
+
+        refresh = RefreshToken.for_user(user)
+        return Response(
+            {
+                "tokens": {
+                    "refresh": str(refresh),
+                    "access": str(refresh.access_token),
+                },
+            }
+        )
+
+
 class CurrentUserView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = UserSerializer
@@ -110,8 +222,9 @@ class CheckEmailView(APIView):
 
             email = serializer.validated_data["email"]  # type: ignore
 
-            user = User.objects.filter(email__iexact=email).first()
-            print(user)
+            # The serializer already lowercased the email, so this is an
+            # exact match on the unique email index.
+            user = User.objects.filter(email=email).first()
 
             if user:
                 user_serializer = UserSerializer(user)